@@ -1,11 +1,13 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
 from main import constants
 from main.utils import getEmployeesTasks as EmployeeTasks
 from main.utils import getUserBaseTemplate as base
 from main.utils import resolvePageUrl
 from warehouse_admin.models import ItemCard, RetailItem
+from warehouse_admin.stockbalance import getAvailableItems, takeGoods
 from .filters import SalesFilter
 from .forms import AddExpensesForm, AddSalesForm
 from .models import Expenses, Sales
@@ -30,23 +32,27 @@ def SalesPage(request):
 
 def AddSalesPage(request):
     form = AddSalesForm()
-    availableItems = {}
-    Items = ItemCard.objects.filter(stock=1, status='Good')
-    for i in Items:
-        availableItems[i.id] = {'name': i.type,
-                                'batch': i.batch, 'quantity': i.quantity}
+    availableItems = getAvailableItems(constants.MAIN_STORAGE_ID)
     Items = RetailItem.objects.all()
     for i in Items:
-        availableItems[i.id] = {'name': i.type,
-                                'batch': None, 'quantity': i.quantity}
+        availableItems[f'retail{i.id}'] = {'name': i.type,
+                                           'batch': None, 'quantity': i.quantity}
     if request.method == "POST":
         form = AddSalesForm(request.POST)
         if form.is_valid():
-            form.save()
-        sale = Sales.objects.all().order_by('-id')[0]
-        sale.seller = 'Main Storage'
-        sale.is_approved = True
-        sale.save()
+            with transaction.atomic():
+                sale = form.save(commit=False)
+                # The sold goods leave the main storage with the sale
+                if sale.type and sale.batch and not sale.type.is_retail \
+                        and not takeGoods(request, constants.MAIN_STORAGE_ID,
+                                          sale.type.id, sale.batch.id,
+                                          sale.quantity):
+                    messages.info(
+                        request, "Item or quantity is not available in the stock")
+                    return redirect(resolvePageUrl(request, constants.PAGES.ADD_SALES_PAGE))
+                sale.seller = 'Main Storage'
+                sale.is_approved = True
+                sale.save()
 
         return redirect(resolvePageUrl(request, constants.PAGES.SALES_PAGE))
 
@@ -146,6 +146,11 @@ urlpatterns = [
         wa_views.AddBatchPage,
         name=PAGES.ADD_BATCH_PAGE
     ),
+    path(
+        f'{PAGES.DASHBOARD}/Batch-Trace/<int:pk>/',
+        wa_views.BatchTracePage,
+        name=PAGES.BATCH_TRACE_PAGE
+    ),
     # Distributed Goods URLs
     path(
         f'{PAGES.DASHBOARD}/Distributed-Goods/',
@@ -162,12 +167,22 @@ urlpatterns = [
         wa_views.SendGoodsPage,
         name=PAGES.SEND_GOODS_PAGE
     ),
+    path(
+        f'{PAGES.DASHBOARD}/Dispatch-Goods/<str:pk>/',
+        wa_views.DispatchGoodsPage,
+        name=PAGES.DISPATCH_GOODS_PAGE
+    ),
     # Goods Movement URLs
     path(
         f'{PAGES.DASHBOARD}/Goods-Movement/',
         wa_views.GoodsMovementPage,
         name=PAGES.GOODS_MOVEMENT_PAGE
     ),
+    path(
+        f'{PAGES.DASHBOARD}/Goods-Movement/Export/',
+        wa_views.ExportGoodsMovementPage,
+        name=PAGES.EXPORT_GOODS_MOVEMENT_PAGE
+    ),
     # Damaged Goods URLs
     path(
         f'{PAGES.DASHBOARD}/Damaged-Goods/',
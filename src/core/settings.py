@@ -14,6 +14,9 @@ SECRET_KEY = 'django-insecure-o^u2=mwf6*m_1&u=!s8ut6qtvseir*9o0&ua0j&6b)=5bqn1yf
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Running the test suite
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = []
 
 # Application definition
@@ -53,6 +56,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
     # Honey Home System Middleware
+    'main.middleware.RequestContextMiddleware',
     'main.middleware.AllowedClientMiddleware',
     'main.middleware.LoginRequiredMiddleware',
     'main.middleware.AllowedUserMiddleware',
@@ -122,6 +126,97 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache
+# The local memory cache is per process, use a shared cache backend
+# (e.g. Memcached or Redis) when running more than one worker. With the local
+# memory cache the block states and the parameters version are read from the
+# database on every request
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# POST requests rate limiter backend of the 'AllowedClientMiddleware'
+# 'main.ratelimit.LocalMemoryRateLimiter': counters kept in every worker
+# 'main.ratelimit.CacheRateLimiter': counters shared through 'RATE_LIMIT_CACHE'
+RATE_LIMIT_BACKEND = 'main.ratelimit.LocalMemoryRateLimiter'
+RATE_LIMIT_CACHE = 'default'
+
+# Seconds the block state of a client is kept in the cache, the state is
+# invalidated every time its 'BlockedClient' object is saved or deleted. The
+# local memory cache of a worker misses the invalidations of the other
+# workers, so the state is kept there for the local timeout only
+BLOCK_STATE_CACHE_TIMEOUT = 60 * 60 * 24
+BLOCK_STATE_LOCAL_CACHE_TIMEOUT = 5
+
+# Seconds a worker keeps the version of the parameters read from the database
+# when the default cache is not shared by the workers, the parameters saved
+# by the other workers are reloaded once it expires
+PARAMETERS_LOCAL_CACHE_TIMEOUT = 5
+
+# Seconds the onboarding state of a user (still using the temporary account
+# or not) is kept in the cache, None keeps it until the account is replaced
+ONBOARDING_CACHE_TIMEOUT = None
+
+# Seconds the choices of the goods forms (the types and batches of every
+# stock and the distributors) are kept in the cache, they are invalidated
+# every time the cards, types, batches or distributors change. The local
+# memory cache of a worker misses the invalidations of the other workers, so
+# the choices are kept there for the local timeout only
+CHOICES_CACHE_TIMEOUT = 60 * 60 * 24
+CHOICES_LOCAL_CACHE_TIMEOUT = 30
+
+# Seconds the display names of the stocks, cards, employees, distributors and
+# weekly rates are kept in the cache, they are invalidated every time the
+# persons, distributors, types, batches or weeks change. The local memory
+# cache of a worker misses the invalidations of the other workers, so the
+# names are kept there for the local timeout only
+LABELS_CACHE_TIMEOUT = 60 * 60 * 24
+LABELS_LOCAL_CACHE_TIMEOUT = 30
+
+# Rows read from the database at a time by the CSV exports (e.g. the goods
+# movements), the export memory does not grow with the table
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+# Inventory history snapshots, taken every day by the 'snapshotInventory' cron
+# job from the inventory events older than the delay (seconds), the events of
+# the transactions that may still be open are left to the next snapshot
+INVENTORY_SNAPSHOT_DELAY = 60 * 60
+
+# Audit entries buffer, the queued entries are saved together when the buffer
+# reaches the batch size or after the flush interval in seconds. The entries
+# that failed to be saved are kept for the next flush up to the max pending.
+# The tests save every entry immediately, no entry is left for the exit flush
+AUDIT_SINK_BATCH_SIZE = 1 if TESTING else 50
+AUDIT_SINK_FLUSH_INTERVAL = 5
+AUDIT_SINK_MAX_PENDING = 10000
+
+# HTML injection detector of the post requests
+# Only the first characters of a value up to the maximum scan length are
+# scanned, the allowed fields are not scanned, and any single tag in the denied fields
+# counts as an attack
+HTML_DETECTOR_MAX_SCAN_LENGTH = 64 * 1024
+HTML_DETECTOR_ALLOWED_FIELDS = []
+HTML_DETECTOR_DENIED_FIELDS = []
+
+# Known clients filter used to detect the first visit of a client
+# The file is loaded when the workers start, build it from the 'AuditEntry'
+# table with the 'buildknownclients' command before starting them. Without
+# the file the filter starts empty and the clients are checked in the database
+KNOWN_CLIENTS_CAPACITY = 100000
+KNOWN_CLIENTS_ERROR_RATE = 0.001
+KNOWN_CLIENTS_FILE = None
+
+# Audit entries retention
+# The entries are partitioned by 'day' or 'week', the partitions older than
+# the retention days are written to the archive path as compressed JSON lines
+# and deleted by the rollover cron. Set the archive path to None to delete
+# the expired partitions without archiving them
+AUDIT_PARTITION_PERIOD = 'day'
+AUDIT_RETENTION_DAYS = 90
+AUDIT_ARCHIVE_PATH = BASE_DIR.parent / 'archive' / 'audit'
+
 EXCLUDED_PAGES_FORM_REQUIRED_AUTHENTICATION = [
     PAGES.INDEX,
     PAGES.LOGOUT,
@@ -133,9 +228,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Crontab jobs
 CRONJOBS = [
-    (CRON_AT.EVERY_HOUR, CRON_DIR.MAIN + '.setMagicNumber'),
+    (CRON_AT.EVERY_HOUR, CRON_DIR.MAIN + '.rolloverAuditEntries'),
     (CRON_AT.EVERY_MINUTE, CRON_DIR.HUMAN_RESOURCES + '.checkTaskDateTime'),
     (CRON_AT.FIRST_MINUTE_ON_SUNDAY, CRON_DIR.HUMAN_RESOURCES + '.addWeekToRate'),
+    (CRON_AT.EVERY_DAY, CRON_DIR.WAREHOUSE_ADMIN + '.snapshotInventory'),
+    (CRON_AT.FIRST_MINUTE_ON_SUNDAY, CRON_DIR.WAREHOUSE_ADMIN + '.compactItemCards'),
 ]
 
 LOGS_PATH = BASE_DIR.parent / 'logs'
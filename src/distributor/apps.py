@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class DistributorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'distributor'
+
+    def ready(self) -> None:
+        from main import signals as main_signals
+        from .models import Distributor
+
+        # Keep the cached display names of the distributors and stocks up to date
+        post_save.connect(main_signals.onChangingLabelsNames, sender=Distributor)
+        post_delete.connect(main_signals.onChangingLabelsNames,
+                            sender=Distributor)
+
+        return super().ready()
@@ -1,5 +1,8 @@
+from typing import Dict, Iterable
+
 from django.contrib.auth.models import User
 from django.db import models
+from main.labels import getLabel
 from main.models import BaseModel, Person
 from warehouse_admin.models import ItemType, Batch, Stock
 
@@ -15,7 +18,15 @@ class Distributor(BaseModel):
         Stock, on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self) -> str:
-        return self.person.name
+        return getLabel(self)
+
+    @classmethod
+    def getLabels(cls, ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Get the display names of the distributors with one query.
+        """
+        return dict(cls.objects.filter(id__in=ids, person__isnull=False)
+                    .values_list('id', 'person__name'))
 
     @property
     def getId(self) -> int:
@@ -3,6 +3,7 @@ from django.db.models.functions import Lower
 from django.forms import ModelForm
 from django.http import HttpRequest
 from django import forms
+from main.admin import LabelsModelAdmin
 from main.constants import BASE_MODEL_FIELDS, ROWS_PER_PAGE
 from main.utils import setCreatedByUpdatedBy
 
@@ -14,6 +15,7 @@ class EmployeeAdmin(ModelAdmin):
     list_display = ('name', 'account',
                     'position', *BASE_MODEL_FIELDS)
     list_filter = ('created',)
+    list_select_related = ('person', 'account')
     search_fields = ('person__name', 'account__username')
     ordering = (Lower('person__name'),)
     list_per_page = ROWS_PER_PAGE
@@ -28,12 +30,13 @@ class EmployeeAdmin(ModelAdmin):
 
 
 @register(Task)
-class TaskAdmin(ModelAdmin):
+class TaskAdmin(LabelsModelAdmin):
     list_display = ('employee', 'task', 'description',
                     'status', 'receiving_date', 'deadline_date',
                     'time_left', 'submission_date', 'is_rated',
                     *BASE_MODEL_FIELDS)
     list_filter = ('status', 'is_rated', 'created')
+    list_select_related = ('employee',)
     search_fields = ('employee__person__name', 'description')
     ordering = ('-updated',)
     list_per_page = ROWS_PER_PAGE
@@ -49,6 +52,7 @@ class TaskRateAdmin(ModelAdmin):
     list_display = ('id', 'task', 'on_time_rate',
                     'rate', *BASE_MODEL_FIELDS)
     list_filter = ('created',)
+    list_select_related = ('task',)
     search_fields = ('task__name',)
     ordering = ('created',)
     list_per_page = ROWS_PER_PAGE
@@ -75,10 +79,11 @@ class WeekAdmin(ModelAdmin):
 
 
 @register(WeeklyRate)
-class WeeklyRateAdmin(ModelAdmin):
+class WeeklyRateAdmin(LabelsModelAdmin):
     list_display = ('id', 'week', 'employee',
                     'rate', *BASE_MODEL_FIELDS)
     list_filter = ('created',)
+    list_select_related = ('week', 'employee')
     search_fields = ('week__week_start_date',)
     ordering = ('created',)
     list_per_page = ROWS_PER_PAGE
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 
 
 class HumanResourcesConfig(AppConfig):
@@ -9,7 +9,8 @@ class HumanResourcesConfig(AppConfig):
     def ready(self) -> None:
         from . import signals
         from distributor.models import Distributor
-        from .models import Employee, Task
+        from main import signals as main_signals
+        from .models import Employee, Task, Week, WeeklyRate
 
         # After creating new employee/distributor or update
         post_save.connect(signals.onAddingUpdatingEmployee, sender=Employee)
@@ -20,4 +21,12 @@ class HumanResourcesConfig(AppConfig):
         pre_delete.connect(signals.deleteUserAccount, sender=Distributor)
         pre_delete.connect(signals.deleteTaskRate, sender=Task)
 
+        # Keep the cached display names of the employees and rates up to date
+        for model in (Employee, WeeklyRate):
+            post_save.connect(main_signals.onChangingLabelledObject, sender=model)
+            post_delete.connect(main_signals.onChangingLabelledObject,
+                                sender=model)
+        post_save.connect(main_signals.onChangingLabelsNames, sender=Week)
+        post_delete.connect(main_signals.onChangingLabelsNames, sender=Week)
+
         return super().ready()
@@ -1,10 +1,11 @@
-from typing import Union
+from typing import Dict, Iterable, Union
 
 from django.contrib.auth.models import User
 from django.db import models
 from django.http import HttpRequest
 from django.utils import timezone
 
+from main.labels import getLabel
 from main.models import BaseModel, Person
 from main import constants
 
@@ -19,7 +20,15 @@ class Employee(BaseModel):
                                      choices=constants.CHOICES.POSITIONS)
 
     def __str__(self) -> str:
-        return self.person.name
+        return getLabel(self)
+
+    @classmethod
+    def getLabels(cls, ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Get the display names of the employees with one query.
+        """
+        return dict(cls.objects.filter(id__in=ids, person__isnull=False)
+                    .values_list('id', 'person__name'))
 
     def setPerson(self, requester: Union[HttpRequest, str], person: Person) -> None:
         self.person = person
@@ -93,11 +102,11 @@ class Task(BaseModel):
         self.setCreatedByUpdatedBy(requester)
 
     def setDeadlineDate(self, requester: Union[HttpRequest, str], deadline_date: timezone.datetime) -> None:
-        self.deadline_date = timezone.datetime(deadline_date)
+        self.deadline_date = deadline_date
         self.setCreatedByUpdatedBy(requester)
 
     def setSubmissionDate(self, requester: Union[HttpRequest, str], submission_date: timezone.datetime) -> None:
-        self.submission_date = timezone.datetime(submission_date)
+        self.submission_date = submission_date
         self.setCreatedByUpdatedBy(requester)
 
     def setRated(self, requester: Union[HttpRequest, str], is_rated: bool) -> None:
@@ -156,7 +165,16 @@ class WeeklyRate(BaseModel):
     rate: float = models.FloatField()
 
     def __str__(self) -> str:
-        return f"{str(self.week)} - {self.employee.person.name}"
+        return getLabel(self)
+
+    @classmethod
+    def getLabels(cls, ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Get the display names of the weekly rates with one query.
+        """
+        return {id: f"{week_start_date} - {name}" for id, week_start_date, name
+                in cls.objects.filter(id__in=ids).values_list(
+                    'id', 'week__week_start_date', 'employee__person__name')}
 
     def setWeek(self, requester: Union[HttpRequest, str], week: Week) -> None:
         self.week = week
@@ -5,6 +5,7 @@ from django.contrib.auth.models import User, Group
 from distributor.models import Distributor
 from main import constants
 from main.models import Person
+from main.onboarding import setOnboardingState
 from warehouse_admin.models import Stock
 
 from .models import Task, TaskRate, Employee
@@ -37,6 +38,8 @@ def _createUserAccount(person: Person, is_ceo: Optional[bool] = False) -> User:
             first_name=first_name,
             last_name=last_name,
         )
+    # The user must create a new account on the first login
+    setOnboardingState(account, True)
     return account
 
 
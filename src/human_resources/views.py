@@ -10,6 +10,7 @@ from django.utils import timezone
 from distributor.models import Distributor
 from main import constants
 from main import messages as MSG
+from main.labels import invalidateLabels
 from main.models import Person
 from main.utils import Pagination
 from main.utils import getUserBaseTemplate as base
@@ -299,23 +300,25 @@ def weeklyEvaluationPage(request: HttpRequest) -> HttpResponse:
                                                         ~Q(position=constants.ROLES.HUMAN_RESOURCES))
         context['Employees'] = Employees
         if len(weeks) > 1:
-            unrated_weeks_to_delete: int = 0
-            for index, week in enumerate(weeks):
-                if index == len(weeks) - 1:
-                    MSG.MANY_WEEKS(request)
-                    MSG.WEEKS_DELETED(request, unrated_weeks_to_delete)
-                    MSG.INFORM_CEO(request)
-                else:
-                    week.delete(constants.SYSTEM_NAME)
-                    unrated_weeks_to_delete += 1
+            # Keep only the last unrated week
+            last_week: Week = weeks.order_by('id').last()
+            unrated_weeks_to_delete: int = weeks.exclude(
+                id=last_week.id).auditedDelete(constants.SYSTEM_NAME)
+            weeks = Week.filter(id=last_week.id)
+            MSG.MANY_WEEKS(request)
+            MSG.WEEKS_DELETED(request, unrated_weeks_to_delete)
+            MSG.INFORM_CEO(request)
         if request.method == constants.POST:
+            weekly_rates: list[WeeklyRate] = []
             for emp in Employees:
                 val: float = request.POST.get(f'val{str(emp.id)}', False)
-                WeeklyRate.create(
-                    request,
-                    week=weeks[0],
-                    employee=emp,
-                    rate=int(val))
+                weekly_rates.append(WeeklyRate(week=weeks[0],
+                                               employee=emp,
+                                               rate=int(val)))
+            WeeklyRate.bulkCreate(request, weekly_rates)
+            # The bulk insert sends no signals, a cached name of a reused ID
+            # must not stay
+            invalidateLabels()
 
             # Automatically rate the HR depends on his last week task rate
             hr: Employee = Employee.get(
@@ -328,31 +331,21 @@ def weeklyEvaluationPage(request: HttpRequest) -> HttpResponse:
 
             weeks[0].setRated(request, True)
 
-            task: Task = None
-            something_wrong: bool = False
-            try:
-                task = Task.get(name="Evaluate employees",
-                                employee=hr,
-                                is_rated=False)
-            except Task.MultipleObjectsReturned:
-                tasks: QuerySet[Task] = Task.filter(name="Evaluate employees",
-                                                    employee=hr,
-                                                    is_rated=False)
-                for index, _task in enumerate(tasks):
-                    if index == len(tasks) - 1:
-                        task = _task
-                    else:
-                        _task.delete(constants.SYSTEM_NAME)
-            except Task.DoesNotExist:
+            tasks: QuerySet[Task] = Task.filter(name="Evaluate employees",
+                                                employee=hr,
+                                                is_rated=False)
+            # Keep only the last task, None if there is no task
+            task: Task = tasks.order_by('id').last()
+            if task is None:
                 MSG.SOMETHING_WRONG(request)
-                something_wrong = True
-
-            if not something_wrong:
-                task.setStatus(constants.SYSTEM_NAME,
-                               constants.TASK_STATUS.ON_TIME)
-                task.setSubmissionDate(constants.SYSTEM_NAME,
-                                       timezone.now())
-                task.setRated(constants.SYSTEM_NAME, True)
+            else:
+                tasks.exclude(id=task.id).auditedDelete(constants.SYSTEM_NAME)
+                with Task.unitOfWork(constants.SYSTEM_NAME):
+                    task.setStatus(constants.SYSTEM_NAME,
+                                   constants.TASK_STATUS.ON_TIME)
+                    task.setSubmissionDate(constants.SYSTEM_NAME,
+                                           timezone.now())
+                    task.setRated(constants.SYSTEM_NAME, True)
                 TaskRate.create(constants.SYSTEM_NAME, task=task,
                                 on_time_rate=5, rate=5)
 
@@ -408,9 +401,11 @@ def taskEvaluationPage(request: HttpRequest) -> HttpResponse:
             TaskRate.create(task=auto_task,
                             on_time_rate=on_time,
                             rate=float(5))
-            auto_task.setStatus(constants.SYSTEM_NAME, status)
-            auto_task.setRated(constants.SYSTEM_NAME, True)
-            auto_task.setSubmissionDate(constants.SYSTEM_NAME, timezone.now())
+            with Task.unitOfWork(constants.SYSTEM_NAME):
+                auto_task.setStatus(constants.SYSTEM_NAME, status)
+                auto_task.setRated(constants.SYSTEM_NAME, True)
+                auto_task.setSubmissionDate(constants.SYSTEM_NAME,
+                                            timezone.now())
         else:
             auto_task.delete(constants.SYSTEM_NAME)
 
@@ -1,13 +1,67 @@
-from django.contrib.admin import ModelAdmin, register
+from typing import Dict
+
+from django.contrib.admin import ModelAdmin, RelatedFieldListFilter, register
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist
 from django.db.models.functions import Lower
 from django.forms import ModelForm
 from django.http import HttpRequest
 
-from .constants import BASE_MODEL_FIELDS, PARAMETERS, ROWS_PER_PAGE
-from .models import AuditEntry, BlockedClient, Parameter, Person
+from .constants import BASE_MODEL_FIELDS, ROWS_PER_PAGE
+from .labels import loadLabels
+from .models import AuditEntry, BlockedClient, ClientState, Parameter, Person
 from .utils import setCreatedByUpdatedBy
 
 
+class LabelsChangeList(ChangeList):
+    """
+    Load the display names of the related objects of the page with one query
+    per model before the rows are rendered.
+    """
+
+    def get_results(self, request) -> None:
+        super().get_results(request)
+        for name in self.list_display:
+            if name == '__str__':
+                if hasattr(self.model, 'getLabels'):
+                    loadLabels(self.model,
+                               [obj.pk for obj in self.result_list])
+                continue
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.many_to_one and hasattr(field.related_model, 'getLabels'):
+                loadLabels(field.related_model, {getattr(obj, field.attname)
+                                                 for obj in self.result_list})
+
+
+class RelatedLabelsFilter(RelatedFieldListFilter):
+    """
+    The related objects filter of the admin with the display names loaded
+    from the labels cache.
+    """
+
+    def field_choices(self, field, request, model_admin) -> list:
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        related = field.related_model._default_manager.all()
+        if ordering:
+            related = related.order_by(*ordering)
+        pks: list = list(related.values_list('pk', flat=True))
+        labels: Dict = loadLabels(field.related_model, pks)
+        return [(pk, labels[pk]) for pk in pks]
+
+
+class LabelsModelAdmin(ModelAdmin):
+    """
+    The model admin of the changelists that show objects named by the labels
+    cache.
+    """
+
+    def get_changelist(self, request, **kwargs):
+        return LabelsChangeList
+
+
 @register(AuditEntry)
 class AuditEntryAdmin(ModelAdmin):
     list_display = ('action', 'user_agent', 'username', 'ip',
@@ -24,6 +78,23 @@ class AuditEntryAdmin(ModelAdmin):
         return False
 
 
+@register(ClientState)
+class ClientStateAdmin(ModelAdmin):
+    list_display = ('ip', 'failed_attempts', 'suspicious_posts',
+                    'last_post_at', 'first_seen', 'block_type',
+                    'blocked_times', 'window_start', *BASE_MODEL_FIELDS)
+    list_filter = ('block_type', 'window_start',)
+    search_fields = ('ip',)
+    list_per_page = ROWS_PER_PAGE
+    exclude = BASE_MODEL_FIELDS
+
+    def has_add_permission(self, *args, **kwargs) -> bool:
+        return False
+
+    def has_change_permission(self, *args, **kwargs) -> bool:
+        return False
+
+
 @register(BlockedClient)
 class BlockedClientAdmin(ModelAdmin):
     list_display = ('user_agent', 'ip', 'block_type',
@@ -54,11 +125,6 @@ class ParameterAdmin(ModelAdmin):
     def parameter(self, obj: Parameter) -> str:
         return obj.getName.replace('_', ' ').capitalize()
 
-    def get_queryset(self, request: HttpRequest):
-        EXCLUDED_PARAMETERS: list = [PARAMETERS.MAGIC_NUMBER]
-        queryset = super().get_queryset(request)
-        return queryset.exclude(name__in=EXCLUDED_PARAMETERS)
-
     def has_add_permission(self, *args, **kwargs) -> bool:
         return False
 
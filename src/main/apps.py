@@ -1,7 +1,8 @@
 from django.apps import AppConfig
 from django.contrib.auth.signals import (user_logged_in, user_logged_out,
                                          user_login_failed)
-from django.db.models.signals import post_migrate
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_save)
 
 
 class MainConfig(AppConfig):
@@ -10,6 +11,8 @@ class MainConfig(AppConfig):
 
     def ready(self) -> None:
         from . import signals
+        from .models import AuditEntry, BlockedClient, Parameter, Person
+        from .visitors import getKnownClients
 
         user_logged_in.connect(signals.userLoggedIn)
         user_logged_out.connect(signals.userLoggedOut)
@@ -18,4 +21,29 @@ class MainConfig(AppConfig):
         post_migrate.connect(signals.createGroups, sender=self)
         post_migrate.connect(signals.createParameters, sender=self)
 
+        # Reload the parameters in all the workers after any change
+        post_save.connect(signals.onChangingParameter, sender=Parameter)
+        post_delete.connect(signals.onChangingParameter, sender=Parameter)
+
+        # Keep the cached block state of the clients up to date
+        pre_save.connect(signals.onSavingBlockedClient, sender=BlockedClient)
+        post_save.connect(signals.onChangingBlockedClient, sender=BlockedClient)
+        post_delete.connect(signals.onChangingBlockedClient,
+                            sender=BlockedClient)
+
+        # Keep the block fields of the client state up to date
+        post_save.connect(signals.onSavedBlockedClient, sender=BlockedClient)
+        post_delete.connect(signals.onDeletedBlockedClient,
+                            sender=BlockedClient)
+
+        # Keep the known clients filter up to date
+        post_save.connect(signals.onAddingAuditEntry, sender=AuditEntry)
+
+        # Load the known clients filter before the first request
+        getKnownClients().load()
+
+        # Keep the cached display names of the persons objects up to date
+        post_save.connect(signals.onChangingLabelsNames, sender=Person)
+        post_delete.connect(signals.onChangingLabelsNames, sender=Person)
+
         return super().ready()
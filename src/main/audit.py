@@ -0,0 +1,165 @@
+import atexit
+import logging
+import threading
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from . import constants
+from .models import AuditEntry
+from .visitors import KnownClients, getKnownClients
+
+logger = logging.getLogger(constants.LOGGERS.MODELS)
+
+_audit_sink = None
+_audit_sink_lock = threading.Lock()
+
+# The security entries are saved with the request that caused them
+_SECURITY_ACTIONS: frozenset = frozenset((constants.ACTION.LOGGED_FAILED,
+                                          constants.ACTION.SUSPICIOUS_POST,
+                                          constants.ACTION.ATTACK_ATTEMPT))
+
+
+class AuditSink:
+    """
+    Buffered writer of the 'AuditEntry' table.
+    The entries are queued in the process and saved with one 'bulk_create'
+    when the buffer reaches 'batch_size' entries, when 'flush_interval'
+    seconds passed since the first queued entry, or when the worker exits.
+    The failed login, suspicious post and attack entries are not queued, they
+    are saved immediately. Entries that fail to be saved are queued again for
+    the next flush, up to 'max_pending' entries.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float,
+                 max_pending: int):
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.max_pending: int = max_pending
+        self._lock = threading.Lock()
+        # Held while saving, a flush waits for the save of the timer
+        self._write_lock = threading.Lock()
+        self._entries: List[AuditEntry] = []
+        self._timer: threading.Timer = None
+
+    def record(self, requester: str, **kwargs) -> None:
+        """
+        Queue an audit entry to be saved with the next flush.
+
+        Args:
+            requester (str): The name saved in 'created_by' and 'updated_by'
+            kwargs: The 'AuditEntry' fields
+        """
+        entry = AuditEntry(created_by=requester, updated_by=requester, **kwargs)
+        if entry.action in _SECURITY_ACTIONS:
+            self._write([entry])
+            return
+        entries: List[AuditEntry] = []
+        with self._lock:
+            self._entries.append(entry)
+            if len(self._entries) >= self.batch_size:
+                entries = self._takeEntries()
+            else:
+                self._startTimer()
+        if entries:
+            self._write(entries)
+
+    def flush(self) -> int:
+        """
+        Save all the queued entries.
+
+        Returns:
+            int: Number of the saved entries
+        """
+        with self._lock:
+            entries: List[AuditEntry] = self._takeEntries()
+        if entries:
+            self._write(entries)
+        return len(entries)
+
+    def isPending(self, ip: str) -> bool:
+        """
+        Check if a queued entry has the IP address, the client is known
+        before its entries are saved.
+        """
+        with self._lock:
+            return any(entry.ip == ip for entry in self._entries)
+
+    def pending(self) -> int:
+        """
+        Number of the queued entries.
+        """
+        with self._lock:
+            return len(self._entries)
+
+    def _startTimer(self) -> None:
+        # Must be called while holding the lock
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval,
+                                          self._flushFromTimer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _takeEntries(self) -> List[AuditEntry]:
+        # Must be called while holding the lock
+        entries: List[AuditEntry] = self._entries
+        self._entries = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return entries
+
+    def _write(self, entries: List[AuditEntry]) -> None:
+        requesters: Dict[str, List[AuditEntry]] = {}
+        for entry in entries:
+            requesters.setdefault(entry.created_by, []).append(entry)
+        try:
+            with self._write_lock, transaction.atomic():
+                for requester, requester_entries in requesters.items():
+                    AuditEntry.bulkCreate(requester, requester_entries,
+                                          batch_size=self.batch_size)
+        except DatabaseError as exception:
+            self._requeue(entries)
+            logger.error(f"Failed to save {len(entries)} audit entries, "
+                         + f"they are queued for the next flush: {exception}")
+            return
+        # The clients are known once their entries are saved
+        known_clients: KnownClients = getKnownClients()
+        for ip in {entry.ip for entry in entries if entry.ip}:
+            known_clients.add(ip)
+
+    def _requeue(self, entries: List[AuditEntry]) -> None:
+        for entry in entries:
+            # The IDs of the rolled back insert
+            entry.pk = None
+        with self._lock:
+            self._entries = entries + self._entries
+            dropped: int = len(self._entries) - self.max_pending
+            if dropped > 0:
+                # The oldest entries are dropped first
+                self._entries = self._entries[dropped:]
+                logger.error(f"Dropped {dropped} audit entries, the audit "
+                             + f"buffer is full ({self.max_pending} entries)")
+            self._startTimer()
+
+    def _flushFromTimer(self) -> None:
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own database connection
+            connection.close()
+
+
+def getAuditSink() -> AuditSink:
+    global _audit_sink
+    if _audit_sink is None:
+        with _audit_sink_lock:
+            if _audit_sink is None:
+                _audit_sink = AuditSink(
+                    getattr(settings, 'AUDIT_SINK_BATCH_SIZE', 50),
+                    getattr(settings, 'AUDIT_SINK_FLUSH_INTERVAL', 5),
+                    getattr(settings, 'AUDIT_SINK_MAX_PENDING', 10000))
+                # Save the queued entries when the worker exits
+                atexit.register(_audit_sink.flush)
+    return _audit_sink
@@ -0,0 +1,107 @@
+from datetime import timedelta
+import logging
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import constants
+from .models import BlockedClient
+from .parameters import getParameterValue
+from .utils import isSharedCache
+
+logger = logging.getLogger(constants.LOGGERS.MIDDLEWARE)
+
+_KEY_PREFIX: str = 'HoneyHome.BlockState.'
+
+
+class BlockState(NamedTuple):
+    """
+    The cached block state of a client IP address.
+    The 'block_type' is None if the client has never been blocked.
+    """
+    block_type: Optional[str]
+    blocked_times: int
+    blocked_at: Optional[timezone.datetime]
+
+    @property
+    def unblock_at(self) -> Optional[timezone.datetime]:
+        # The period is read on every check, so a change of the parameter
+        # applies to the cached states too
+        if self.block_type != constants.BLOCK_TYPES.TEMPORARY:
+            return None
+        return self.blocked_at + timedelta(
+            days=getParameterValue(constants.PARAMETERS.TEMPORARY_BLOCK_PERIOD))
+
+    @property
+    def isBlocked(self) -> bool:
+        return self.block_type not in (None, constants.BLOCK_TYPES.UNBLOCKED)
+
+    @property
+    def isAllowedToUnblocked(self) -> bool:
+        if self.block_type == constants.BLOCK_TYPES.TEMPORARY:
+            return self.unblock_at <= timezone.now()
+        return False
+
+
+NOT_BLOCKED = BlockState(None, 0, None)
+
+
+def _getKey(ip: str) -> str:
+    return _KEY_PREFIX + ip
+
+
+def _loadBlockState(ip: str) -> BlockState:
+    blocked_client: dict = BlockedClient.filter(ip=ip).values(
+        'block_type', 'blocked_times', 'updated').first()
+    if blocked_client is None:
+        return NOT_BLOCKED
+    return BlockState(blocked_client['block_type'],
+                      blocked_client['blocked_times'],
+                      blocked_client['updated'])
+
+
+def _getTimeout() -> int:
+    if isSharedCache():
+        return getattr(settings, 'BLOCK_STATE_CACHE_TIMEOUT', 86400)
+    # The invalidations of the other workers do not reach the local cache
+    return getattr(settings, 'BLOCK_STATE_LOCAL_CACHE_TIMEOUT', 5)
+
+
+def getBlockState(ip: str) -> BlockState:
+    """
+    Get the block state of the client from the cache,
+    the database is queried only the first time the IP address is seen.
+    When the cache is not shared by the workers the state is kept for a few
+    seconds only, a worker sees the blocks saved by the other workers once
+    its cached state expires.
+
+    Args:
+        ip (str): The client IP address
+
+    Returns:
+        BlockState: The client block state
+    """
+    key: str = _getKey(ip)
+    block_state: BlockState = cache.get(key)
+    if block_state is None:
+        block_state = _loadBlockState(ip)
+        cache.set(key, block_state, timeout=_getTimeout())
+    return block_state
+
+
+def invalidateBlockState(ip: str) -> None:
+    """
+    Remove the cached block state of the client, it is removed again after
+    the transaction commits so no worker keeps the state it may have read
+    before the commit.
+
+    Args:
+        ip (str): The client IP address
+    """
+    key: str = _getKey(ip)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+    logger.info(f"Block state of the client [{ip}] invalidated")
@@ -0,0 +1,130 @@
+from datetime import timedelta
+import logging
+from typing import NamedTuple, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from . import constants
+from .models import ClientState
+from .parameters import getParameterValue
+
+logger = logging.getLogger(constants.LOGGERS.MIDDLEWARE)
+
+
+class ClientCounters(NamedTuple):
+    """
+    The counters of a client in the current reset window.
+    """
+    failed_attempts: int
+    suspicious_posts: int
+    blocked_times: int
+
+
+NO_COUNTERS = ClientCounters(0, 0, 0)
+
+
+def _getWindowCutoff() -> timezone.datetime:
+    # The windows started before this time are expired
+    reset_days: int = getParameterValue(
+        constants.PARAMETERS.ALLOWED_LOGGED_IN_ATTEMPTS_RESET)
+    return timezone.now() - timedelta(days=reset_days)
+
+
+def getClientCounters(ip: str) -> ClientCounters:
+    """
+    Read the counters of the client with one indexed lookup. The counters of
+    an expired window are read as zeros, they are reset on the next count.
+
+    Args:
+        ip (str): The client IP address
+
+    Returns:
+        ClientCounters: The client counters
+    """
+    state: dict = ClientState.objects.filter(ip=ip).values(
+        'failed_attempts', 'suspicious_posts', 'blocked_times',
+        'window_start').first()
+    if state is None:
+        return NO_COUNTERS
+    if state['window_start'] < _getWindowCutoff():
+        return ClientCounters(0, 0, state['blocked_times'])
+    return ClientCounters(state['failed_attempts'],
+                          state['suspicious_posts'],
+                          state['blocked_times'])
+
+
+def _count(ip: str, field: str, **fields) -> None:
+    now: timezone.datetime = timezone.now()
+    is_expired = Q(window_start__lt=_getWindowCutoff())
+    counters: dict = {}
+    for counter in ('failed_attempts', 'suspicious_posts'):
+        step: int = 1 if counter == field else 0
+        # Restart the counters in the same update if the window expired
+        counters[counter] = Case(When(is_expired, then=Value(step)),
+                                 default=F(counter) + step)
+    counters['window_start'] = Case(When(is_expired, then=Value(now)),
+                                    default=F('window_start'))
+    updated: int = ClientState.objects.filter(ip=ip).update(
+        updated=now, updated_by=constants.SYSTEM_MIDDLEWARE_NAME,
+        **counters, **fields)
+    if not updated:
+        try:
+            with transaction.atomic():
+                ClientState.objects.create(
+                    ip=ip, created_by=constants.SYSTEM_MIDDLEWARE_NAME,
+                    updated_by=constants.SYSTEM_MIDDLEWARE_NAME,
+                    **{field: 1}, **fields)
+        except IntegrityError:
+            # Created by another request in the meantime
+            _count(ip, field, **fields)
+
+
+def trackClient(ip: str) -> None:
+    """
+    Create the state of a new client, it keeps the first visit time.
+
+    Args:
+        ip (str): The client IP address
+    """
+    ClientState.objects.get_or_create(
+        ip=ip, defaults={'created_by': constants.SYSTEM_MIDDLEWARE_NAME,
+                         'updated_by': constants.SYSTEM_MIDDLEWARE_NAME})
+
+
+def countFailedAttempt(ip: str) -> None:
+    """
+    Add a failed login attempt to the client counters atomically.
+
+    Args:
+        ip (str): The client IP address
+    """
+    _count(ip, 'failed_attempts')
+
+
+def countSuspiciousPost(ip: str) -> None:
+    """
+    Add a suspicious post request to the client counters atomically.
+
+    Args:
+        ip (str): The client IP address
+    """
+    _count(ip, 'suspicious_posts', last_post_at=timezone.now())
+
+
+def setClientBlock(ip: str, block_type: Optional[str] = None,
+                   blocked_times: Optional[int] = 0) -> None:
+    """
+    Copy the block fields of the 'BlockedClient' object to the client state.
+
+    Args:
+        ip (str): The client IP address
+        block_type (str, optional): None if the client is not blocked.
+        Defaults to None.
+        blocked_times (int, optional): Defaults to 0.
+    """
+    ClientState.objects.update_or_create(
+        ip=ip, defaults={'block_type': block_type,
+                         'blocked_times': blocked_times,
+                         'updated_by': constants.SYSTEM_SIGNALS_NAME})
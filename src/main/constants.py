@@ -59,7 +59,6 @@ PARAMETERS = _NT('str', [
     'TEMPORARY_BLOCK_PERIOD',
     'TIME_OUT_PERIOD',
     'BETWEEN_POST_REQUESTS_TIME',
-    'MAGIC_NUMBER',
 ])(
     'ALLOWED_LOGGED_IN_ATTEMPTS',
     'ALLOWED_LOGGED_IN_ATTEMPTS_RESET',
@@ -67,23 +66,26 @@ PARAMETERS = _NT('str', [
     'TEMPORARY_BLOCK_PERIOD',
     'TIME_OUT_PERIOD',
     'BETWEEN_POST_REQUESTS_TIME',
-    'MAGIC_NUMBER',
 )
 CRON_AT = _NT('str', [
     'EVERY_MINUTE',
     'EVERY_HOUR',
     'FIRST_MINUTE_ON_SUNDAY',
+    'EVERY_DAY',
 ])(
     '*/1 * * * *',
     '0 * * * *',
     '1 0 * * 0',
+    '30 2 * * *',
 )
 CRON_DIR = _NT('str', [
     'MAIN',
     'HUMAN_RESOURCES',
+    'WAREHOUSE_ADMIN',
 ])(
     'main.cron',
     'human_resources.cron',
+    'warehouse_admin.cron',
 )
 BLOCK_TYPES = _NT('str', [
     'UNBLOCKED',
@@ -274,10 +276,13 @@ PAGES = _NT('str', [
     'REGISTER_NEW_ITEM_PAGE',
     'BATCHES_PAGE',
     'ADD_BATCH_PAGE',
+    'BATCH_TRACE_PAGE',
     'DISTRIBUTED_GOODS_PAGE',
     'DISTRIBUTOR_STOCK_PAGE',
     'SEND_GOODS_PAGE',
+    'DISPATCH_GOODS_PAGE',
     'GOODS_MOVEMENT_PAGE',
+    'EXPORT_GOODS_MOVEMENT_PAGE',
     'DAMAGED_GOODS_PAGE',
     'ADD_DAMAGED_GOODS_PAGE',
     'TRANSFORMED_GOODS_PAGE',
@@ -343,10 +348,13 @@ PAGES = _NT('str', [
     'RegisterItemPage',
     'BatchesPage',
     'AddBatchPage',
+    'BatchTracePage',
     'DistributedGoodsPage',
     'DistributorStockPage',
     'SendGoodsPage',
+    'DispatchGoodsPage',
     'GoodsMovementPage',
+    'ExportGoodsMovementPage',
     'DamagedGoodsPage',
     'AddDamagedGoodsPage',
     'TransformedGoodsPage',
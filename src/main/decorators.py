@@ -2,10 +2,6 @@ import logging
 
 from django.http import HttpRequest
 from django.shortcuts import redirect
-from django.urls import resolve
-
-from distributor.models import Distributor
-from human_resources.models import Employee
 
 from . import constants
 from . import messages as MSG
@@ -28,21 +24,14 @@ def _getRequestFromViewArgs(args) -> HttpRequest:
 def newEmployee(view_func):
     def wrapper_func(*args, **kwargs):
         request: HttpRequest = _getRequestFromViewArgs(args)
-        path: str = resolve(request.path_info).url_name
+        path: str = request.url_name
         excluded_pages: tuple[str] = (constants.PAGES.CREATE_USER_PAGE,
                                       constants.PAGES.UNAUTHORIZED_PAGE,
                                       constants.PAGES.LOGOUT)
         if request.user.is_authenticated and path not in excluded_pages:
-            if getUserRole(request) == constants.ROLES.DISTRIBUTOR:
-                name: str = Distributor.get(
-                    account=request.user).person.name
-            else:
-                name: str = Employee.get(
-                    account=request.user).person.name
             # The initial username will be the employee/distributor first name
-            first_name = name.split(' ')[0]
-            new_employee: bool = request.user.username == first_name
-            if new_employee:
+            first_name: str = request.user.username
+            if request.is_new_employee:
                 MSG.WELCOME_MESSAGE(request, first_name)
                 MSG.TEMPORARY_ACCOUNT(request)
                 MSG.CREATE_NEW_ACCOUNT(request)
@@ -61,9 +50,8 @@ def isAuthenticatedUser(view_func):
         if request.user.is_authenticated:
             logger.info(
                 f"The user [{request.user.username}] is authenticated")
-            role: str = ''
-            if request.user.groups.exists():
-                role = getUserRole(request)
+            role: str = getUserRole(request) or ''
+            if role:
                 # Remove spaces and add dashboard
                 dashboard = role.replace(' ', '') + constants.PAGES.DASHBOARD
                 logger.info("Redirect the user to his dashboard")
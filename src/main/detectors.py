@@ -0,0 +1,90 @@
+import logging
+import re
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.http import QueryDict
+
+from . import constants
+
+logger = logging.getLogger(constants.LOGGERS.MIDDLEWARE)
+
+# A single tag token, the character class stops at the next '<' so every
+# character of the value is visited a bounded number of times (no backtracking)
+_TAG_PATTERN: re.Pattern = re.compile(r'<(/?)[^<>\n]*>')
+
+_html_detector = None
+
+
+class HtmlDetector:
+    """
+    Linear-time replacement of 'constants.HTML_TAGS_PATTERN'.
+    The value is tokenized in one pass and it is considered HTML when a tag
+    is followed by a closing tag, as the old pattern did. In the denied
+    fields a single tag is enough, the allowed fields are not scanned, and
+    only the first 'max_scan_length' characters of a value are scanned.
+    """
+
+    def __init__(self, max_scan_length: int,
+                 allowed_fields: Iterable[str] = (),
+                 denied_fields: Iterable[str] = ()):
+        self.max_scan_length: int = max_scan_length
+        self.allowed_fields: frozenset = frozenset(allowed_fields)
+        self.denied_fields: frozenset = frozenset(denied_fields)
+
+    def isHtml(self, value: str, strict: Optional[bool] = False) -> bool:
+        """
+        Check if the value contains HTML tags.
+
+        Args:
+            value (str): The value to scan
+            strict (bool, optional): Any single tag counts as HTML.
+            Defaults to False.
+
+        Returns:
+            bool: True if the value contains HTML else False
+        """
+        is_tag_found: bool = False
+        for tag in _TAG_PATTERN.finditer(value):
+            # group(1) is '/' for the closing tags
+            if strict or (is_tag_found and tag.group(1)):
+                return True
+            is_tag_found = True
+        return False
+
+    def findHtmlField(self, post: QueryDict) -> Optional[str]:
+        """
+        Scan all the values of the post request.
+
+        Args:
+            post (QueryDict): The request POST data
+
+        Returns:
+            str: The name of the first field containing HTML, None if
+            there is no HTML in the post request.
+        """
+        for field, values in post.lists():
+            if field in self.allowed_fields:
+                continue
+            strict: bool = field in self.denied_fields
+            for value in values:
+                # A long value is not an attack by itself, the size of the
+                # whole post is limited by 'DATA_UPLOAD_MAX_MEMORY_SIZE'
+                if len(value) > self.max_scan_length:
+                    logger.info(f"The field [{field}] exceeded the maximum "
+                                + f"scan length ({len(value)} characters), "
+                                + "only the first characters are scanned")
+                    value = value[:self.max_scan_length]
+                if self.isHtml(value, strict):
+                    return field
+        return None
+
+
+def getHtmlDetector() -> HtmlDetector:
+    global _html_detector
+    if _html_detector is None:
+        _html_detector = HtmlDetector(
+            getattr(settings, 'HTML_DETECTOR_MAX_SCAN_LENGTH', 65536),
+            getattr(settings, 'HTML_DETECTOR_ALLOWED_FIELDS', ()),
+            getattr(settings, 'HTML_DETECTOR_DENIED_FIELDS', ()))
+    return _html_detector
@@ -0,0 +1,107 @@
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
+
+from . import constants
+
+logger = logging.getLogger(constants.LOGGERS.MODELS)
+
+_KEY_PREFIX: str = 'HoneyHome.Labels.'
+# Bumped to drop all the cached labels at once
+_VERSION_KEY: str = _KEY_PREFIX + 'Version'
+
+
+def _getVersion() -> int:
+    version: Optional[int] = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _getTimeout() -> int:
+    # 'main.utils' imports the models that import this module
+    from .utils import isSharedCache
+    if isSharedCache():
+        return getattr(settings, 'LABELS_CACHE_TIMEOUT', 86400)
+    # The invalidations of the other workers do not reach the local cache
+    return getattr(settings, 'LABELS_LOCAL_CACHE_TIMEOUT', 30)
+
+
+def _getKey(model: Type[Model], pk, version: int) -> str:
+    return f'{_KEY_PREFIX}{version}.{model._meta.label}.{pk}'
+
+
+def loadLabels(model: Type[Model], pks: Iterable) -> Dict:
+    """
+    Get the display names of many objects of the model, the missing names
+    are loaded with one query by the 'getLabels' class method of the model
+    and kept in the cache.
+
+    Args:
+        model (Model): The model with a 'getLabels' class method
+        pks (Iterable): The primary keys of the objects
+
+    Returns:
+        dict: The display name of every primary key
+    """
+    version: int = _getVersion()
+    keys: Dict[str, object] = {_getKey(model, pk, version): pk
+                               for pk in pks if pk is not None}
+    labels: Dict = {keys[key]: label
+                    for key, label in cache.get_many(keys).items()}
+    missing: List = [pk for pk in keys.values() if pk not in labels]
+    if missing:
+        loaded: Dict = model.getLabels(missing)
+        for pk in missing:
+            # Same as 'Model.__str__' when the object has no name
+            labels[pk] = loaded.get(pk, f'{model.__name__} object ({pk})')
+        cache.set_many({_getKey(model, pk, version): labels[pk] for pk in missing},
+                       timeout=_getTimeout())
+    return labels
+
+
+def getLabel(obj: Model) -> str:
+    """
+    Get the display name of the object from the cache, the '__str__' of the
+    models that need other tables to name their objects.
+
+    Args:
+        obj (Model): A model object with a 'getLabels' class method
+
+    Returns:
+        str: The object display name
+    """
+    if obj.pk is None:
+        return Model.__str__(obj)
+    return loadLabels(type(obj), (obj.pk,))[obj.pk]
+
+
+def invalidateLabel(obj: Model) -> None:
+    """
+    Remove the cached display name of the object, it is removed again after
+    the transaction commits so no worker keeps the name it may have read
+    before the commit.
+    """
+    key: str = _getKey(type(obj), obj.pk, _getVersion())
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidateLabels() -> None:
+    """
+    Drop all the cached display names, after the names of the persons,
+    distributors, types or batches changed.
+    """
+    def bumpVersion():
+        cache.set(_VERSION_KEY, time.time_ns(), timeout=None)
+
+    bumpVersion()
+    transaction.on_commit(bumpVersion)
+    logger.info("Labels cache invalidated")
+
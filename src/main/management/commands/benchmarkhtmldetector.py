@@ -0,0 +1,67 @@
+import multiprocessing
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import constants
+from main.detectors import HtmlDetector
+
+SIZES: tuple = (1024, 10 * 1024, 100 * 1024, 1024 * 1024)
+PAYLOADS: dict = {
+    # Normal textarea content
+    'text': 'Honey from the last batch is ready.\n',
+    # One tag without a closing tag, the old pattern scans to the end
+    'open tag': None,
+    # Many tags without closing tags, the old pattern backtracks on each one
+    'crafted': '<a>',
+}
+
+
+def _buildPayload(name: str, size: int) -> str:
+    if name == 'open tag':
+        text: str = PAYLOADS['text']
+        return '<b>' + text * (size // len(text))
+    piece: str = PAYLOADS[name]
+    return piece * (size // len(piece))
+
+
+def _searchWithPattern(value: str) -> None:
+    re.search(re.compile(constants.HTML_TAGS_PATTERN), value)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the HTML detector against 'HTML_TAGS_PATTERN'."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=10,
+                            help="Seconds before giving up on the old pattern.")
+
+    def handle(self, *args, **options):
+        timeout: float = options['timeout']
+        detector = HtmlDetector(max_scan_length=max(SIZES))
+        self.stdout.write(f"{'PAYLOAD':<10}{'SIZE':>10}"
+                          + f"{'PATTERN (s)':>16}{'DETECTOR (s)':>16}")
+        for name in PAYLOADS:
+            for size in SIZES:
+                value: str = _buildPayload(name, size)
+                pattern_time: str = self.timePattern(value, timeout)
+                start: float = time.perf_counter()
+                detector.isHtml(value)
+                detector_time: float = time.perf_counter() - start
+                self.stdout.write(f"{name:<10}{size // 1024:>8}KB"
+                                  + f"{pattern_time:>16}{detector_time:>16.6f}")
+
+    def timePattern(self, value: str, timeout: float) -> str:
+        # The old pattern runs in another process so it can be stopped,
+        # the measured time includes the process start-up (few milliseconds)
+        process = multiprocessing.Process(target=_searchWithPattern,
+                                          args=(value,))
+        start: float = time.perf_counter()
+        process.start()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+            return f'> {timeout:g}'
+        return f'{time.perf_counter() - start:.6f}'
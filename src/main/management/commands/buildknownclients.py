@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.visitors import KnownClients, getKnownClients
+
+
+class Command(BaseCommand):
+    help = ("Build the known clients filter from the audit entries and save it "
+            + "to 'KNOWN_CLIENTS_FILE', run it before starting the workers.")
+
+    def handle(self, *args, **options):
+        known_clients: KnownClients = getKnownClients()
+        if not known_clients.file_path:
+            raise CommandError("'KNOWN_CLIENTS_FILE' is not set")
+        count: int = known_clients.rebuild()
+        known_clients.save()
+        self.stdout.write(self.style.SUCCESS(
+            f"Known clients filter of {count} IP addresses saved to "
+            + f"{known_clients.file_path}"))
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.1 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditentry',
+            index=models.Index(fields=['created'], name='main_audite_created_09f931_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditentry',
+            index=models.Index(fields=['ip', 'action', 'created'], name='main_audite_ip_82fa81_idx'),
+        ),
+    ]
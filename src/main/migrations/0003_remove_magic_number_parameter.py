@@ -0,0 +1,20 @@
+# Generated by Django 4.1.1 on 2026-10-18 02:44
+
+from django.db import migrations
+
+
+def removeMagicNumber(apps, schema_editor):
+    # The hot window of the audit entries replaced the magic number
+    Parameter = apps.get_model('main', 'Parameter')
+    Parameter.objects.filter(name='MAGIC_NUMBER').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_auditentry_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(removeMagicNumber, migrations.RunPython.noop),
+    ]
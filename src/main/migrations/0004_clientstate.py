@@ -0,0 +1,35 @@
+# Generated by Django 4.1.1 on 2026-10-18 02:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_remove_magic_number_parameter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientState',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('updated_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('ip', models.GenericIPAddressField(unique=True)),
+                ('failed_attempts', models.PositiveIntegerField(default=0)),
+                ('suspicious_posts', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('block_type', models.CharField(blank=True, choices=[('Unblocked', 'Unblocked'), ('Temporary', 'Temporary'), ('Indefinitely', 'Indefinitely')], max_length=20, null=True)),
+                ('blocked_times', models.PositiveSmallIntegerField(default=0)),
+                ('window_start', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
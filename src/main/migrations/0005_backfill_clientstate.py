@@ -0,0 +1,66 @@
+# Generated by Django 4.1.1 on 2026-10-18 09:12
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+
+def backfillClientStates(apps, schema_editor):
+    # The counters of the current reset window are counted from the audit
+    # entries, and the block fields are copied from the blocked clients
+    AuditEntry = apps.get_model('main', 'AuditEntry')
+    BlockedClient = apps.get_model('main', 'BlockedClient')
+    ClientState = apps.get_model('main', 'ClientState')
+    Parameter = apps.get_model('main', 'Parameter')
+
+    reset_days = Parameter.objects.filter(
+        name='ALLOWED_LOGGED_IN_ATTEMPTS_RESET').values_list('value', flat=True).first()
+    try:
+        reset_days = int(reset_days)
+    except (TypeError, ValueError):
+        reset_days = 1
+    now = timezone.now()
+    cutoff = now - timedelta(days=reset_days)
+    in_window = Q(created__gte=cutoff,
+                  action__in=('User logged failed', 'Suspicious post'))
+
+    states = {}
+    for entry in AuditEntry.objects.values('ip').annotate(
+            first_seen=Min('created'),
+            failed_attempts=Count('id', filter=Q(in_window, action='User logged failed')),
+            suspicious_posts=Count('id', filter=Q(in_window, action='Suspicious post')),
+            last_post_at=Max('created', filter=Q(
+                action__in=('Normal post', 'Suspicious post'))),
+            window_start=Min('created', filter=in_window)).order_by():
+        states[entry['ip']] = ClientState(
+            ip=entry['ip'], first_seen=entry['first_seen'],
+            failed_attempts=entry['failed_attempts'],
+            suspicious_posts=entry['suspicious_posts'],
+            last_post_at=entry['last_post_at'],
+            window_start=entry['window_start'] or now,
+            created_by='System', updated_by='System')
+    for ip, block_type, blocked_times, created in BlockedClient.objects.values_list(
+            'ip', 'block_type', 'blocked_times', 'created'):
+        state = states.setdefault(ip, ClientState(
+            ip=ip, first_seen=created, window_start=now,
+            created_by='System', updated_by='System'))
+        state.block_type = block_type
+        state.blocked_times = blocked_times
+
+    existing = set(ClientState.objects.values_list('ip', flat=True))
+    ClientState.objects.bulk_create(
+        [state for ip, state in states.items() if ip not in existing],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_clientstate'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfillClientStates, migrations.RunPython.noop),
+    ]
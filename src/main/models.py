@@ -1,5 +1,7 @@
+from contextlib import contextmanager
 import logging
-from typing import Union, Optional
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 from django.contrib.auth.models import User
 from django.db import models
@@ -11,18 +13,217 @@ from . import constants
 
 logger = logging.getLogger(constants.LOGGERS.MODELS)
 
+# The units of work opened in the current thread, see 'BaseModel.unitOfWork'
+_units_of_work = threading.local()
+
+
+class UnitOfWork:
+    """
+    Collect the objects changed by the setters inside a 'BaseModel.unitOfWork'
+    block, every changed object is saved once with only its dirty fields.
+    """
+
+    def __init__(self, requester: Union[HttpRequest, str]):
+        self.requester: Union[HttpRequest, str] = requester
+        self._objects: Dict[int, 'BaseModel'] = {}
+
+    def add(self, obj: 'BaseModel') -> None:
+        self._objects[id(obj)] = obj
+
+    def flush(self) -> None:
+        objects: List[BaseModel] = list(self._objects.values())
+        self._objects.clear()
+        for obj in objects:
+            obj.saveDirtyFields(self.requester)
+
+
+def _formatIds(ids: List[int]) -> str:
+    # Consecutive IDs are written as ranges (e.g. '1-5, 8')
+    ranges: List[str] = []
+    for id in sorted(ids):
+        if ranges and id == last_id + 1:
+            ranges[-1] = f"{ranges[-1].split('-')[0]}-{id}"
+        else:
+            ranges.append(str(id))
+        last_id = id
+    return ', '.join(ranges)
+
+
+class BaseQuerySet(models.QuerySet):
+    """
+    The BaseModel queryset, its changes are applied to all the selected
+    objects at once and logged in one line with the affected IDs.
+    """
+
+    def auditedDelete(self, requester: Union[HttpRequest, str]) -> int:
+        """
+        Delete all the objects of the queryset with one DELETE query (plus the
+        cascades and the signals of the model, if any).
+
+        Args:
+            requester (HttpRequest | str): The request or the requester name
+
+        Returns:
+            int: Number of the deleted objects of this model
+        """
+        requester_name: str = self.model.getRequesterName(requester)
+        ids: List[int] = list(self.values_list('id', flat=True))
+        if not ids:
+            return 0
+        _, deleted = self.filter(id__in=ids).delete()
+        count: int = deleted.get(self.model._meta.label, 0)
+        logger.info(f"Database change in [{self.model.__name__}] model "
+                    + f"{count} objects IDs: [{_formatIds(ids)}] were "
+                    + f"deleted By: {requester_name}")
+        return count
+
+    def auditedUpdate(self, requester: Union[HttpRequest, str], **fields) -> int:
+        """
+        Update all the objects of the queryset with one UPDATE query, and set
+        their 'updated' and 'updated_by'.
+
+        Args:
+            requester (HttpRequest | str): The request or the requester name
+            fields: The new values of the fields
+
+        Returns:
+            int: Number of the updated objects
+        """
+        requester_name: str = self.model.getRequesterName(requester)
+        ids: List[int] = list(self.values_list('id', flat=True))
+        if not ids:
+            return 0
+        count: int = self.filter(id__in=ids).update(
+            updated=timezone.now(), updated_by=requester_name, **fields)
+        logger.info(f"Database change in [{self.model.__name__}] model at "
+                    + f"objects IDs: [{_formatIds(ids)}] fields: "
+                    + f"{list(fields)} By: {requester_name}")
+        return count
+
 
 class BaseModel(models.Model):
 
     class Meta:
         abstract = True
 
+    objects = BaseQuerySet.as_manager()
+
     id: int = models.AutoField(primary_key=True)
     created: timezone.datetime = models.DateTimeField(auto_now_add=True)
     created_by: str = models.CharField(max_length=50, null=True, blank=True)
     updated: timezone.datetime = models.DateTimeField(auto_now=True)
     updated_by: str = models.CharField(max_length=50, null=True, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        # The loaded row, it is turned into the loaded values only when they
+        # are needed, see 'getLoadedValues'
+        obj._loaded_row = (field_names, values)
+        return obj
+
+    def getLoadedValues(self) -> dict:
+        """
+        Get the field values as they are in the database, since the object
+        was loaded or last saved.
+
+        Returns:
+            dict: The values by field attribute name, empty if the object
+            was not loaded from the database
+        """
+        loaded_row: tuple = self.__dict__.pop('_loaded_row', None)
+        if loaded_row is not None:
+            self._loaded_values = dict(zip(*loaded_row))
+        return self.__dict__.get('_loaded_values', {})
+
+    def _takeSnapshot(self, field_names: Optional[Iterable[str]] = None) -> None:
+        # The current values are the values in the database, only the given
+        # fields if not all the fields were saved or refreshed
+        fields: list = self._meta.concrete_fields
+        loaded_values: dict = {}
+        if field_names is not None:
+            field_names = set(field_names)
+            fields = [field for field in fields if field.name in field_names
+                      or field.attname in field_names]
+            loaded_values = self.getLoadedValues()
+        else:
+            self.__dict__.pop('_loaded_row', None)
+        # The deferred fields are not read
+        loaded_values.update({field.attname: self.__dict__[field.attname]
+                              for field in fields
+                              if field.attname in self.__dict__})
+        self._loaded_values = loaded_values
+
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        self._takeSnapshot(kwargs.get('update_fields',
+                                      args[3] if len(args) > 3 else None))
+
+    def refresh_from_db(self, using=None, fields=None) -> None:
+        super().refresh_from_db(using, fields)
+        self._takeSnapshot(fields)
+
+    def getDirtyFields(self) -> List[str]:
+        """
+        Get the fields changed since the object was loaded or last saved.
+
+        Returns:
+            list: The names of the changed fields
+        """
+        loaded_values: dict = self.getLoadedValues()
+        return [field.name for field in self._meta.concrete_fields
+                if field.attname in loaded_values
+                and getattr(self, field.attname) != loaded_values[field.attname]]
+
+    def saveDirtyFields(self, requester: Union[HttpRequest, str]) -> None:
+        """
+        Save only the changed fields and 'updated'/'updated_by' in one query,
+        the objects that were not loaded from the database are fully saved.
+
+        Args:
+            requester (HttpRequest | str): The request or the requester name
+        """
+        self.updated_by = self.getRequesterName(requester)
+        if self.pk is None or not self.getLoadedValues():
+            self.save()
+        else:
+            dirty_fields: List[str] = self.getDirtyFields()
+            self.save(update_fields=set(dirty_fields + ['updated',
+                                                        'updated_by']))
+            logger.info(f"Database change in [{self.__class__.__name__}] "
+                        + f"model at object ID: {self.id} fields: "
+                        + f"{dirty_fields} By: {self.updated_by}")
+
+    @classmethod
+    @contextmanager
+    def unitOfWork(cls, requester: Union[HttpRequest, str]) -> Iterator[UnitOfWork]:
+        """
+        Defer the saves of the setters called inside the block, every changed
+        object is saved once at the end of the block with only its changed
+        fields. Nothing is saved if the block raises an exception.
+
+        Example:
+            with Task.unitOfWork(request):
+                task.setStatus(request, status)
+                task.setRated(request, True)
+
+        Args:
+            requester (HttpRequest | str): The name saved in 'updated_by'
+
+        Yields:
+            UnitOfWork: The unit of work of the block
+        """
+        stack: list = getattr(_units_of_work, 'stack', None)
+        if stack is None:
+            stack = _units_of_work.stack = []
+        unit_of_work = UnitOfWork(requester)
+        stack.append(unit_of_work)
+        try:
+            yield unit_of_work
+        finally:
+            stack.pop()
+        unit_of_work.flush()
+
     def setCreated(self, created: timezone.datetime):
         self.created = created
         self.save()
@@ -39,46 +240,99 @@ class BaseModel(models.Model):
         self.updated_by = updated_by
         self.save()
 
-    def setCreatedByUpdatedBy(self, requester: Union[HttpRequest, str], created: Optional[bool] = False) -> None:
+    @staticmethod
+    def getRequesterName(requester: Union[HttpRequest, str]) -> str:
         """
-        This function if called, it must be called after the changes not before
+        Get the name saved in 'created_by' and 'updated_by'.
+
+        Args:
+            requester (HttpRequest | str): The request or the requester name
+
+        Returns:
+            str: The user full name, the requester name or 'Unknown User'
         """
-        user: User = None
-        requester_name: str = ''
-        obj: BaseModel = self
         if not requester:
-            requester_name = 'Unknown User'
+            return 'Unknown User'
         elif isinstance(requester, HttpRequest):
-            user = requester.user
+            user: User = requester.user
             if user.is_authenticated:
-                requester_name = user.get_full_name()
-            else:
-                requester_name = user
-        else:
-            try:
-                requester_name = str(requester)
-            except Exception as exception:
-                logger.error(exception)
-                raise exception
+                return user.get_full_name()
+            return str(user)
+        try:
+            return str(requester)
+        except Exception as exception:
+            logger.error(exception)
+            raise exception
+
+    def setCreatedByUpdatedBy(self, requester: Union[HttpRequest, str], created: Optional[bool] = False) -> None:
+        """
+        This function if called, it must be called after the changes not before
+        """
+        stack: list = getattr(_units_of_work, 'stack', None)
+        if stack and not created:
+            # Saved once at the end of the unit of work
+            stack[-1].add(self)
+            return
+        requester_name: str = self.getRequesterName(requester)
         if created:
-            obj = self.getLastInsertedObject()
-            obj.created_by = requester_name
-            obj.updated_by = requester_name
+            self.created_by = requester_name
+            self.updated_by = requester_name
             logger.info(
-                f"Database change in [{obj.__class__.__name__}] model "
-                + f"adding new object. ID: {obj.id} By: {user}")
+                f"Database change in [{self.__class__.__name__}] model "
+                + f"adding new object. ID: {self.id} By: {requester_name}")
         else:
-            obj.updated_by = requester_name
-            logger.info(f"Database change in [{obj.__class__.__name__}] "
-                        + f"model at object ID: {obj.id} By: {user}")
-        obj.save()
+            self.updated_by = requester_name
+            logger.info(f"Database change in [{self.__class__.__name__}] "
+                        + f"model at object ID: {self.id} By: {requester_name}")
+        self.save()
 
     @classmethod
     def create(cls, requester: Union[HttpRequest, str], *args, **kwargs):
+        """
+        Create a new object with 'created_by' and 'updated_by' set in the
+        same INSERT query.
+
+        Args:
+            requester (HttpRequest | str): The request or the requester name
+
+        Returns:
+            BaseModel: The created object
+        """
+        requester_name: str = cls.getRequesterName(requester)
+        kwargs.setdefault('created_by', requester_name)
+        kwargs.setdefault('updated_by', requester_name)
         obj = cls.objects.create(*args, **kwargs)
-        cls.setCreatedByUpdatedBy(cls, requester, created=True)
+        logger.info(f"Database change in [{cls.__name__}] model adding new "
+                    + f"object. ID: {obj.id} By: {requester_name}")
         return obj
 
+    @classmethod
+    def bulkCreate(cls, requester: Union[HttpRequest, str], objects: Iterable,
+                   batch_size: Optional[int] = None) -> List:
+        """
+        Create all the objects with 'bulk_create' and set 'created_by' and
+        'updated_by' of every object to the requester name.
+        Note: 'save' is not called and the model signals are not sent.
+
+        Args:
+            requester (HttpRequest | str): The request or the requester name
+            objects (Iterable): The unsaved objects of this model
+            batch_size (int, optional): Objects per INSERT query.
+            Defaults to None (all the objects in one query).
+
+        Returns:
+            list: The created objects
+        """
+        requester_name: str = cls.getRequesterName(requester)
+        objects = list(objects)
+        for obj in objects:
+            obj.created_by = requester_name
+            obj.updated_by = requester_name
+        created: list = cls.objects.bulk_create(objects, batch_size=batch_size)
+        logger.info(f"Database change in [{cls.__name__}] model adding "
+                    + f"{len(created)} new objects. By: {requester_name}")
+        return created
+
     def delete(self, requester: Union[HttpRequest, str], *args, **kwargs) -> None:
         user = 'Unknown user'
         if not requester:
@@ -191,8 +445,39 @@ class BlockedClient(Client):
         self.setCreatedByUpdatedBy(requester)
 
 
+class ClientState(BaseModel):
+    """
+    The login and spam counters of a client IP address in the current reset
+    window, see 'main.clientstate'. The block fields mirror the
+    'BlockedClient' object of the IP address.
+    """
+
+    ip: str = models.GenericIPAddressField(unique=True)
+    failed_attempts: int = models.PositiveIntegerField(default=0)
+    suspicious_posts: int = models.PositiveIntegerField(default=0)
+    last_post_at: timezone.datetime = models.DateTimeField(null=True,
+                                                           blank=True)
+    first_seen: timezone.datetime = models.DateTimeField(default=timezone.now)
+    block_type: str = models.CharField(max_length=20, null=True, blank=True,
+                                       choices=constants.CHOICES.BLOCK_TYPE)
+    blocked_times: int = models.PositiveSmallIntegerField(default=0)
+    window_start: timezone.datetime = models.DateTimeField(
+        default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"IP: {self.ip} - Failed attempts: {self.failed_attempts}"
+
+
 class AuditEntry(Client):
 
+    class Meta:
+        # The middleware filters the hot window by IP address and action,
+        # and the retention cron scans the partitions by creation time
+        indexes = [
+            models.Index(fields=['created']),
+            models.Index(fields=['ip', 'action', 'created']),
+        ]
+
     action: str = models.CharField(max_length=50)
     username: str = models.CharField(max_length=50, null=True, blank=True)
 
@@ -0,0 +1,65 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from distributor.models import Distributor
+from human_resources.models import Employee
+
+from . import constants
+
+logger = logging.getLogger(constants.LOGGERS.MAIN)
+
+_KEY_PREFIX: str = 'HoneyHome.NewEmployee.'
+
+
+def _getKey(user: User) -> str:
+    # A renamed account gets a new key, so its state is checked again
+    return f'{_KEY_PREFIX}{user.id}.{user.username}'
+
+
+def _loadOnboardingState(user: User, role: str) -> bool:
+    # The initial username is the employee/distributor first name
+    model = Distributor if role == constants.ROLES.DISTRIBUTOR else Employee
+    name: str = model.filter(account=user).values_list(
+        'person__name', flat=True).first()
+    if name is None:
+        return False
+    return user.username == name.split(' ')[0]
+
+
+def setOnboardingState(user: User, is_new_employee: bool) -> None:
+    """
+    Save the onboarding state of the user account in the cache.
+
+    Args:
+        user (User): The user account
+        is_new_employee (bool): True if the account is the temporary one
+    """
+    cache.set(_getKey(user), is_new_employee,
+              timeout=getattr(settings, 'ONBOARDING_CACHE_TIMEOUT', None))
+
+
+def clearOnboardingState(user: User) -> None:
+    cache.delete(_getKey(user))
+
+
+def isNewEmployee(user: User, role: str) -> bool:
+    """
+    Check if the user still has the temporary account created with the
+    employee/distributor. The state is read from the cache, the database
+    is checked only if the state is not cached.
+
+    Args:
+        user (User): The authenticated user
+        role (str): The user role
+
+    Returns:
+        bool: True if the user must create a new account else False
+    """
+    is_new_employee: bool = cache.get(_getKey(user))
+    if is_new_employee is None:
+        is_new_employee = _loadOnboardingState(user, role)
+        setOnboardingState(user, is_new_employee)
+    return is_new_employee
@@ -1,10 +1,28 @@
 import logging as _logging
+import threading as _threading
+import time as _time
+from types import MappingProxyType as _mappingProxy
 from typing import Union as _union
 
+from django.conf import settings as _settings
+from django.core.cache import cache as _cache
+from django.db import transaction as _transaction
+from django.db.models import Count as _count, Max as _max
+
 from .models import Parameter as _parameter
+from .utils import isSharedCache as _isSharedCache
 
 _logger = _logging.getLogger('HoneyHome.Main')
 
+# The version stamp shared by all the workers, bumped on every parameter save
+_VERSION_KEY: str = 'HoneyHome.Parameters.Version'
+# The version read from the database, when the cache is not shared
+_DATABASE_VERSION_KEY: str = 'HoneyHome.Parameters.DatabaseVersion'
+
+_parameters: _mappingProxy = None
+_parameters_version: object = None
+_parameters_lock = _threading.Lock()
+
 
 def _getDefaultParameters() -> dict:
     DEFAULT_PARAMETERS = {
@@ -14,7 +32,6 @@ def _getDefaultParameters() -> dict:
         'TEMPORARY_BLOCK_PERIOD': '1',  # -> int
         'TIME_OUT_PERIOD': '1440',  # -> int
         'BETWEEN_POST_REQUESTS_TIME': '500',  # -> int
-        'MAGIC_NUMBER': '1',  # -> int
     }
     return DEFAULT_PARAMETERS
 
@@ -27,7 +44,6 @@ def _getParametersDescription() -> dict:
         'TEMPORARY_BLOCK_PERIOD': 'The period of temporary block in days. Note: IT MUST BE AN INTEGER.',
         'TIME_OUT_PERIOD': 'Specifies the number of minutes before the Session time-out when logged in. The default is 1440 minutes, which is one day. Note: IT MUST BE AN INTEGER.',
         'BETWEEN_POST_REQUESTS_TIME': 'This is the milliseconds countdown before allowing the to do anther post request (1000 milliseconds = 1 second). Note: IT MUST BE AN INTEGER.',
-        'MAGIC_NUMBER': 'DO NOT CHANGE THIS. THIS CONTROLLED BY THE SYSTEM ONLY.',
     }
     return DEFAULT_PARAMETERS
 
@@ -45,21 +61,90 @@ def _saveDefaultParametersToDataBase() -> None:
             )
 
 
-def getParameterValue(key: str) -> _union[str, int]:
-    if key not in _getDefaultParameters():
-        raise KeyError
-    if not isinstance(key, str):
-        raise ValueError
+def _castValue(value: str) -> _union[str, int]:
     try:
-        try:
-            param = int(_parameter.get(name=key).getValue)
-            return param
-        except ValueError:
-            return _parameter.get(name=key).getValue
-    except _parameter.DoesNotExist:
-        _logger.warning(f"The parameter [{key}] dose not exist in database!!")
-        try:
-            param = int(_getDefaultParameters().get(key))
-            return param
-        except ValueError:
-            return _getDefaultParameters().get(key)
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _loadParameters() -> _mappingProxy:
+    default_parameters: dict = _getDefaultParameters()
+    saved_parameters: dict = dict(_parameter.objects.filter(
+        name__in=default_parameters).values_list('name', 'value'))
+    parameters: dict = {}
+    for name, default_value in default_parameters.items():
+        if name not in saved_parameters:
+            _logger.warning(
+                f"The parameter [{name}] dose not exist in database!!")
+        parameters[name] = _castValue(saved_parameters.get(name,
+                                                           default_value))
+    return _mappingProxy(parameters)
+
+
+def _getVersion() -> object:
+    if not _isSharedCache():
+        # The stamp of a process-local cache is not seen by the other
+        # workers, the version is the count and the last save of the
+        # parameters in the database, read again every few seconds
+        version: tuple = _cache.get(_DATABASE_VERSION_KEY)
+        if version is None:
+            version = tuple(_parameter.objects.aggregate(
+                count=_count('id'), updated=_max('updated')).values())
+            _cache.set(_DATABASE_VERSION_KEY, version, timeout=getattr(
+                _settings, 'PARAMETERS_LOCAL_CACHE_TIMEOUT', 5))
+        return version
+    version: int = _cache.get(_VERSION_KEY)
+    if version is None:
+        # The stamp was evicted, a new one makes every worker reload
+        _cache.add(_VERSION_KEY, _time.time_ns(), timeout=None)
+        version = _cache.get(_VERSION_KEY)
+    return version
+
+
+def syncParameters() -> _mappingProxy:
+    """
+    Reload the parameters if they were changed by any worker since the last
+    load, it is called once at the start of every request.
+    Checking the version costs one 'cache.get' per request. When the default
+    cache is not shared by the workers (e.g. the local memory cache) the
+    version is an aggregate query on the parameters table, kept in the cache
+    for 'PARAMETERS_LOCAL_CACHE_TIMEOUT' seconds.
+
+    Returns:
+        MappingProxyType: The read-only parameters values by name
+    """
+    global _parameters, _parameters_version
+    version: object = _getVersion()
+    parameters: _mappingProxy = _parameters
+    if parameters is not None and version == _parameters_version:
+        return parameters
+    with _parameters_lock:
+        if _parameters is None or version != _parameters_version:
+            _parameters = _loadParameters()
+            _parameters_version = version
+        return _parameters
+
+
+def invalidateParameters() -> None:
+    """
+    Bump the parameters version, the workers reload the parameters on their
+    next request. It is bumped again after the transaction commits so no
+    worker keeps the values it may have read before the commit.
+    """
+    global _parameters
+
+    def bumpVersion():
+        _cache.set(_VERSION_KEY, _time.time_ns(), timeout=None)
+        _cache.delete(_DATABASE_VERSION_KEY)
+
+    _parameters = None
+    bumpVersion()
+    _transaction.on_commit(bumpVersion)
+
+
+def getParameterValue(key: str) -> _union[str, int]:
+    parameters: _mappingProxy = _parameters
+    if parameters is None:
+        parameters = syncParameters()
+    return parameters[key]
@@ -0,0 +1,142 @@
+import abc
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from . import constants
+
+logger = logging.getLogger(constants.LOGGERS.MIDDLEWARE)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+class BaseRateLimiter(abc.ABC):
+    """
+    Base class of the POST requests rate limiters.
+    The rate limiter keeps sliding-window counters per client IP address,
+    so the middleware does not need to save every post request in the
+    'AuditEntry' table to count them.
+    """
+
+    @abc.abstractmethod
+    def hit(self, ip: str, window: int) -> int:
+        """
+        Record a post request from the client and count its post requests
+        in the window.
+
+        Args:
+            ip (str): The client IP address
+            window (int): The window length in milliseconds
+
+        Returns:
+            int: The number of the client post requests in the window
+            including this one.
+        """
+
+    @abc.abstractmethod
+    def reset(self, ip: str, window: int) -> None:
+        """
+        Forget the post requests of the client.
+
+        Args:
+            ip (str): The client IP address
+            window (int): The window length in milliseconds
+        """
+
+
+class LocalMemoryRateLimiter(BaseRateLimiter):
+    """
+    In-process rate limiter, every worker process has its own counters.
+    """
+
+    MAX_TRACKED_CLIENTS: int = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits: Dict[str, Deque[float]] = {}
+
+    def hit(self, ip: str, window: int) -> int:
+        now: float = time.monotonic()
+        window_start: float = now - window / 1000
+        with self._lock:
+            hits: Deque[float] = self._hits.get(ip)
+            if hits is None:
+                if len(self._hits) >= self.MAX_TRACKED_CLIENTS:
+                    self._prune(window_start)
+                hits = self._hits[ip] = deque()
+            while hits and hits[0] < window_start:
+                hits.popleft()
+            hits.append(now)
+            return len(hits)
+
+    def reset(self, ip: str, window: int) -> None:
+        with self._lock:
+            self._hits.pop(ip, None)
+
+    def _prune(self, window_start: float) -> None:
+        # Drop the clients that have no post requests in the window
+        idle_clients: list = [ip for ip, hits in self._hits.items()
+                              if not hits or hits[-1] < window_start]
+        for ip in idle_clients:
+            del self._hits[ip]
+
+
+class CacheRateLimiter(BaseRateLimiter):
+    """
+    Shared rate limiter, the counters are kept in the Django cache framework
+    so all the workers see the same post requests of the client.
+    The posts are counted in fixed windows with the atomic 'add' and 'incr'
+    of the cache, and the count of the sliding window is the count of the
+    current window plus the part of the previous window still in the
+    sliding window.
+    """
+
+    KEY_PREFIX: str = 'HoneyHome.RateLimit.'
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+    def _getKey(self, ip: str, window: int, index: int) -> str:
+        return f'{self.KEY_PREFIX}{ip}.{window}.{index}'
+
+    def hit(self, ip: str, window: int) -> int:
+        now: float = time.time() * 1000
+        index: int = int(now // window)
+        key: str = self._getKey(ip, window, index)
+        # The previous window is read until the current window ends
+        timeout: int = max(1, math.ceil(2 * window / 1000))
+        self.cache.add(key, 0, timeout=timeout)
+        try:
+            current: int = self.cache.incr(key)
+        except ValueError:
+            # Expired between 'add' and 'incr'
+            self.cache.add(key, 1, timeout=timeout)
+            current = 1
+        previous: int = self.cache.get(self._getKey(ip, window, index - 1), 0)
+        elapsed: float = (now - index * window) / window
+        return current + int(previous * (1 - elapsed))
+
+    def reset(self, ip: str, window: int) -> None:
+        index: int = int(time.time() * 1000 // window)
+        self.cache.delete_many([self._getKey(ip, window, index),
+                                self._getKey(ip, window, index - 1)])
+
+
+def getRateLimiter() -> BaseRateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                backend: str = getattr(settings, 'RATE_LIMIT_BACKEND',
+                                       'main.ratelimit.LocalMemoryRateLimiter')
+                _rate_limiter = import_string(backend)()
+                logger.info(f"POST rate limiter backend: [{backend}]")
+    return _rate_limiter
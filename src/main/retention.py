@@ -0,0 +1,153 @@
+from datetime import timedelta
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from . import constants
+from .models import AuditEntry
+from .parameters import getParameterValue
+
+logger = logging.getLogger(constants.LOGGERS.MAIN)
+
+PARTITION_PERIODS: Tuple[str] = ('day', 'week')
+
+
+def getHotWindowStart() -> timezone.datetime:
+    """
+    The start of the hot window of the audit entries, it is the longest
+    period the middleware looks back (the failed login attempts reset).
+    The middleware reads the counters of this window from 'ClientState', the
+    window only decides which normal posts are still kept.
+
+    Returns:
+        datetime: The creation time of the oldest hot audit entry
+    """
+    reset_days: int = getParameterValue(
+        constants.PARAMETERS.ALLOWED_LOGGED_IN_ATTEMPTS_RESET)
+    return timezone.now() - timedelta(days=reset_days)
+
+
+def getPartitionStart(moment: timezone.datetime,
+                      period: Optional[str] = 'day') -> timezone.datetime:
+    """
+    Get the start of the partition that contains the moment.
+
+    Args:
+        moment (datetime): Any time in the partition
+        period (str, optional): 'day' or 'week', the weeks start on Monday.
+        Defaults to 'day'.
+
+    Returns:
+        datetime: The start of the partition
+    """
+    if period not in PARTITION_PERIODS:
+        raise ValueError(f"Unknown audit partition period [{period}]")
+    start: timezone.datetime = moment.replace(hour=0, minute=0, second=0,
+                                              microsecond=0)
+    if period == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def getPartitionEnd(start: timezone.datetime,
+                    period: Optional[str] = 'day') -> timezone.datetime:
+    return start + timedelta(days=7 if period == 'week' else 1)
+
+
+def getExpiredPartitions(cutoff: timezone.datetime,
+                         period: Optional[str] = 'day'
+                         ) -> Iterator[Tuple[timezone.datetime, timezone.datetime]]:
+    """
+    Get the partitions that ended before the cutoff and still have entries.
+
+    Args:
+        cutoff (datetime): The oldest time that must be kept
+        period (str, optional): 'day' or 'week'. Defaults to 'day'.
+
+    Yields:
+        tuple: The start and the end of every expired partition
+    """
+    entries: QuerySet = AuditEntry.objects.filter(
+        created__lt=cutoff).order_by('created').values_list('created', flat=True)
+    oldest: timezone.datetime = entries.first()
+    while oldest is not None:
+        start: timezone.datetime = getPartitionStart(oldest, period)
+        end: timezone.datetime = getPartitionEnd(start, period)
+        if end > cutoff:
+            return
+        yield start, end
+        # Skip the empty partitions
+        oldest = entries.filter(created__gte=end).first()
+
+
+def archivePartition(start: timezone.datetime, end: timezone.datetime,
+                     archive_path: Path) -> int:
+    """
+    Write the audit entries of the partition to a compressed JSON lines file,
+    the file is written completely before it replaces any older archive of
+    the same partition.
+
+    Args:
+        start (datetime): The start of the partition
+        end (datetime): The end of the partition
+        archive_path (Path): The archive folder
+
+    Returns:
+        int: Number of the archived entries
+    """
+    Path(archive_path).mkdir(parents=True, exist_ok=True)
+    file_path: Path = Path(archive_path) / \
+        f"audit_entries_{start.strftime('%Y-%m-%d')}.jsonl.gz"
+    temp_path: Path = file_path.with_name(file_path.name + '.tmp')
+    entries: QuerySet = AuditEntry.objects.filter(
+        created__gte=start, created__lt=end).order_by('id').values()
+    count: int = 0
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+        for entry in entries.iterator():
+            file.write(json.dumps(entry, cls=DjangoJSONEncoder) + '\n')
+            count += 1
+    os.replace(temp_path, file_path)
+    return count
+
+
+def rolloverAuditEntries(now: Optional[timezone.datetime] = None) -> int:
+    """
+    Archive and delete the expired audit partitions. A partition expires
+    when it ended 'AUDIT_RETENTION_DAYS' ago, and never inside the hot window.
+    The partitions are not archived if 'AUDIT_ARCHIVE_PATH' is None.
+
+    Args:
+        now (datetime, optional): The current time. Defaults to now.
+
+    Returns:
+        int: Number of the deleted entries
+    """
+    now = now or timezone.now()
+    period: str = getattr(settings, 'AUDIT_PARTITION_PERIOD', 'day')
+    archive_path: Optional[Path] = getattr(settings, 'AUDIT_ARCHIVE_PATH', None)
+    retention_days: int = max(
+        getattr(settings, 'AUDIT_RETENTION_DAYS', 90),
+        getParameterValue(constants.PARAMETERS.ALLOWED_LOGGED_IN_ATTEMPTS_RESET))
+    cutoff: timezone.datetime = now - timedelta(days=retention_days)
+
+    # The not suspicious posts are only needed in the hot window
+    deleted, _ = AuditEntry.objects.filter(
+        action=constants.ACTION.NORMAL_POST,
+        created__lt=getHotWindowStart()).delete()
+    for start, end in getExpiredPartitions(cutoff, period):
+        if archive_path is not None:
+            archived: int = archivePartition(start, end, archive_path)
+            logger.info(f"Archived {archived} audit entries of the "
+                        + f"partition [{start.date()}]")
+        count, _ = AuditEntry.objects.filter(
+            created__gte=start, created__lt=end).delete()
+        deleted += count
+    return deleted
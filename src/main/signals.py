@@ -5,8 +5,14 @@ from django.contrib.auth.models import Group
 from human_resources.models import Employee
 
 from . import constants
-from .models import AuditEntry
+from .audit import getAuditSink
+from .blockstate import invalidateBlockState
+from .clientstate import countFailedAttempt, setClientBlock
+from .labels import invalidateLabel, invalidateLabels
+from .models import AuditEntry, BlockedClient, Parameter
+from .parameters import invalidateParameters
 from .utils import getClientIp, getUserAgent
+from .visitors import getKnownClients
 
 logger = logging.getLogger(constants.LOGGERS.MAIN)
 
@@ -28,30 +34,98 @@ def createParameters(**kwargs):
 
 def userLoggedIn(sender, request, user, **kwargs):
     ip = getClientIp(request)
-    AuditEntry.create(constants.SYSTEM_NAME,
-                      action=constants.ACTION.LOGGED_IN,
-                      user_agent=getUserAgent(request),
-                      ip=ip,
-                      username=user.username)
+    getAuditSink().record(constants.SYSTEM_NAME,
+                          action=constants.ACTION.LOGGED_IN,
+                          user_agent=getUserAgent(request),
+                          ip=ip,
+                          username=user.username)
     logger.info(f'Login user: {user} via ip: {ip}')
 
 
 def userLoggedOut(sender, request, user, **kwargs):
     ip = getClientIp(request)
-    AuditEntry.create(constants.SYSTEM_NAME,
-                      action=constants.ACTION.LOGGED_OUT,
-                      user_agent=getUserAgent(request),
-                      ip=ip,
-                      username=user.username)
+    getAuditSink().record(constants.SYSTEM_NAME,
+                          action=constants.ACTION.LOGGED_OUT,
+                          user_agent=getUserAgent(request),
+                          ip=ip,
+                          username=user.username)
     logger.info(f'Logout user: {user} via ip: {ip}')
 
 
 def userLoggedFailed(sender, credentials, **kwargs):
     request = kwargs.get('request')
     ip = getClientIp(request)
-    AuditEntry.create(constants.SYSTEM_NAME,
-                      action=constants.ACTION.LOGGED_FAILED,
-                      user_agent=getUserAgent(request),
-                      ip=ip,
-                      username=credentials.get('username', None))
+    getAuditSink().record(constants.SYSTEM_NAME,
+                          action=constants.ACTION.LOGGED_FAILED,
+                          user_agent=getUserAgent(request),
+                          ip=ip,
+                          username=credentials.get('username', None))
+    # Checked by the middleware after the response
+    countFailedAttempt(ip)
     logger.warning(f'Failed accessed to login using: {credentials}')
+
+
+def onChangingParameter(sender, instance: Parameter, **kwargs):
+    """
+    Make all the workers reload the parameters after every save.
+    """
+    invalidateParameters()
+    logger.info(f"Parameter [{instance.name}] changed, parameters reloading")
+
+
+def onSavingBlockedClient(sender, instance: BlockedClient, **kwargs):
+    """
+    Invalidate the cached block state of the old IP address
+    if the IP address of the blocked client has been edited.
+    """
+    if instance.id:
+        old_ip: str = BlockedClient.filter(id=instance.id).values_list(
+            'ip', flat=True).first()
+        if old_ip and old_ip != instance.ip:
+            invalidateBlockState(old_ip)
+
+
+def onChangingBlockedClient(sender, instance: BlockedClient, **kwargs):
+    """
+    Invalidate the cached block state of the client after every save or delete.
+    """
+    invalidateBlockState(instance.ip)
+
+
+def onAddingAuditEntry(sender, instance: AuditEntry, created: bool, **kwargs):
+    """
+    Add the IP address of the new audit entry to the known clients.
+    """
+    if created:
+        getKnownClients().add(instance.ip)
+
+
+def onSavedBlockedClient(sender, instance: BlockedClient, **kwargs):
+    """
+    Copy the block fields to the client state.
+    """
+    setClientBlock(instance.ip, instance.block_type, instance.blocked_times)
+
+
+def onDeletedBlockedClient(sender, instance: BlockedClient, **kwargs):
+    """
+    Clear the block fields of the client state.
+    """
+    setClientBlock(instance.ip)
+
+
+def onChangingLabelsNames(sender, **kwargs):
+    """
+    Invalidate all the cached display names when a person, distributor, type,
+    batch or week is changed, the labels of the other models are made of
+    their names.
+    """
+    invalidateLabels()
+
+
+def onChangingLabelledObject(sender, instance, **kwargs):
+    """
+    Invalidate the cached display name of the object after every save or
+    delete.
+    """
+    invalidateLabel(instance)
@@ -8,6 +8,7 @@ from human_resources.models import Employee, Task
 
 from .. import constants
 from ..menu import getUserMenu as _getUserMenu
+from ..utils import getNamespace as _getNamespace
 from ..utils import getUserRole as _getUserRole
 
 # Register template library
@@ -41,7 +42,7 @@ def isVarExists(context: RenderContext, name: str) -> bool:
 
 @register.simple_tag
 def getNamespace(request: HttpRequest) -> str:
-    return f"{_getUserRole(request).replace(' ', '')}:"
+    return f"{_getNamespace(request)}:"
 
 
 @register.simple_tag
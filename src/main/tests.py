@@ -1,3 +1,502 @@
-from django.test import TestCase
+from contextlib import contextmanager
+from datetime import datetime
+import gzip
+from importlib import import_module
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Iterator
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import constants
+from .audit import AuditSink
+from .blockstate import getBlockState
+from .clientstate import (NO_COUNTERS, ClientCounters, countFailedAttempt,
+                          countSuspiciousPost, getClientCounters)
+from .detectors import HtmlDetector
+from .models import AuditEntry, BlockedClient, ClientState, Parameter
+from .parameters import getParameterValue, syncParameters
+from .ratelimit import (BaseRateLimiter, CacheRateLimiter, LocalMemoryRateLimiter,
+                        getRateLimiter)
+from .retention import rolloverAuditEntries
+from .visitors import BloomFilter, KnownClients
+
+
+class HtmlDetectorTest(TestCase):
+
+    def setUp(self) -> None:
+        self.detector = HtmlDetector(100, allowed_fields=('description',),
+                                     denied_fields=('name',))
+
+    def post(self, **fields) -> QueryDict:
+        post = QueryDict(mutable=True)
+        for field, value in fields.items():
+            post[field] = value
+        return post
+
+    def test_html_is_found(self):
+        self.assertEqual(self.detector.findHtmlField(self.post(
+            note='<b>bold</b>')), 'note')
+        self.assertIsNone(self.detector.findHtmlField(self.post(
+            note='1 < 2 and 3 > 2')))
+
+    def test_allowed_and_denied_fields(self):
+        self.assertIsNone(self.detector.findHtmlField(self.post(
+            description='<b>bold</b>')))
+        # A single tag is enough in the denied fields only
+        self.assertEqual(self.detector.findHtmlField(self.post(
+            name='<img src=x>')), 'name')
+        self.assertIsNone(self.detector.findHtmlField(self.post(
+            note='<img src=x>')))
+
+    def test_long_value_is_not_an_attack(self):
+        self.assertIsNone(self.detector.findHtmlField(self.post(
+            note='a' * 1000)))
+        # Only the first characters are scanned
+        self.assertEqual(self.detector.findHtmlField(self.post(
+            note='<b>bold</b>' + 'a' * 1000)), 'note')
+        self.assertIsNone(self.detector.findHtmlField(self.post(
+            note='a' * 1000 + '<b>bold</b>')))
+
+
+class AuditSinkTest(TestCase):
+
+    def setUp(self) -> None:
+        # The timer never fires during the test
+        self.sink = AuditSink(batch_size=10, flush_interval=3600, max_pending=5)
+
+    def tearDown(self) -> None:
+        self.sink.flush()
+
+    def record(self, action: str = constants.ACTION.LOGGED_IN) -> None:
+        self.sink.record(constants.SYSTEM_NAME, ip='10.0.0.1',
+                         user_agent='Test', action=action, username='Test')
+
+    @contextmanager
+    def lockedDatabase(self) -> Iterator[None]:
+        # The failed saves are logged as errors
+        with self.assertLogs(constants.LOGGERS.MODELS, 'ERROR'), \
+                mock.patch.object(AuditEntry, 'bulkCreate', side_effect=DatabaseError(
+                    'database table is locked')):
+            yield
+
+    def test_entries_survive_a_failed_flush(self):
+        self.record()
+        self.record()
+        with self.lockedDatabase():
+            self.assertEqual(self.sink.flush(), 2)
+        self.assertEqual(AuditEntry.objects.count(), 0)
+        self.assertEqual(self.sink.pending(), 2)
+        self.assertEqual(self.sink.flush(), 2)
+        self.assertEqual(AuditEntry.objects.count(), 2)
+        self.assertEqual(self.sink.pending(), 0)
+
+    def test_security_entries_are_saved_immediately(self):
+        self.record(constants.ACTION.ATTACK_ATTEMPT)
+        self.record(constants.ACTION.LOGGED_FAILED)
+        self.assertEqual(self.sink.pending(), 0)
+        self.assertEqual(AuditEntry.objects.count(), 2)
+
+    def test_failed_security_entry_is_queued(self):
+        with self.lockedDatabase():
+            self.record(constants.ACTION.ATTACK_ATTEMPT)
+        self.assertEqual(self.sink.pending(), 1)
+        self.sink.flush()
+        self.assertTrue(AuditEntry.objects.filter(
+            action=constants.ACTION.ATTACK_ATTEMPT).exists())
+
+    def test_client_is_known_after_the_entry_is_saved(self):
+        known_clients = KnownClients(100, 0.001)
+        with mock.patch('main.audit.getKnownClients', return_value=known_clients):
+            self.record()
+            self.assertTrue(self.sink.isPending('10.0.0.1'))
+            self.assertFalse(known_clients.isKnown('10.0.0.1'))
+            with self.lockedDatabase():
+                self.sink.flush()
+            self.assertFalse(known_clients.isKnown('10.0.0.1'))
+            self.sink.flush()
+        self.assertFalse(self.sink.isPending('10.0.0.1'))
+        self.assertTrue(known_clients.isKnown('10.0.0.1'))
+
+    def test_full_buffer_drops_the_oldest_entries(self):
+        for _ in range(7):
+            self.record()
+        with self.lockedDatabase():
+            self.sink.flush()
+        self.assertEqual(self.sink.pending(), 5)
+
+
+class KnownClientsTest(TestCase):
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom_filter = BloomFilter(1000, 0.01)
+        ips = [f'10.0.{i // 256}.{i % 256}' for i in range(1000)]
+        for ip in ips:
+            bloom_filter.add(ip)
+        self.assertTrue(all(ip in bloom_filter for ip in ips))
+        false_positives = sum(f'192.168.{i // 256}.{i % 256}' in bloom_filter
+                              for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_filter_is_built_from_the_audit_entries(self):
+        AuditEntry.create(constants.SYSTEM_NAME, ip='10.0.0.2', user_agent='Test',
+                          action=constants.ACTION.FIRST_VISIT, username='Test')
+        known_clients = KnownClients(100, 0.001)
+        # Without a file the filter starts empty, the database is not read
+        known_clients.load()
+        self.assertFalse(known_clients.isKnown('10.0.0.2'))
+        self.assertEqual(known_clients.rebuild(), 1)
+        self.assertTrue(known_clients.isKnown('10.0.0.2'))
+
+
+class RateLimiterTest(TestCase):
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def assertLimiter(self, limiter: BaseRateLimiter, clock: mock.Mock) -> None:
+        clock.return_value = 1000.0
+        self.assertEqual(limiter.hit('10.0.0.1', 500), 1)
+        self.assertEqual(limiter.hit('10.0.0.1', 500), 2)
+        self.assertEqual(limiter.hit('10.0.0.1', 500), 3)
+        # Other clients have their own counters
+        self.assertEqual(limiter.hit('10.0.0.2', 500), 1)
+        limiter.reset('10.0.0.1', 500)
+        self.assertEqual(limiter.hit('10.0.0.1', 500), 1)
+        # The posts out of the window are not counted
+        clock.return_value = 1002.0
+        self.assertEqual(limiter.hit('10.0.0.1', 500), 1)
+        self.assertEqual(limiter.hit('10.0.0.2', 500), 1)
+
+    def test_local_memory_rate_limiter(self):
+        with mock.patch('main.ratelimit.time') as clock:
+            self.assertLimiter(LocalMemoryRateLimiter(), clock.monotonic)
+
+    def test_cache_rate_limiter(self):
+        with mock.patch('main.ratelimit.time') as clock:
+            self.assertLimiter(CacheRateLimiter(), clock.time)
+
+    def test_cache_rate_limiter_slides_over_the_previous_window(self):
+        limiter = CacheRateLimiter()
+        with mock.patch('main.ratelimit.time') as clock:
+            clock.time.return_value = 1000.4
+            limiter.hit('10.0.0.1', 500)
+            limiter.hit('10.0.0.1', 500)
+            # 100 milliseconds later in the next window
+            clock.time.return_value = 1000.5
+            self.assertEqual(limiter.hit('10.0.0.1', 500), 3)
+
+    def test_base_rate_limiter_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BaseRateLimiter()
+
+
+class BlockStateTest(TestCase):
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def block(self, block_type: str = constants.BLOCK_TYPES.TEMPORARY) -> BlockedClient:
+        return BlockedClient.create(constants.SYSTEM_NAME, ip='10.0.0.1',
+                                    user_agent='Test', block_type=block_type)
+
+    def test_saving_the_client_invalidates_the_cached_state(self):
+        with mock.patch('main.blockstate.isSharedCache', return_value=True):
+            self.assertFalse(getBlockState('10.0.0.1').isBlocked)
+            blocked_client: BlockedClient = self.block()
+            self.assertTrue(getBlockState('10.0.0.1').isBlocked)
+            blocked_client.setBlockType(constants.SYSTEM_NAME,
+                                        constants.BLOCK_TYPES.UNBLOCKED)
+            self.assertFalse(getBlockState('10.0.0.1').isBlocked)
+            blocked_client.delete(constants.SYSTEM_NAME)
+            self.assertIsNone(getBlockState('10.0.0.1').block_type)
+
+    def test_local_cache_is_invalidated_by_the_worker_saves(self):
+        self.assertFalse(getBlockState('10.0.0.1').isBlocked)
+        with self.assertNumQueries(0):
+            getBlockState('10.0.0.1')
+        self.block()
+        self.assertTrue(getBlockState('10.0.0.1').isBlocked)
+
+    @override_settings(BLOCK_STATE_LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_expires_after_the_local_timeout(self):
+        self.block()
+        self.assertTrue(getBlockState('10.0.0.1').isBlocked)
+        # Saved by another worker, no signal in this worker
+        BlockedClient.objects.filter(ip='10.0.0.1').update(
+            block_type=constants.BLOCK_TYPES.UNBLOCKED)
+        self.assertFalse(getBlockState('10.0.0.1').isBlocked)
+
+    def test_block_period_change_applies_to_the_cached_state(self):
+        self.block()
+        BlockedClient.objects.filter(ip='10.0.0.1').update(
+            updated=timezone.now() - timezone.timedelta(days=2))
+        with mock.patch('main.blockstate.isSharedCache', return_value=True):
+            self.assertTrue(getBlockState('10.0.0.1').isAllowedToUnblocked)
+            parameter: Parameter = Parameter.objects.get(
+                name=constants.PARAMETERS.TEMPORARY_BLOCK_PERIOD)
+            parameter.value = '5'
+            parameter.save()
+            self.assertFalse(getBlockState('10.0.0.1').isAllowedToUnblocked)
+
+
+class ParametersTest(TestCase):
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_local_version_is_checked_without_queries(self):
+        syncParameters()
+        with self.assertNumQueries(0):
+            syncParameters()
+
+    @override_settings(PARAMETERS_LOCAL_CACHE_TIMEOUT=0)
+    def test_parameters_saved_by_another_worker_are_reloaded(self):
+        syncParameters()
+        self.assertEqual(getParameterValue(constants.PARAMETERS.MAX_TEMPORARY_BLOCK), 5)
+        # Saved by another worker, no signal in this worker
+        Parameter.objects.filter(name=constants.PARAMETERS.MAX_TEMPORARY_BLOCK
+                                 ).update(value='7', updated=timezone.now())
+        syncParameters()
+        self.assertEqual(getParameterValue(constants.PARAMETERS.MAX_TEMPORARY_BLOCK), 7)
+
+    def test_shared_cache_version_is_bumped_on_save(self):
+        with mock.patch('main.parameters._isSharedCache', return_value=True):
+            syncParameters()
+            parameter: Parameter = Parameter.objects.get(
+                name=constants.PARAMETERS.MAX_TEMPORARY_BLOCK)
+            parameter.value = '8'
+            parameter.save()
+            syncParameters()
+            self.assertEqual(getParameterValue(
+                constants.PARAMETERS.MAX_TEMPORARY_BLOCK), 8)
+
+
+class ClientStateTest(TestCase):
+
+    def test_counters_escalate(self):
+        self.assertEqual(getClientCounters('10.0.0.1'), NO_COUNTERS)
+        countFailedAttempt('10.0.0.1')
+        countFailedAttempt('10.0.0.1')
+        countSuspiciousPost('10.0.0.1')
+        self.assertEqual(getClientCounters('10.0.0.1'), ClientCounters(2, 1, 0))
+        BlockedClient.create(constants.SYSTEM_NAME, ip='10.0.0.1',
+                             user_agent='Test',
+                             block_type=constants.BLOCK_TYPES.TEMPORARY)
+        self.assertEqual(getClientCounters('10.0.0.1').blocked_times, 1)
+        self.assertEqual(ClientState.objects.get(ip='10.0.0.1').block_type,
+                         constants.BLOCK_TYPES.TEMPORARY)
+
+    def test_counters_of_an_expired_window_restart(self):
+        countFailedAttempt('10.0.0.1')
+        ClientState.objects.filter(ip='10.0.0.1').update(
+            window_start=timezone.now() - timezone.timedelta(days=2))
+        self.assertEqual(getClientCounters('10.0.0.1'), NO_COUNTERS)
+        countFailedAttempt('10.0.0.1')
+        self.assertEqual(getClientCounters('10.0.0.1'), ClientCounters(1, 0, 0))
+
+    def test_backfill_from_the_audit_entries_and_blocked_clients(self):
+        for action in (constants.ACTION.FIRST_VISIT, constants.ACTION.LOGGED_FAILED,
+                       constants.ACTION.LOGGED_FAILED, constants.ACTION.SUSPICIOUS_POST):
+            AuditEntry.create(constants.SYSTEM_NAME, ip='10.0.0.1',
+                              user_agent='Test', action=action, username='Test')
+        # Out of the reset window
+        AuditEntry.objects.filter(id=AuditEntry.objects.filter(
+            action=constants.ACTION.LOGGED_FAILED).first().id).update(
+            created=timezone.now() - timezone.timedelta(days=2))
+        BlockedClient.create(constants.SYSTEM_NAME, ip='10.0.0.2', user_agent='Test',
+                             block_type=constants.BLOCK_TYPES.INDEFINITELY)
+        ClientState.objects.all().delete()
+
+        migration = import_module('main.migrations.0005_backfill_clientstate')
+        migration.backfillClientStates(apps, None)
+        self.assertEqual(getClientCounters('10.0.0.1'), ClientCounters(1, 1, 0))
+        state: ClientState = ClientState.objects.get(ip='10.0.0.2')
+        self.assertEqual((state.block_type, state.blocked_times),
+                         (constants.BLOCK_TYPES.INDEFINITELY, 1))
+
+
+class AllowedClientMiddlewareTest(TestCase):
+
+    ip: str = '10.1.0.1'
+
+    def tearDown(self) -> None:
+        getRateLimiter().reset(self.ip, getParameterValue(
+            constants.PARAMETERS.BETWEEN_POST_REQUESTS_TIME))
+        cache.clear()
+
+    def get(self):
+        return self.client.get('/', REMOTE_ADDR=self.ip)
+
+    def getBlockType(self) -> str:
+        return BlockedClient.objects.filter(ip=self.ip).values_list(
+            'block_type', flat=True).first()
+
+    def test_failed_attempts_limit_blocks_the_client(self):
+        allowed: int = getParameterValue(
+            constants.PARAMETERS.ALLOWED_LOGGED_IN_ATTEMPTS)
+        for _ in range(allowed - 1):
+            countFailedAttempt(self.ip)
+        self.assertEqual(self.get().status_code, 200)
+        self.assertIsNone(self.getBlockType())
+        countFailedAttempt(self.ip)
+        self.assertEqual(self.get().status_code, 302)
+        self.assertEqual(self.getBlockType(), constants.BLOCK_TYPES.TEMPORARY)
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_attempts_past_the_limit_block_the_client(self):
+        # The attempts may pass the limit between two checks
+        for _ in range(getParameterValue(
+                constants.PARAMETERS.ALLOWED_LOGGED_IN_ATTEMPTS) + 2):
+            countFailedAttempt(self.ip)
+        self.get()
+        self.assertEqual(self.getBlockType(), constants.BLOCK_TYPES.TEMPORARY)
+
+    def test_post_burst_blocks_the_client(self):
+        for _ in range(3):
+            self.client.post('/Not-Found/', REMOTE_ADDR=self.ip)
+        self.assertIsNone(self.getBlockType())
+        self.client.post('/Not-Found/', REMOTE_ADDR=self.ip)
+        self.assertEqual(self.getBlockType(), constants.BLOCK_TYPES.TEMPORARY)
+        self.assertEqual(getClientCounters(self.ip).suspicious_posts, 1)
+        self.assertTrue(AuditEntry.objects.filter(
+            ip=self.ip, action=constants.ACTION.SUSPICIOUS_POST).exists())
+        self.assertEqual(self.get().status_code, 403)
+
+
+class AuditRolloverTest(TestCase):
+
+    def setUp(self) -> None:
+        archive = TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        self.archive_path = Path(archive.name)
+
+    def addEntry(self, created: datetime, ip: str = '10.0.0.1') -> int:
+        entry: AuditEntry = AuditEntry.create(
+            constants.SYSTEM_NAME, ip=ip, user_agent='Test',
+            action=constants.ACTION.LOGGED_IN, username='Test')
+        AuditEntry.objects.filter(id=entry.id).update(created=created)
+        return entry.id
+
+    def readArchive(self, day: str) -> list:
+        with gzip.open(self.archive_path / f'audit_entries_{day}.jsonl.gz',
+                       'rt', encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_expired_partitions_are_archived_and_deleted(self):
+        # The cutoff is 2026-09-17 12:00, 30 days before now
+        now = datetime(2026, 10, 17, 12)
+        expired: list = [self.addEntry(datetime(2026, 9, 10, 10), '10.0.0.1'),
+                         self.addEntry(datetime(2026, 9, 10, 23), '10.0.0.2')]
+        # The partition of the cutoff ends after it, it is kept whole
+        kept: list = [self.addEntry(datetime(2026, 9, 17, 8)),
+                      self.addEntry(datetime(2026, 10, 1))]
+        with override_settings(AUDIT_RETENTION_DAYS=30,
+                               AUDIT_PARTITION_PERIOD='day',
+                               AUDIT_ARCHIVE_PATH=self.archive_path):
+            self.assertEqual(rolloverAuditEntries(now), 2)
+        self.assertEqual(sorted(AuditEntry.objects.values_list('id', flat=True)),
+                         kept)
+        self.assertEqual([(entry['id'], entry['ip'], entry['created'])
+                          for entry in self.readArchive('2026-09-10')],
+                         [(expired[0], '10.0.0.1', '2026-09-10T10:00:00'),
+                          (expired[1], '10.0.0.2', '2026-09-10T23:00:00')])
+        self.assertEqual([path.name for path in self.archive_path.iterdir()],
+                         ['audit_entries_2026-09-10.jsonl.gz'])
+
+    def test_week_partition_is_kept_until_it_ends(self):
+        now = datetime(2026, 10, 17, 12)
+        # The week of Monday 2026-09-14 contains the cutoff
+        kept: int = self.addEntry(datetime(2026, 9, 14, 1))
+        self.addEntry(datetime(2026, 9, 13, 1))
+        with override_settings(AUDIT_RETENTION_DAYS=30,
+                               AUDIT_PARTITION_PERIOD='week',
+                               AUDIT_ARCHIVE_PATH=None):
+            self.assertEqual(rolloverAuditEntries(now), 1)
+        self.assertEqual(list(AuditEntry.objects.values_list('id', flat=True)),
+                         [kept])
+        self.assertEqual(list(self.archive_path.iterdir()), [])
+
+
+class DirtyFieldsTest(TestCase):
+
+    def setUp(self) -> None:
+        BlockedClient.create(constants.SYSTEM_NAME, ip='10.0.0.1', user_agent='Test',
+                             block_type=constants.BLOCK_TYPES.TEMPORARY)
+        self.blocked_client: BlockedClient = BlockedClient.objects.get(ip='10.0.0.1')
+
+    def test_unit_of_work_saves_the_dirty_fields(self):
+        with BlockedClient.unitOfWork(constants.SYSTEM_NAME):
+            self.blocked_client.setBlockType(constants.SYSTEM_NAME,
+                                             constants.BLOCK_TYPES.INDEFINITELY)
+            self.blocked_client.setBlockedTimes(constants.SYSTEM_NAME, 3)
+            self.assertEqual(sorted(self.blocked_client.getDirtyFields()),
+                             ['block_type', 'blocked_times'])
+        self.assertEqual(self.blocked_client.getDirtyFields(), [])
+        saved: BlockedClient = BlockedClient.objects.get(ip='10.0.0.1')
+        self.assertEqual((saved.block_type, saved.blocked_times),
+                         (constants.BLOCK_TYPES.INDEFINITELY, 3))
+
+    def test_plain_save_refreshes_the_loaded_values(self):
+        self.blocked_client.user_agent = 'Changed'
+        self.blocked_client.save()
+        self.assertEqual(self.blocked_client.getDirtyFields(), [])
+        # Changed back after the plain save, it must be saved again
+        self.blocked_client.user_agent = 'Test'
+        self.assertEqual(self.blocked_client.getDirtyFields(), ['user_agent'])
+        self.blocked_client.saveDirtyFields(constants.SYSTEM_NAME)
+        self.assertEqual(BlockedClient.objects.get(ip='10.0.0.1').user_agent, 'Test')
+
+    def test_update_fields_keeps_the_other_dirty_fields(self):
+        self.blocked_client.user_agent = 'Changed'
+        self.blocked_client.blocked_times = 2
+        self.blocked_client.save(update_fields=['user_agent'])
+        self.assertEqual(self.blocked_client.getDirtyFields(), ['blocked_times'])
+
+
+class AuditedQuerySetTest(TestCase):
+
+    def setUp(self) -> None:
+        self.ids: list = [AuditEntry.create(
+            constants.SYSTEM_NAME, ip=ip, user_agent='Test',
+            action=constants.ACTION.LOGGED_IN, username='Test').id
+            for ip in ('10.0.0.1', '10.0.0.1', '10.0.0.2')]
+
+    def test_update_sets_the_fields_and_logs_the_ids(self):
+        with self.assertLogs(constants.LOGGERS.MODELS, 'INFO') as logs:
+            self.assertEqual(AuditEntry.objects.filter(ip='10.0.0.1').auditedUpdate(
+                'Admin', username='Changed'), 2)
+        self.assertEqual(logs.output, [
+            f"INFO:{constants.LOGGERS.MODELS}:Database change in [AuditEntry] "
+            + f"model at objects IDs: [{self.ids[0]}-{self.ids[1]}] fields: "
+            + "['username'] By: Admin"])
+        self.assertEqual(list(AuditEntry.objects.order_by('id').values_list(
+            'username', 'updated_by')), [('Changed', 'Admin'),
+                                         ('Changed', 'Admin'),
+                                         ('Test', constants.SYSTEM_NAME)])
+
+    def test_delete_removes_the_rows_and_logs_the_ids(self):
+        with self.assertLogs(constants.LOGGERS.MODELS, 'INFO') as logs:
+            self.assertEqual(AuditEntry.objects.exclude(
+                id=self.ids[1]).auditedDelete('Admin'), 2)
+        self.assertEqual(logs.output, [
+            f"INFO:{constants.LOGGERS.MODELS}:Database change in [AuditEntry] "
+            + f"model 2 objects IDs: [{self.ids[0]}, {self.ids[2]}] were "
+            + "deleted By: Admin"])
+        self.assertEqual(list(AuditEntry.objects.values_list('id', flat=True)),
+                         [self.ids[1]])
+
+    def test_empty_queryset_changes_and_logs_nothing(self):
+        with self.assertNoLogs(constants.LOGGERS.MODELS, 'INFO'):
+            self.assertEqual(AuditEntry.objects.filter(ip='10.0.0.3').auditedUpdate(
+                'Admin', username='Changed'), 0)
+            self.assertEqual(AuditEntry.objects.filter(
+                ip='10.0.0.3').auditedDelete('Admin'), 0)
+        self.assertEqual(AuditEntry.objects.count(), 3)
@@ -2,11 +2,15 @@ import logging
 from typing import Union
 
 from django.contrib.auth.models import User
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.db.models.query import QuerySet
 from django.forms import ModelForm
 from django.http import HttpRequest
+from django.urls import reverse
 
 from human_resources.models import Employee, Task
 
@@ -16,6 +20,8 @@ from .models import BaseModel
 logger = logging.getLogger(constants.LOGGERS.MAIN)
 logger_models = logging.getLogger(constants.LOGGERS.MODELS)
 
+_admin_prefix: str = None
+
 
 class Pagination:
 
@@ -46,13 +52,14 @@ def setCreatedByUpdatedBy(requester: Union[HttpRequest, str], obj: BaseModel, ch
         except Exception:
             raise TypeError(
                 "'Requester' must be HttpRequest object or string.")
+    # The object is saved once by the caller (e.g. 'ModelAdmin.save_model')
     if change:
-        obj.setUpdatedBy(user)
+        obj.updated_by = user
         logger_models.info(f"Database change in {obj.__class__.__name__} at object "
                            + f"ID: {obj.id} By: {user}")
     else:
-        obj.setCreatedBy(user)
-        obj.setUpdatedBy(user)
+        obj.created_by = user
+        obj.updated_by = user
         logger_models.info(
             f"Database change in { obj.__class__.__name__} adding new object. "
             + f"ID: {obj.id} By: {user}")
@@ -97,6 +104,9 @@ def getUserRole(requester: Union[HttpRequest, User]) -> str:
     if isinstance(requester, User):
         user = requester
     elif isinstance(requester, HttpRequest):
+        # Computed once per request by 'RequestContextMiddleware'
+        if hasattr(requester, 'role'):
+            return requester.role
         user = requester.user
     else:
         raise ValueError("Requester must be a User or HttpRequest object.")
@@ -142,5 +152,28 @@ def getUserAgent(request: HttpRequest) -> str:
     return request.headers.get('User-Agent', 'Unknown')
 
 
+def getNamespace(request: HttpRequest) -> str:
+    namespace: str = getattr(request, 'namespace', None)
+    if namespace is None:
+        namespace = getUserRole(request).replace(' ', '')
+    return namespace
+
+
+def getAdminPrefix() -> str:
+    # The URL configuration does not change while the server is running
+    global _admin_prefix
+    if _admin_prefix is None:
+        _admin_prefix = reverse('admin:index')
+    return _admin_prefix
+
+
 def resolvePageUrl(request: HttpRequest, page: str) -> str:
-    return f"{getUserRole(request).replace(' ', '')}:{page}"
+    return f"{getNamespace(request)}:{page}"
+
+
+def isSharedCache(alias: str = DEFAULT_CACHE_ALIAS) -> bool:
+    """
+    Check if the cache is shared by all the workers, the local memory cache
+    is kept in every worker process and the dummy cache keeps nothing.
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -14,6 +14,7 @@ from . import constants
 from . import messages as MSG
 from .decorators import isAuthenticatedUser
 from .forms import CreateUserForm
+from .onboarding import clearOnboardingState, setOnboardingState
 from .utils import getUserBaseTemplate as base
 from .utils import getUserRole
 
@@ -89,7 +90,9 @@ def createUserPage(request: HttpRequest) -> HttpResponse:
                     new_user.save()
 
             user.setAccount(request, new_user)
+            setOnboardingState(new_user, False)
             logout(request)
+            clearOnboardingState(old_user)
             old_user.delete()
             MSG.LOGIN_WITH_NEW_ACCOUNT(request)
 
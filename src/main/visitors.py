@@ -0,0 +1,147 @@
+import atexit
+import hashlib
+import logging
+import math
+import os
+import threading
+from typing import Optional
+
+from django.conf import settings
+
+from . import constants
+from .models import AuditEntry
+
+logger = logging.getLogger(constants.LOGGERS.MIDDLEWARE)
+
+_known_clients = None
+_known_clients_lock = threading.Lock()
+
+
+class BloomFilter:
+    """
+    Compact set of strings that can answer 'maybe in the set' or
+    'surely not in the set', the false positives rate is 'error_rate'
+    as long as no more than 'capacity' items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size: int = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes: int = max(1, round(self.size / capacity * math.log(2)))
+        self.bits: bytearray = bytearray(math.ceil(self.size / 8))
+
+    def _getIndexes(self, item: str):
+        digest: bytes = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first: int = int.from_bytes(digest[:8], 'little')
+        second: int = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for index in self._getIndexes(item):
+            self.bits[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[index >> 3] & (1 << (index & 7))
+                   for index in self._getIndexes(item))
+
+
+class KnownClients:
+    """
+    The IP addresses that already have audit entries.
+    It is loaded from 'file_path' when the worker starts, the file is built
+    from the distinct 'AuditEntry' IP addresses by the 'buildknownclients'
+    command, and every saved audit entry adds its IP address. Without the
+    file the filter starts empty. The filter may be behind the database
+    (other workers, old file), so a miss must still be checked in the
+    database.
+    """
+
+    def __init__(self, capacity: int, error_rate: float,
+                 file_path: Optional[str] = None):
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        self.file_path: Optional[str] = file_path
+        self._lock = threading.Lock()
+        self._filter: BloomFilter = None
+
+    def isKnown(self, ip: str) -> bool:
+        return ip in self._getFilter()
+
+    def add(self, ip: str) -> None:
+        bloom_filter: BloomFilter = self._getFilter()
+        with self._lock:
+            bloom_filter.add(ip)
+
+    def rebuild(self) -> int:
+        """
+        Build the filter from the distinct 'AuditEntry' IP addresses.
+
+        Returns:
+            int: Number of the IP addresses
+        """
+        bloom_filter = BloomFilter(self.capacity, self.error_rate)
+        ips = AuditEntry.objects.values_list('ip', flat=True).distinct()
+        count: int = 0
+        for ip in ips.iterator():
+            bloom_filter.add(ip)
+            count += 1
+        self._filter = bloom_filter
+        logger.info(f"Known clients filter built from {count} IP addresses")
+        if count > self.capacity:
+            logger.warning(f"Known clients ({count}) exceeded the filter "
+                           + f"capacity ({self.capacity})")
+        return count
+
+    def save(self) -> None:
+        if not self.file_path or self._filter is None:
+            return
+        temp_path: str = f'{self.file_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(f'{self._filter.size} {self._filter.hashes}\n'.encode())
+            file.write(self._filter.bits)
+        os.replace(temp_path, self.file_path)
+
+    def _load(self) -> bool:
+        if not self.file_path or not os.path.exists(self.file_path):
+            return False
+        bloom_filter = BloomFilter(self.capacity, self.error_rate)
+        with open(self.file_path, 'rb') as file:
+            header: bytes = file.readline()
+            bits: bytes = file.read()
+        if header != f'{bloom_filter.size} {bloom_filter.hashes}\n'.encode() \
+                or len(bits) != len(bloom_filter.bits):
+            logger.warning("The known clients file does not match the "
+                           + "filter settings, it will be rebuilt")
+            return False
+        bloom_filter.bits[:] = bits
+        self._filter = bloom_filter
+        return True
+
+    def load(self) -> None:
+        """
+        Load the filter from the file, or start an empty filter. The database
+        is not read, a request never waits for the filter to be built.
+        """
+        with self._lock:
+            if self._filter is None and not self._load():
+                self._filter = BloomFilter(self.capacity, self.error_rate)
+
+    def _getFilter(self) -> BloomFilter:
+        if self._filter is None:
+            self.load()
+        return self._filter
+
+
+def getKnownClients() -> KnownClients:
+    global _known_clients
+    if _known_clients is None:
+        with _known_clients_lock:
+            if _known_clients is None:
+                _known_clients = KnownClients(
+                    getattr(settings, 'KNOWN_CLIENTS_CAPACITY', 100000),
+                    getattr(settings, 'KNOWN_CLIENTS_ERROR_RATE', 0.001),
+                    getattr(settings, 'KNOWN_CLIENTS_FILE', None))
+                # Keep the IP addresses added by this worker for the next start
+                atexit.register(_known_clients.save)
+    return _known_clients
@@ -1,6 +1,11 @@
 from django.contrib.admin import ModelAdmin, register
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.http import HttpRequest
+from main.admin import LabelsModelAdmin, RelatedLabelsFilter
 from main.constants import BASE_MODEL_FIELDS, MAIN_STORAGE_ID
-from .models import Batch, ItemType, ItemCard, RetailItem, RetailCard, Stock, GoodsMovement
+from .models import (Batch, GoodsMovement, InventoryEvent, InventorySnapshot,
+                     ItemCard, ItemType, RetailCard, RetailItem, Stock,
+                     StockBalance)
 
 
 @register(Batch)
@@ -18,22 +23,74 @@ class ItemTypeAdmin(ModelAdmin):
 
 
 @register(ItemCard)
-class ItemCardAdmin(ModelAdmin):
+class ItemCardAdmin(LabelsModelAdmin):
     list_display = ('id', 'type', 'batch', 'stock',
                     'quantity', 'status', 'price',
                     'receiving_date', 'received_from',
                     'is_transforming', 'is_priced',
                     *BASE_MODEL_FIELDS)
-    list_filter = ('type', 'batch', 'stock', 'status',
+    list_filter = ('type', 'batch', ('stock', RelatedLabelsFilter), 'status',
                    'is_transforming', 'is_priced', 'created')
+    list_select_related = ('type', 'batch', 'stock')
+
+
+@register(StockBalance)
+class StockBalanceAdmin(LabelsModelAdmin):
+    list_display = ('id', 'stock', 'type', 'batch', 'status',
+                    'quantity', 'in_transit', *BASE_MODEL_FIELDS)
+    list_filter = (('stock', RelatedLabelsFilter), 'type', 'batch', 'status')
+    list_select_related = ('stock', 'type', 'batch')
+
+    # Changed only by the item cards and the 'reconcilestockbalance' command
+    def has_add_permission(self, *args, **kwargs) -> bool:
+        return False
+
+    def has_change_permission(self, *args, **kwargs) -> bool:
+        return False
+
+    def has_delete_permission(self, *args, **kwargs) -> bool:
+        return False
+
+
+@register(InventoryEvent)
+class InventoryEventAdmin(LabelsModelAdmin):
+    list_display = ('id', 'time', 'stock', 'type', 'batch', 'status',
+                    'quantity', 'in_transit', 'reason', 'card_id')
+    list_filter = (('stock', RelatedLabelsFilter), 'type', 'batch', 'status',
+                   'reason', 'time')
+    list_select_related = ('stock', 'type', 'batch')
+
+    # The inventory history is append-only
+    def has_add_permission(self, *args, **kwargs) -> bool:
+        return False
+
+    def has_change_permission(self, *args, **kwargs) -> bool:
+        return False
+
+    def has_delete_permission(self, *args, **kwargs) -> bool:
+        return False
+
+
+@register(InventorySnapshot)
+class InventorySnapshotAdmin(ModelAdmin):
+    list_display = ('id', 'time', 'event_id', *BASE_MODEL_FIELDS)
+
+    # Taken only by the 'snapshotInventory' cron job
+    def has_add_permission(self, *args, **kwargs) -> bool:
+        return False
+
+    def has_change_permission(self, *args, **kwargs) -> bool:
+        return False
 
 
 @register(GoodsMovement)
-class GoodsMovementAdmin(ModelAdmin):
+class GoodsMovementAdmin(LabelsModelAdmin):
     list_display = ('id', 'item', 'sender', 'receiver',
                     'date', *BASE_MODEL_FIELDS)
-    list_filter = ('item', 'sender', 'receiver',
+    # Filtering by the card lists every card, the type and batch are enough
+    list_filter = ('item__type', 'item__batch', 'sender', 'receiver',
                    'date', 'created')
+    list_select_related = ('item',)
 
 
 @register(RetailCard)
@@ -41,6 +98,7 @@ class RetailCardAdmin(ModelAdmin):
     list_display = ('id', 'type', 'conversion_date',
                     'weight', *BASE_MODEL_FIELDS)
     list_filter = ('type', 'weight', 'created')
+    list_select_related = ('type',)
 
 
 @register(RetailItem)
@@ -48,6 +106,7 @@ class RetailItemAdmin(ModelAdmin):
     list_display = ('id', 'type', 'quantity',
                     'price', *BASE_MODEL_FIELDS)
     list_filter = ('type', 'created')
+    list_select_related = ('type',)
 
 
 @register(Stock)
@@ -55,13 +114,13 @@ class StockAdmin(ModelAdmin):
     list_display = ('id', 'stock_owner', *BASE_MODEL_FIELDS)
     list_filter = ('created',)
 
-    def stock_owner(self, obj):
-        stock: str = ''
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        from distributor.models import Distributor
+        return super().get_queryset(request).annotate(
+            owner_name=Subquery(Distributor.objects.filter(
+                stock=OuterRef('pk')).values('person__name')[:1]))
+
+    def stock_owner(self, obj: Stock) -> str:
         if obj.id == MAIN_STORAGE_ID:
-            stock = 'Main Storage Stock'
-        else:
-            from distributor.models import Distributor
-            distributor = Distributor.get(stock=obj.id)
-            person = distributor.getPerson
-            stock = person.getName
-        return stock
+            return 'Main Storage Stock'
+        return obj.owner_name
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
 
 
 class WarehouseAdminConfig(AppConfig):
@@ -7,8 +7,32 @@ class WarehouseAdminConfig(AppConfig):
     name = 'warehouse_admin'
 
     def ready(self) -> None:
-        from .signals import onMigratingStockModel
+        from distributor.models import Distributor
+        from main import signals as main_signals
+        from main.models import Person
 
-        post_migrate.connect(onMigratingStockModel, sender=self)
+        from . import signals
+        from .models import Batch, ItemCard, ItemType
+
+        post_migrate.connect(signals.onMigratingStockModel, sender=self)
+
+        # Keep the stock balances up to date with every card change
+        pre_save.connect(signals.onSavingItemCard, sender=ItemCard)
+        post_save.connect(signals.onSavedItemCard, sender=ItemCard)
+        post_delete.connect(signals.onDeletedItemCard, sender=ItemCard)
+
+        # Keep the cached choices of the forms up to date
+        post_save.connect(signals.onChangedItemCard, sender=ItemCard)
+        post_delete.connect(signals.onChangedItemCard, sender=ItemCard)
+        for model in (ItemType, Batch, Distributor, Person):
+            post_save.connect(signals.onChangingChoicesNames, sender=model)
+            post_delete.connect(signals.onChangingChoicesNames, sender=model)
+
+        # Keep the cached display names of the cards up to date
+        post_save.connect(main_signals.onChangingLabelledObject, sender=ItemCard)
+        post_delete.connect(main_signals.onChangingLabelledObject, sender=ItemCard)
+        for model in (ItemType, Batch):
+            post_save.connect(main_signals.onChangingLabelsNames, sender=model)
+            post_delete.connect(main_signals.onChangingLabelsNames, sender=model)
 
         return super().ready()
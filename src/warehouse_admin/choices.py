@@ -0,0 +1,146 @@
+import logging
+import time
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from distributor.models import Distributor
+from main import constants
+from main.utils import isSharedCache
+from .models import ItemCard, ItemType
+
+logger = logging.getLogger(constants.LOGGERS.MODELS)
+
+_KEY_PREFIX: str = 'HoneyHome.Choices.'
+# Bumped to drop all the cached choices at once
+_VERSION_KEY: str = _KEY_PREFIX + 'Version'
+
+Choices = List[Tuple[int, str]]
+
+
+class StockChoices(NamedTuple):
+    """
+    The distinct types and batches of the cards of a stock.
+    """
+    types: Choices
+    batches: Choices
+    retail_type_ids: FrozenSet[int]
+
+    @property
+    def nonRetailTypes(self) -> Choices:
+        return [choice for choice in self.types
+                if choice[0] not in self.retail_type_ids]
+
+
+def _getVersion() -> int:
+    version: Optional[int] = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _getKey(name: str, version: Optional[int] = None) -> str:
+    return f'{_KEY_PREFIX}{version or _getVersion()}.{name}'
+
+
+def _getTimeout() -> int:
+    if isSharedCache():
+        return getattr(settings, 'CHOICES_CACHE_TIMEOUT', 86400)
+    # The invalidations of the other workers do not reach the local cache
+    return getattr(settings, 'CHOICES_LOCAL_CACHE_TIMEOUT', 30)
+
+
+def _getCached(name: str, load):
+    key: str = _getKey(name)
+    choices = cache.get(key)
+    if choices is None:
+        choices = load()
+        cache.set(key, choices, timeout=_getTimeout())
+    return choices
+
+
+def _loadStockChoices(stock_id: int) -> StockChoices:
+    cards = ItemCard.objects.filter(stock_id=stock_id)
+    types: list = list(cards.values_list('type_id', 'type__name', 'type__is_retail')
+                       .distinct().order_by('type__name'))
+    batches: Choices = list(cards.values_list('batch_id', 'batch__name')
+                            .distinct().order_by('batch__name'))
+    return StockChoices([(id, name) for id, name, _ in types], batches,
+                        frozenset(id for id, _, is_retail in types if is_retail))
+
+
+def getStockChoices(stock_id: int) -> StockChoices:
+    """
+    Get the types and batches choices of the stock from the cache,
+    the values are the IDs.
+
+    Args:
+        stock_id (int): The stock ID
+
+    Returns:
+        StockChoices: The types and batches of the stock cards
+    """
+    stock_id = int(stock_id)
+    return _getCached(f'Stock.{stock_id}', lambda: _loadStockChoices(stock_id))
+
+
+def getDestinationChoices(stock_id: int) -> Choices:
+    """
+    Get the stocks that the stock can send goods to, the values are the
+    stocks IDs and the main storage is the first.
+
+    Args:
+        stock_id (int): The source stock ID
+
+    Returns:
+        list: The destination stocks and their owners names
+    """
+    stock_id = int(stock_id)
+    distributors: Choices = _getCached('Distributors', lambda: list(
+        Distributor.objects.filter(stock__isnull=False).values_list(
+            'stock_id', 'person__name').order_by('person__name')))
+    destinations: Choices = []
+    if stock_id != constants.MAIN_STORAGE_ID:
+        destinations.append((constants.MAIN_STORAGE_ID, 'Main Storage'))
+    return destinations + [choice for choice in distributors
+                           if choice[0] != stock_id]
+
+
+def getRetailTypeChoices() -> List[Tuple[str, str]]:
+    """
+    Get the retail types choices, the values are the names.
+
+    Returns:
+        list: The names of the retail types
+    """
+    return _getCached('RetailTypes', lambda: [
+        (name, name) for name in ItemType.objects.filter(
+            is_retail=True).values_list('name', flat=True).order_by('name')])
+
+
+def invalidateStockChoices(*stock_ids: int) -> None:
+    """
+    Remove the cached choices of the stocks, they are removed again after the
+    transaction commits so no worker keeps the choices it may have read
+    before the commit.
+    """
+    keys: List[str] = [_getKey(f'Stock.{stock_id}') for stock_id in stock_ids
+                       if stock_id is not None]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidateChoices() -> None:
+    """
+    Drop all the cached choices, after the names of the types, batches or
+    distributors changed.
+    """
+    def bumpVersion():
+        cache.set(_VERSION_KEY, time.time_ns(), timeout=None)
+
+    bumpVersion()
+    transaction.on_commit(bumpVersion)
+    logger.info("Choices cache invalidated")
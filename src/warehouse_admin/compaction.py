@@ -0,0 +1,126 @@
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Value, When
+from django.http import HttpRequest
+from django.utils import timezone
+
+from main import constants
+from main.labels import invalidateLabels
+from .models import GoodsMovement, ItemCard
+from .stockbalance import suspendCardLedger
+
+logger = logging.getLogger(constants.LOGGERS.MODELS)
+
+# Cards per query, every card is up to three parameters of the query
+_BATCH_SIZE: int = 300
+
+# (stock ID, type ID, batch ID, status, price, is priced)
+CardKey = Tuple[int, int, int, str, Optional[int], Optional[bool]]
+
+
+class CardCompaction(NamedTuple):
+    """
+    The result of 'compactItemCards'.
+    """
+    cards_before: int
+    cards_after: int
+    merged_groups: int
+    repointed_movements: int
+
+    @property
+    def reduction(self) -> float:
+        """
+        The percentage of the removed cards.
+        """
+        if not self.cards_before:
+            return 0.0
+        return 100 * (self.cards_before - self.cards_after) / self.cards_before
+
+
+def _batches(items: list) -> List[list]:
+    return [items[i:i + _BATCH_SIZE] for i in range(0, len(items), _BATCH_SIZE)]
+
+
+def compactItemCards(requester: Union[HttpRequest, str],
+                     dry_run: bool = False) -> CardCompaction:
+    """
+    Merge the item cards of the same stock, type, batch, status and price
+    into their oldest card in one transaction. The movements of the merged
+    cards are moved to the oldest card before the merged cards are deleted,
+    the movements without a recorded quantity get the quantity of their card
+    first so they do not show the merged quantity.
+    The cards in transit are not merged, they are approved one by one.
+    Note: the merged card keeps the 'received_from' and 'receiving_date' of
+    the oldest card, those of the newer cards are dropped, their movements
+    still have the senders and the dates.
+
+    The stock balances do not change, so the quantities are changed with a
+    queryset update and the cards are deleted with the stock ledger
+    suspended, no inventory event is added.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+        dry_run (bool, optional): Only count the cards that would be merged.
+        Defaults to False.
+
+    Returns:
+        CardCompaction: The cards before and after and the merged groups
+    """
+    requester_name: str = ItemCard.getRequesterName(requester)
+    with transaction.atomic():
+        cards_before: int = ItemCard.objects.count()
+        groups: Dict[CardKey, List[Tuple[int, int]]] = {}
+        for id, stock_id, type_id, batch_id, status, price, is_priced, \
+                quantity in ItemCard.objects.select_for_update().filter(
+                    is_transforming=False).values_list(
+                    'id', 'stock_id', 'type_id', 'batch_id', 'status',
+                    'price', 'is_priced', 'quantity').order_by('id'):
+            groups.setdefault((stock_id, type_id, batch_id, status, price,
+                               bool(is_priced)), []).append((id, quantity))
+
+        # The oldest card of every group and its new quantity
+        totals: Dict[int, int] = {}
+        # The merged card and the card it is merged into
+        merged: Dict[int, int] = {}
+        for cards in groups.values():
+            if len(cards) < 2:
+                continue
+            oldest_id: int = cards[0][0]
+            totals[oldest_id] = sum(quantity for _, quantity in cards)
+            merged.update((id, oldest_id) for id, _ in cards[1:])
+        if dry_run or not merged:
+            return CardCompaction(cards_before, cards_before - len(merged),
+                                  len(totals), 0)
+
+        for batch in _batches(list(merged) + list(totals)):
+            GoodsMovement.objects.filter(
+                item_id__in=batch, quantity__isnull=True).auditedUpdate(
+                requester, quantity=Subquery(ItemCard.objects.filter(
+                    id=OuterRef('item_id')).values('quantity')[:1]))
+        repointed: int = 0
+        for batch in _batches(list(merged.items())):
+            repointed += GoodsMovement.objects.filter(
+                item_id__in=[id for id, _ in batch]).auditedUpdate(
+                requester, item_id=Case(
+                    *[When(item_id=id, then=Value(oldest_id))
+                      for id, oldest_id in batch],
+                    output_field=IntegerField()))
+        for batch in _batches(list(totals.items())):
+            ItemCard.objects.filter(id__in=[id for id, _ in batch]).update(
+                quantity=Case(*[When(id=id, then=Value(total))
+                                for id, total in batch],
+                              output_field=IntegerField()),
+                updated=timezone.now(), updated_by=requester_name)
+        # The merged quantity is still in the balance
+        with suspendCardLedger():
+            for batch in _batches(list(merged)):
+                ItemCard.objects.filter(id__in=batch).delete()
+        # The cards names are not changed, but the cached names of the
+        # deleted IDs must not stay
+        invalidateLabels()
+    logger.info(f"Database change in [ItemCard] model {len(merged)} objects "
+                + f"merged into {len(totals)} objects By: {requester_name}")
+    return CardCompaction(cards_before, cards_before - len(merged),
+                          len(totals), repointed)
@@ -0,0 +1,30 @@
+import logging
+
+from main import constants
+from . import compaction, inventory
+
+logger = logging.getLogger(constants.LOGGERS.MAIN)
+
+
+def snapshotInventory():
+    """
+    Compact the new inventory events into a snapshot, see
+    'warehouse_admin.inventory.takeInventorySnapshot'.
+    """
+    logger.info('=========== CRON START INVENTORY SNAPSHOT ===========')
+    snapshot = inventory.takeInventorySnapshot(constants.SYSTEM_CRON_NAME)
+    if snapshot is None:
+        logger.info('No new inventory events to snapshot')
+    logger.info('=========== CRON FINISH INVENTORY SNAPSHOT ===========')
+
+
+def compactItemCards():
+    """
+    Merge the fragmented item cards, see
+    'warehouse_admin.compaction.compactItemCards'.
+    """
+    logger.info('=========== CRON START ITEM CARDS COMPACTION ===========')
+    result = compaction.compactItemCards(constants.SYSTEM_CRON_NAME)
+    logger.info(f'Item cards dropped from {result.cards_before} to '
+                + f'{result.cards_after} ({result.reduction:.1f}% fewer)')
+    logger.info('=========== CRON FINISH ITEM CARDS COMPACTION ===========')
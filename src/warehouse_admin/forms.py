@@ -1,7 +1,8 @@
 from django import forms
-from django.forms import ModelForm
-from distributor.models import Distributor
-from .models import Batch, ItemCard, ItemType, RetailItem
+from django.forms import ModelForm, formset_factory
+from main import constants
+from .choices import getDestinationChoices, getRetailTypeChoices, getStockChoices
+from .models import Batch, ItemCard, ItemType, RetailItem, StockBalance
 
 
 class DateInput(forms.DateInput):
@@ -164,20 +165,13 @@ class SendGoodsForm(ModelForm):
 
     def __init__(self, pk=1, *args, **kwargs):
         super(SendGoodsForm, self).__init__(*args, **kwargs)
-        items, batches, dis, status = [], [], [], [
+        # The choices values are the IDs, the destinations are the stocks IDs
+        status = [
             ('Good', 'Good'),
             ('Damaged', 'Damaged')]
-        if pk != 1:
-            dis.append(('Main Storage', 'Main Storage'))
-        for i in Distributor.objects.all():
-            if i.stock.id != int(pk):
-                dis.append((f'{i.person.name}', f'{i.person.name}'))
-        stock = ItemCard.objects.filter(stock=pk)
-        for i in stock:
-            if (f'{i.type}', f'{i.type}') not in items:
-                items.append((f'{i.type}', f'{i.type}'))
-            if (f'{i.batch}', f'{i.batch}') not in batches:
-                batches.append((f'{i.batch}', f'{i.batch}'))
+        dis = getDestinationChoices(pk)
+        choices = getStockChoices(pk)
+        items, batches = choices.types, choices.batches
         widget = forms.Select(
             attrs={'required': True,
                    'class': 'form-control'
@@ -190,8 +184,9 @@ class SendGoodsForm(ModelForm):
         self.fields['batch'] = forms.ChoiceField(
             choices=batches, widget=widget)
         self.fields['status'] = forms.ChoiceField(
-            choices=status, widget=widget2)
-        self.fields['send_to'] = forms.ChoiceField(choices=dis, widget=widget2)
+            choices=status, widget=widget2, required=False)
+        self.fields['send_to'] = forms.ChoiceField(
+            choices=dis, widget=widget2, required=False)
 
     class Meta:
         model = ItemCard
@@ -209,17 +204,59 @@ class SendGoodsForm(ModelForm):
         }
 
 
+def getDispatchChoices(stock_id: int) -> dict:
+    """
+    The type and batch choices of the dispatch lines, read once for all the
+    lines from the available balances of the stock.
+
+    Args:
+        stock_id (int): The source stock ID
+
+    Returns:
+        dict: The 'form_kwargs' of 'DispatchGoodsFormSet'
+    """
+    balances = StockBalance.objects.filter(
+        stock_id=stock_id, status='Good', quantity__gt=0)
+    empty = [('', '---------')]
+    return {
+        'types': empty + list(balances.values_list('type_id', 'type__name')
+                              .distinct().order_by('type__name')),
+        'batches': empty + list(balances.values_list('batch_id', 'batch__name')
+                                .distinct().order_by('batch__name')),
+    }
+
+
+class DispatchLineForm(forms.Form):
+
+    def __init__(self, *args, types=(), batches=(), **kwargs):
+        super(DispatchLineForm, self).__init__(*args, **kwargs)
+        # Not required in the browser, the empty lines are skipped
+        widget = forms.Select(
+            attrs={'class': 'form-control'
+                   })
+        self.fields['type'] = forms.TypedChoiceField(
+            choices=types, coerce=int, widget=widget)
+        self.fields['batch'] = forms.TypedChoiceField(
+            choices=batches, coerce=int, widget=widget)
+        self.fields['quantity'] = forms.IntegerField(
+            min_value=1, widget=forms.NumberInput(
+                attrs={'class': 'form-control',
+                       'placeholder': 'Quantity'
+                       }))
+
+
+# The empty extra lines are ignored
+DispatchGoodsFormSet = formset_factory(DispatchLineForm, extra=10,
+                                       max_num=100, validate_max=True)
+
+
 class ConvertToRetailForm(ModelForm):
 
     def __init__(self, *args, **kwargs):
         super(ConvertToRetailForm, self).__init__(*args, **kwargs)
-        items, batches = [], []
-        stock = ItemCard.objects.filter(stock=1)
-        for i in stock:
-            if not i.type.is_retail and (f'{i.type}', f'{i.type}') not in items:
-                items.append((f'{i.type}', f'{i.type}'))
-            if (f'{i.batch}', f'{i.batch}') not in batches:
-                batches.append((f'{i.batch}', f'{i.batch}'))
+        # The choices values are the IDs
+        choices = getStockChoices(constants.MAIN_STORAGE_ID)
+        items, batches = choices.nonRetailTypes, choices.batches
         widget = forms.Select(
             attrs={'required': True,
                    'class': 'form-control'
@@ -249,10 +286,7 @@ class AddRetailGoodsForm(ModelForm):
     def __init__(self, *args, **kwargs):
         super(AddRetailGoodsForm, self).__init__(*args, **kwargs)
 
-        types = []
-        ItemTypes = ItemType.objects.filter(is_retail=True)
-        for i in ItemTypes:
-            types.append((f'{i}', f'{i}'))
+        types = getRetailTypeChoices()
 
         widget = forms.Select(
             attrs={'required': True,
@@ -274,3 +308,24 @@ class AddRetailGoodsForm(ModelForm):
                 }
             ),
         }
+
+
+class GoodsMovementFilterForm(forms.Form):
+
+    def __init__(self, *args, **kwargs):
+        super(GoodsMovementFilterForm, self).__init__(*args, **kwargs)
+        # The senders and receivers are the stocks owners names, no stock has
+        # the ID 0 so all the owners are listed
+        owners = [('', 'All')] + [(name, name) for _, name in
+                                  getDestinationChoices(0)]
+        widget = forms.Select(
+            attrs={'class': 'form-control'
+                   })
+        self.fields['date_from'] = forms.DateField(
+            required=False, widget=DateInput(attrs={'class': 'form-control'}))
+        self.fields['date_to'] = forms.DateField(
+            required=False, widget=DateInput(attrs={'class': 'form-control'}))
+        self.fields['sender'] = forms.ChoiceField(
+            choices=owners, required=False, widget=widget)
+        self.fields['receiver'] = forms.ChoiceField(
+            choices=owners, required=False, widget=widget)
@@ -0,0 +1,140 @@
+import datetime
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.query import QuerySet
+from django.http import HttpRequest
+from django.utils import timezone
+
+from main import constants
+from .models import InventoryEvent, InventorySnapshot, InventorySnapshotBalance
+from .stockbalance import BalanceKey
+
+logger = logging.getLogger(constants.LOGGERS.MODELS)
+
+_KEY_FIELDS: Tuple[str, ...] = ('stock', 'type', 'batch', 'status')
+
+
+def _toDateTime(when: Union[datetime.date, datetime.datetime]) -> datetime.datetime:
+    # A date is the end of the day, e.g. the month end stock count
+    if isinstance(when, datetime.datetime):
+        return when
+    return datetime.datetime.combine(when, datetime.time.max)
+
+
+def _sumEvents(events: QuerySet,
+               balances: Dict[BalanceKey, Tuple[int, int]]) -> None:
+    for total in events.values(*_KEY_FIELDS).annotate(
+            total=Sum('quantity'), total_in_transit=Sum('in_transit')).order_by():
+        key: BalanceKey = (total['stock'], total['type'], total['batch'],
+                           total['status'])
+        quantity, in_transit = balances.get(key, (0, 0))
+        balances[key] = (quantity + total['total'],
+                         in_transit + total['total_in_transit'])
+
+
+def _getSnapshotBalances(snapshot: InventorySnapshot,
+                         stock_id: Optional[int] = None
+                         ) -> Dict[BalanceKey, Tuple[int, int]]:
+    lines: QuerySet = InventorySnapshotBalance.objects.filter(snapshot=snapshot)
+    if stock_id is not None:
+        lines = lines.filter(stock_id=stock_id)
+    return {(line['stock'], line['type'], line['batch'], line['status']):
+            (line['quantity'], line['in_transit'])
+            for line in lines.values(*_KEY_FIELDS, 'quantity', 'in_transit')}
+
+
+def getLastSnapshot(when: Optional[datetime.datetime] = None
+                    ) -> Optional[InventorySnapshot]:
+    """
+    Get the last snapshot taken before the time, or the last snapshot.
+    """
+    snapshots: QuerySet = InventorySnapshot.objects.all()
+    if when is not None:
+        snapshots = snapshots.filter(time__lte=when)
+    return snapshots.order_by('-event_id').first()
+
+
+def getBalancesAt(when: Union[datetime.date, datetime.datetime],
+                  stock_id: Optional[int] = None
+                  ) -> Dict[BalanceKey, Tuple[int, int]]:
+    """
+    Get the stock balances at a point in time: the balances of the last
+    snapshot before it, plus the inventory events after the snapshot up to
+    the time.
+
+    Args:
+        when (date | datetime): The time, a date is the end of the day
+        stock_id (int, optional): Only the balances of this stock.
+        Defaults to all the stocks.
+
+    Returns:
+        dict: The non empty (quantity, in transit) of every balance key
+    """
+    when = _toDateTime(when)
+    snapshot: Optional[InventorySnapshot] = getLastSnapshot(when)
+    balances: Dict[BalanceKey, Tuple[int, int]] = {}
+    events: QuerySet = InventoryEvent.objects.filter(time__lte=when)
+    if snapshot is not None:
+        balances = _getSnapshotBalances(snapshot, stock_id)
+        events = events.filter(id__gt=snapshot.event_id)
+    if stock_id is not None:
+        events = events.filter(stock_id=stock_id)
+    _sumEvents(events, balances)
+    return {key: balance for key, balance in balances.items()
+            if balance != (0, 0)}
+
+
+def takeInventorySnapshot(requester: Union[HttpRequest, str]
+                          ) -> Optional[InventorySnapshot]:
+    """
+    Compact the inventory events into a new snapshot: the last snapshot plus
+    the events after it. The events of the last 'INVENTORY_SNAPSHOT_DELAY'
+    seconds are left to the next snapshot, so no event of a transaction that
+    is still open can be skipped.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+
+    Returns:
+        InventorySnapshot: The new snapshot, None if there are no new events
+    """
+    delay: int = getattr(settings, 'INVENTORY_SNAPSHOT_DELAY', 60 * 60)
+    last: Optional[InventorySnapshot] = getLastSnapshot()
+    events: QuerySet = InventoryEvent.objects.filter(
+        time__lte=timezone.now() - datetime.timedelta(seconds=delay))
+    if last is not None:
+        events = events.filter(id__gt=last.event_id)
+    event_id: Optional[int] = events.aggregate(event_id=Max('id'))['event_id']
+    if event_id is None:
+        return None
+    # The snapshot has all the events up to the ID, its time is the time of
+    # the latest of them so the point in time balances before it replay
+    # the events from an older snapshot
+    compacted: QuerySet = InventoryEvent.objects.filter(
+        id__gt=last.event_id if last is not None else 0, id__lte=event_id)
+    time: datetime.datetime = compacted.aggregate(time=Max('time'))['time']
+    if last is not None:
+        time = max(time, last.time)
+
+    balances: Dict[BalanceKey, Tuple[int, int]] = \
+        _getSnapshotBalances(last) if last is not None else {}
+    _sumEvents(compacted, balances)
+
+    with transaction.atomic():
+        snapshot: InventorySnapshot = InventorySnapshot.create(
+            requester, time=time, event_id=event_id)
+        lines: List[InventorySnapshotBalance] = InventorySnapshotBalance.bulkCreate(
+            requester, [InventorySnapshotBalance(
+                snapshot=snapshot, stock_id=stock_id, type_id=type_id,
+                batch_id=batch_id, status=status, quantity=quantity,
+                in_transit=in_transit)
+                for (stock_id, type_id, batch_id, status), (quantity, in_transit)
+                in balances.items() if (quantity, in_transit) != (0, 0)],
+            batch_size=1000)
+    logger.info(f"Inventory snapshot of {len(lines)} balances taken up to "
+                + f"the event {snapshot.event_id}")
+    return snapshot
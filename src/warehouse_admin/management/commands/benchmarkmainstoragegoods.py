@@ -0,0 +1,96 @@
+import time
+
+from django.contrib.auth.signals import user_logged_in
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from human_resources.models import Employee
+from main import constants
+from main.audit import getAuditSink
+from main.models import Person
+from main.onboarding import setOnboardingState
+from main.signals import userLoggedIn
+from warehouse_admin.models import Batch, ItemCard, ItemType, Stock
+from warehouse_admin.stockbalance import rebuildStockBalances
+
+SIZES: tuple = (100, 10000, 100000)
+TYPES: int = 50
+BATCHES: int = 20
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the main storage goods page with 100, 10k and 100k "
+            + "item cards. It runs on a throwaway test database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Requests timed for every size.")
+
+    def handle(self, *args, **options):
+        repeat: int = options['repeat']
+        setup_test_environment()
+        old_name: str = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            client: Client = self.getClient()
+            url: str = reverse(constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '')
+                               + ':' + constants.PAGES.MAIN_STORAGE_GOODS_PAGE)
+            self.stdout.write(f"{'CARDS':>8}{'QUERIES':>10}{'AVERAGE (ms)':>16}")
+            for size in SIZES:
+                self.addItemCards(size)
+                # Warm up the caches of the request
+                client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    start: float = time.perf_counter()
+                    for _ in range(repeat):
+                        response = client.get(url)
+                    average: float = (time.perf_counter() - start) / repeat
+                # Save the queued audit entries before the timer thread does
+                getAuditSink().flush()
+                if response.status_code != 200:
+                    self.stderr.write(f"Unexpected status {response.status_code}")
+                executed: str = str(len(queries) // repeat)
+                if len(queries) >= connection.queries_limit:
+                    # Older queries were dropped from the log
+                    executed = f'> {connection.queries_limit // repeat}'
+                self.stdout.write(f"{size:>8}{executed:>10}"
+                                  + f"{average * 1000:>16.2f}")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def getClient(self) -> Client:
+        person: Person = Person.objects.create(name='Benchmark Admin')
+        Employee.objects.create(person=person,
+                                position=constants.ROLES.WAREHOUSE_ADMIN)
+        user = Employee.objects.get(person=person).account
+        setOnboardingState(user, False)
+        client = Client()
+        # The test client login request has no IP address to audit
+        user_logged_in.disconnect(userLoggedIn)
+        try:
+            client.force_login(user)
+        finally:
+            user_logged_in.connect(userLoggedIn)
+        return client
+
+    def addItemCards(self, size: int) -> None:
+        if not ItemType.objects.exists():
+            ItemType.bulkCreate(constants.SYSTEM_NAME, [
+                ItemType(name=f'Type {i}') for i in range(TYPES)])
+            Batch.bulkCreate(constants.SYSTEM_NAME, [
+                Batch(name=f'Batch {i}') for i in range(BATCHES)])
+        types: list = list(ItemType.objects.all())
+        batches: list = list(Batch.objects.all())
+        stock: Stock = Stock.objects.get(id=constants.MAIN_STORAGE_ID)
+        count: int = ItemCard.objects.count()
+        ItemCard.bulkCreate(constants.SYSTEM_NAME, [
+            ItemCard(type=types[i % TYPES], batch=batches[i % BATCHES],
+                     stock=stock, quantity=1 + i % 7)
+            for i in range(count, size)], batch_size=1000)
+        # 'bulkCreate' does not send the signals that keep the balances
+        rebuildStockBalances(constants.SYSTEM_NAME)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from main import constants
+from warehouse_admin.compaction import CardCompaction, compactItemCards
+
+
+class Command(BaseCommand):
+    help = ("Merge the item cards of the same stock, type, batch, status and "
+            + "price into their oldest card and report the removed cards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report the cards that would be merged.")
+
+    def handle(self, *args, **options):
+        result: CardCompaction = compactItemCards(constants.SYSTEM_NAME,
+                                                  options['dry_run'])
+        if result.cards_before == result.cards_after:
+            self.stdout.write("There are no item cards to merge")
+            return
+        message: str = (f"{result.cards_before - result.cards_after} cards "
+                        + f"merged into {result.merged_groups} cards, the item "
+                        + f"cards {'would drop' if options['dry_run'] else 'dropped'}"
+                        + f" from {result.cards_before} to {result.cards_after}"
+                        + f" ({result.reduction:.1f}% fewer)")
+        if options['dry_run']:
+            self.stdout.write(message)
+            return
+        self.stdout.write(self.style.SUCCESS(
+            message + f", {result.repointed_movements} goods movements "
+            + "moved to the merged cards"))
@@ -0,0 +1,38 @@
+import datetime
+from typing import Dict, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import constants
+from warehouse_admin.inventory import getBalancesAt, takeInventorySnapshot
+from warehouse_admin.stockbalance import BalanceKey
+
+
+class Command(BaseCommand):
+    help = ("Print the stock balances at a date from the inventory history, "
+            + "e.g. the month end stock count.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('date', help="The date (YYYY-MM-DD), the balances "
+                            + "are at the end of the day.")
+        parser.add_argument('--stock', type=int,
+                            help="Only the balances of this stock ID.")
+        parser.add_argument('--snapshot', action='store_true',
+                            help="Take a new snapshot of the history first.")
+
+    def handle(self, *args, **options):
+        try:
+            date: datetime.date = datetime.date.fromisoformat(options['date'])
+        except ValueError:
+            raise CommandError(f"Invalid date: {options['date']}")
+        if options['snapshot']:
+            takeInventorySnapshot(constants.SYSTEM_NAME)
+        balances: Dict[BalanceKey, Tuple[int, int]] = getBalancesAt(
+            date, options['stock'])
+        self.stdout.write(f"{'STOCK':>6}{'TYPE':>6}{'BATCH':>6}  {'STATUS':<8}"
+                          + f"{'QUANTITY':>10}{'IN TRANSIT':>12}")
+        for (stock_id, type_id, batch_id, status), (quantity, in_transit) \
+                in sorted(balances.items(), key=lambda item: str(item[0])):
+            self.stdout.write(f"{stock_id:>6}{type_id:>6}{batch_id:>6}  "
+                              + f"{status:<8}{quantity:>10}{in_transit:>12}")
+        self.stdout.write(f"{len(balances)} stock balances at the end of {date}")
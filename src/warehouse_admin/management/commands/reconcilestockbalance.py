@@ -0,0 +1,37 @@
+from typing import List
+
+from django.core.management.base import BaseCommand
+
+from main import constants
+from warehouse_admin.stockbalance import (BalanceDrift, getStockBalanceDrift,
+                                          rebuildStockBalances)
+
+
+class Command(BaseCommand):
+    help = ("Compare the stock balances with the item cards, report the drift "
+            + "and rebuild the balances from the cards.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Only report the drift, do not rebuild.")
+
+    def handle(self, *args, **options):
+        drift: List[BalanceDrift] = getStockBalanceDrift()
+        if not drift:
+            self.stdout.write("The stock balances match the item cards")
+            return
+        self.stdout.write(f"{'STOCK':>6}{'TYPE':>6}{'BATCH':>6}  {'STATUS':<8}"
+                          + f"{'BALANCE':>16}{'CARDS':>16}")
+        for balance in drift:
+            stock_id, type_id, batch_id, status = balance.key
+            self.stdout.write(f"{stock_id:>6}{type_id:>6}{batch_id:>6}  "
+                              + f"{status:<8}"
+                              + f"{'%d (%d)' % balance.balance:>16}"
+                              + f"{'%d (%d)' % balance.cards:>16}")
+        self.stdout.write(f"{len(drift)} stock balances drifted, the "
+                          + "quantities in transit are in brackets")
+        if options['check']:
+            return
+        created: int = rebuildStockBalances(constants.SYSTEM_NAME)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {created} stock balances from the item cards"))
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.1 on 2026-10-18 03:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def buildStockBalances(apps, schema_editor):
+    # Sum the existing item cards of every (stock, type, batch, status)
+    ItemCard = apps.get_model('warehouse_admin', 'ItemCard')
+    StockBalance = apps.get_model('warehouse_admin', 'StockBalance')
+    totals = ItemCard.objects.values('stock', 'type', 'batch', 'status').annotate(
+        total=models.Sum('quantity'),
+        in_transit=models.Sum(models.Case(
+            models.When(is_transforming=True, then=models.F('quantity')),
+            default=models.Value(0)))).order_by()
+    StockBalance.objects.bulk_create([
+        StockBalance(stock_id=total['stock'], type_id=total['type'],
+                     batch_id=total['batch'], status=total['status'],
+                     quantity=total['total'] or 0,
+                     in_transit=total['in_transit'] or 0,
+                     created_by='System', updated_by='System')
+        for total in totals])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_admin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('updated_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('Good', 'Good'), ('Damaged', 'Damaged'), ('Frozen', 'Frozen')], default='Good', max_length=10)),
+                ('quantity', models.IntegerField(default=0)),
+                ('in_transit', models.IntegerField(default=0)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='warehouse_admin.batch')),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='warehouse_admin.stock')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='warehouse_admin.itemtype')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stockbalance',
+            constraint=models.UniqueConstraint(fields=('stock', 'type', 'batch', 'status'), name='unique_stock_balance'),
+        ),
+        migrations.RunPython(buildStockBalances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_admin', '0002_stockbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goodsmovement',
+            name='quantity',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
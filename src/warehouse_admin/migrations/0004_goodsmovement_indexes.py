@@ -0,0 +1,25 @@
+# Generated by Django 4.1.1 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_admin', '0003_goodsmovement_quantity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goodsmovement',
+            index=models.Index(fields=['-date', '-id'], name='goods_movement_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='goodsmovement',
+            index=models.Index(fields=['sender', '-date', '-id'], name='goods_movement_sender_date'),
+        ),
+        migrations.AddIndex(
+            model_name='goodsmovement',
+            index=models.Index(fields=['receiver', '-date', '-id'], name='goods_movement_receiver_date'),
+        ),
+    ]
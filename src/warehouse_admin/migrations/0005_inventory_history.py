@@ -0,0 +1,92 @@
+# Generated by Django 4.1.1 on 2026-10-18 03:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def openInventoryHistory(apps, schema_editor):
+    # The history starts with the current stock balances
+    StockBalance = apps.get_model('warehouse_admin', 'StockBalance')
+    InventoryEvent = apps.get_model('warehouse_admin', 'InventoryEvent')
+    InventoryEvent.objects.bulk_create([
+        InventoryEvent(stock_id=balance.stock_id, type_id=balance.type_id,
+                       batch_id=balance.batch_id, status=balance.status,
+                       quantity=balance.quantity, in_transit=balance.in_transit,
+                       reason='Opening', created_by='System',
+                       updated_by='System')
+        for balance in StockBalance.objects.exclude(quantity=0, in_transit=0)],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_admin', '0004_goodsmovement_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('updated_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('time', models.DateTimeField(db_index=True)),
+                ('event_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshotBalance',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('updated_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('Good', 'Good'), ('Damaged', 'Damaged'), ('Frozen', 'Frozen')], max_length=10)),
+                ('quantity', models.IntegerField(default=0)),
+                ('in_transit', models.IntegerField(default=0)),
+                ('batch', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouse_admin.batch')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='warehouse_admin.inventorysnapshot')),
+                ('stock', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouse_admin.stock')),
+                ('type', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouse_admin.itemtype')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryEvent',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('updated_by', models.CharField(blank=True, max_length=50, null=True)),
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('Good', 'Good'), ('Damaged', 'Damaged'), ('Frozen', 'Frozen')], max_length=10)),
+                ('quantity', models.IntegerField(default=0)),
+                ('in_transit', models.IntegerField(default=0)),
+                ('reason', models.CharField(choices=[('Opening', 'Opening'), ('Saved', 'Saved'), ('Deleted', 'Deleted'), ('Reconciled', 'Reconciled')], max_length=10)),
+                ('card_id', models.IntegerField(blank=True, null=True)),
+                ('batch', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouse_admin.batch')),
+                ('stock', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouse_admin.stock')),
+                ('type', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='warehouse_admin.itemtype')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='inventoryevent',
+            index=models.Index(fields=['time'], name='inventory_event_time'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryevent',
+            index=models.Index(fields=['stock', 'time'], name='inventory_event_stock_time'),
+        ),
+        migrations.RunPython(openInventoryHistory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-18 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_admin', '0005_inventory_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryevent',
+            name='reason',
+            field=models.CharField(choices=[('Opening', 'Opening'), ('Saved', 'Saved'), ('Deleted', 'Deleted'), ('Approved', 'Approved'), ('Reconciled', 'Reconciled')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.1 on 2026-10-18 09:40
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfillMovementsQuantity(apps, schema_editor):
+    # The movements before the quantity was recorded get the quantity of
+    # their card, it changes when the card is merged or changed
+    GoodsMovement = apps.get_model('warehouse_admin', 'GoodsMovement')
+    ItemCard = apps.get_model('warehouse_admin', 'ItemCard')
+    GoodsMovement.objects.filter(quantity__isnull=True).update(
+        quantity=Subquery(ItemCard.objects.filter(
+            id=OuterRef('item_id')).values('quantity')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse_admin', '0006_inventoryevent_approved'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfillMovementsQuantity, migrations.RunPython.noop),
+    ]
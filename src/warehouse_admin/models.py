@@ -1,5 +1,9 @@
-from django.db import models
+from typing import Dict, Iterable
+
+from django.db import models, transaction
+from django.utils import timezone
 from main import constants
+from main.labels import getLabel
 from main.models import BaseModel
 
 
@@ -32,20 +36,23 @@ class Stock(BaseModel):
 
     id = models.AutoField(primary_key=True)
 
-    def __str__(self):
-        stock: str = ''
-        if self.id == constants.MAIN_STORAGE_ID:
-            stock = 'Main Storage Stock'
-        else:
-            try:
-                from distributor.models import Distributor
-                distributor = Distributor.get(stock=self.id)
-                person = distributor.person
-                distributor_first_name = person.name.split(' ')[0]
-                stock = distributor_first_name + "'s Stock"
-            except Distributor.DoesNotExist:
-                return super().__str__()
-        return stock
+    def __str__(self) -> str:
+        return getLabel(self)
+
+    @classmethod
+    def getLabels(cls, ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Get the display names of the stocks with one query.
+        """
+        from distributor.models import Distributor
+        labels: Dict[int, str] = {}
+        if constants.MAIN_STORAGE_ID in ids:
+            labels[constants.MAIN_STORAGE_ID] = 'Main Storage Stock'
+        for stock_id, name in Distributor.objects.filter(
+                stock_id__in=ids, person__isnull=False).values_list(
+                'stock_id', 'person__name'):
+            labels[stock_id] = name.split(' ')[0] + "'s Stock"
+        return labels
 
 
 class ItemCard(BaseModel):
@@ -69,7 +76,22 @@ class ItemCard(BaseModel):
     is_priced = models.BooleanField(default=False, null=True, blank=True)
 
     def __str__(self) -> str:
-        return f'{self.type.name}-{self.batch.name}'
+        return getLabel(self)
+
+    @classmethod
+    def getLabels(cls, ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Get the display names of the cards with one query.
+        """
+        return {id: f'{type_name}-{batch_name}' for id, type_name, batch_name
+                in cls.objects.filter(id__in=ids).values_list(
+                    'id', 'type__name', 'batch__name')}
+
+    def save(self, *args, **kwargs) -> None:
+        # The stock balance is changed by the 'post_save' signal, in the same
+        # transaction of the card
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     # def __add__(self, other_quantity) -> int:
     #     return ItemCard(self.quantity + other_quantity)
@@ -91,6 +113,106 @@ class ItemCard(BaseModel):
         return self.price.price * self.quantity
 
 
+class StockBalance(BaseModel):
+    """
+    The total quantity of the item cards of every (stock, type, batch, status),
+    changed by the 'ItemCard' signals in the transaction of every card change.
+    'in_transit' is the quantity of the cards that are still transforming.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stock', 'type', 'batch', 'status'],
+                                    name='unique_stock_balance'),
+        ]
+
+    id = models.AutoField(primary_key=True)
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE)
+    type = models.ForeignKey(ItemType, on_delete=models.CASCADE)
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, default='Good',
+                              choices=ItemCard.STATUS)
+    quantity = models.IntegerField(default=0)
+    in_transit = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.type.name}-{self.batch.name}-{self.status}'
+
+
+def _historyKey(model) -> models.ForeignKey:
+    # The history keeps the IDs of the deleted stocks, types and batches
+    return models.ForeignKey(model, on_delete=models.DO_NOTHING,
+                             db_constraint=False, related_name='+')
+
+
+class InventoryEvent(BaseModel):
+    """
+    An append-only change of a stock balance, written with the balance change
+    in the same transaction. The sum of the events of a (stock, type, batch,
+    status) up to a time is its balance at that time.
+    """
+
+    REASON = (
+        ('Opening', 'Opening'),
+        ('Saved', 'Saved'),
+        ('Deleted', 'Deleted'),
+        ('Approved', 'Approved'),
+        ('Reconciled', 'Reconciled'),
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['time'], name='inventory_event_time'),
+            models.Index(fields=['stock', 'time'],
+                         name='inventory_event_stock_time'),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    time = models.DateTimeField(default=timezone.now)
+    stock = _historyKey(Stock)
+    type = _historyKey(ItemType)
+    batch = _historyKey(Batch)
+    status = models.CharField(max_length=10, choices=ItemCard.STATUS)
+    quantity = models.IntegerField(default=0)
+    in_transit = models.IntegerField(default=0)
+    reason = models.CharField(max_length=10, choices=REASON)
+    # The changed card, it may be deleted
+    card_id = models.IntegerField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f'{self.time} - {self.reason} - {self.quantity}'
+
+
+class InventorySnapshot(BaseModel):
+    """
+    The stock balances after all the inventory events up to 'event_id',
+    the point in time balances replay only the events after it.
+    """
+
+    id = models.AutoField(primary_key=True)
+    # The time of the last included event
+    time = models.DateTimeField(db_index=True)
+    event_id = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.time}'
+
+
+class InventorySnapshotBalance(BaseModel):
+
+    id = models.BigAutoField(primary_key=True)
+    snapshot = models.ForeignKey(InventorySnapshot, on_delete=models.CASCADE)
+    stock = _historyKey(Stock)
+    type = _historyKey(ItemType)
+    batch = _historyKey(Batch)
+    status = models.CharField(max_length=10, choices=ItemCard.STATUS)
+    quantity = models.IntegerField(default=0)
+    in_transit = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.snapshot} - {self.quantity}'
+
+
 class RetailCard(BaseModel):
 
     id = models.AutoField(primary_key=True)
@@ -117,6 +239,20 @@ class GoodsMovement(BaseModel):
 
     id = models.AutoField(primary_key=True)
     item = models.ForeignKey(ItemCard, on_delete=models.CASCADE)
+    # The sent quantity, the card quantity may change after the movement
+    quantity = models.IntegerField(null=True, blank=True)
     sender = models.CharField(max_length=50, null=True, blank=True)
     receiver = models.CharField(max_length=50)
     date = models.DateField(auto_now_add=True)
+
+    class Meta:
+        # The movements page is read by (date, id) pages, optionally of a
+        # sender or a receiver
+        indexes = [
+            models.Index(fields=['-date', '-id'],
+                         name='goods_movement_date_id'),
+            models.Index(fields=['sender', '-date', '-id'],
+                         name='goods_movement_sender_date'),
+            models.Index(fields=['receiver', '-date', '-id'],
+                         name='goods_movement_receiver_date'),
+        ]
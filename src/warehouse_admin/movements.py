@@ -0,0 +1,117 @@
+import csv
+import datetime
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from main import constants
+from .models import GoodsMovement
+
+CSV_HEADER: Tuple[str, ...] = ('ID', 'ITEM', 'BATCH', 'QUANTITY', 'SENDER',
+                               'RECEIVER', 'DATE')
+
+
+class MovementsPage(NamedTuple):
+    """
+    One page of the goods movements, the newest first.
+    """
+    movements: List[GoodsMovement]
+    # The cursor of the next page, None on the last page
+    next_cursor: Optional[str]
+
+
+class _Echo:
+    """
+    The file of 'csv.writer' that returns the written line instead of
+    keeping it.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def filterMovements(date_from: Optional[datetime.date] = None,
+                    date_to: Optional[datetime.date] = None,
+                    sender: Optional[str] = None,
+                    receiver: Optional[str] = None) -> QuerySet:
+    """
+    Get the goods movements between the dates and of the sender and receiver,
+    the newest first. The empty filters are ignored.
+
+    Returns:
+        QuerySet: The movements ordered by the date and the ID
+    """
+    movements: QuerySet = GoodsMovement.objects.all()
+    if date_from:
+        movements = movements.filter(date__gte=date_from)
+    if date_to:
+        movements = movements.filter(date__lte=date_to)
+    if sender:
+        movements = movements.filter(sender=sender)
+    if receiver:
+        movements = movements.filter(receiver=receiver)
+    return movements.order_by('-date', '-id')
+
+
+def _parseCursor(cursor: Optional[str]) -> Optional[Tuple[datetime.date, int]]:
+    try:
+        date, id = cursor.split('.')
+        return datetime.date.fromisoformat(date), int(id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def getMovementsPage(movements: QuerySet, cursor: Optional[str] = None,
+                     size: int = constants.ROWS_PER_PAGE) -> MovementsPage:
+    """
+    Get the page of the movements after the cursor. The page is found with
+    the (date, id) index instead of counting the skipped rows, so every page
+    costs the same however deep it is.
+
+    Args:
+        movements (QuerySet): The movements ordered by '-date' and '-id'
+        cursor (str, optional): The 'next_cursor' of the previous page.
+        Defaults to the first page.
+        size (int, optional): The movements of the page.
+        Defaults to 'ROWS_PER_PAGE'.
+
+    Returns:
+        MovementsPage: The movements and the cursor of the next page
+    """
+    after = _parseCursor(cursor)
+    if after is not None:
+        date, id = after
+        movements = movements.filter(Q(date__lt=date) | Q(date=date, id__lt=id))
+    page: List[GoodsMovement] = list(movements.select_related(
+        'item__type', 'item__batch')[:size + 1])
+    next_cursor: Optional[str] = None
+    if len(page) > size:
+        page = page[:size]
+        next_cursor = f'{page[-1].date.isoformat()}.{page[-1].id}'
+    return MovementsPage(page, next_cursor)
+
+
+def iterMovementsCsv(movements: QuerySet) -> Iterator[str]:
+    """
+    Write the movements as CSV lines, the rows are read in chunks so the
+    whole table is never held in memory.
+
+    Args:
+        movements (QuerySet): The exported movements
+
+    Yields:
+        str: The CSV lines, the header first
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    rows = movements.values_list('id', 'item__type__name', 'item__batch__name',
+                                 'quantity', 'item__quantity', 'sender',
+                                 'receiver', 'date')
+    for id, type_name, batch_name, quantity, card_quantity, sender, receiver, \
+            date in rows.iterator(chunk_size=getattr(
+                settings, 'CSV_EXPORT_CHUNK_SIZE', 2000)):
+        # The movements before the quantity was recorded show the card quantity
+        yield writer.writerow((id, type_name, batch_name,
+                               card_quantity if quantity is None else quantity,
+                               sender, receiver, date.isoformat()))
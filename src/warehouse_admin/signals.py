@@ -1,4 +1,6 @@
-from .models import Stock
+from .choices import invalidateChoices, invalidateStockChoices
+from .models import ItemCard, Stock
+from .stockbalance import recordDeletedCard, recordSavedCard, recordSavingCard
 from main import constants
 
 
@@ -9,3 +11,46 @@ def onMigratingStockModel(**kwargs):
     if not Stock.objects.all().exists():
         Stock.objects.create(id=constants.MAIN_STORAGE_ID)
         print('  Main storage stock created')
+
+
+def onSavingItemCard(sender, instance: ItemCard, **kwargs):
+    """
+    Keep the stock balance of the card before it is changed.
+    """
+    recordSavingCard(instance)
+
+
+def onSavedItemCard(sender, instance: ItemCard, **kwargs):
+    """
+    Move the card quantity to its new stock balance.
+    """
+    recordSavedCard(instance)
+
+
+def onDeletedItemCard(sender, instance: ItemCard, **kwargs):
+    """
+    Subtract the card quantity from its stock balance.
+    """
+    recordDeletedCard(instance)
+
+
+def onChangedItemCard(sender, instance: ItemCard, created: bool = True, **kwargs):
+    """
+    Invalidate the cached choices of the card stocks when a card is added,
+    deleted or changed to another type, batch or stock.
+    """
+    old = getattr(instance, '_saved_stock_balance', None)
+    if not created and old is not None:
+        if old.key[:3] == (instance.stock_id, instance.type_id, instance.batch_id):
+            return
+        invalidateStockChoices(instance.stock_id, old.key[0])
+    else:
+        invalidateStockChoices(instance.stock_id)
+
+
+def onChangingChoicesNames(sender, **kwargs):
+    """
+    Invalidate all the cached choices when a type, batch, distributor or
+    person is changed, their names are the choices labels.
+    """
+    invalidateChoices()
@@ -0,0 +1,379 @@
+from contextlib import contextmanager
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.query import QuerySet
+from django.http import HttpRequest
+from django.utils import timezone
+
+from distributor.models import Distributor
+from main import constants
+from .models import InventoryEvent, ItemCard, StockBalance
+
+logger = logging.getLogger(constants.LOGGERS.MODELS)
+
+# (stock ID, type ID, batch ID, status)
+BalanceKey = Tuple[int, int, int, str]
+
+# The thread state of 'suspendCardLedger'
+_card_ledger = threading.local()
+
+
+class CardBalance(NamedTuple):
+    """
+    The part of the stock balance held by one item card.
+    """
+    key: BalanceKey
+    quantity: int
+    in_transit: int
+
+
+class BalanceDrift(NamedTuple):
+    """
+    A stock balance that does not match the item cards,
+    the quantities are (quantity, in transit).
+    """
+    key: BalanceKey
+    balance: Tuple[int, int]
+    cards: Tuple[int, int]
+
+
+def getCardBalance(card: ItemCard) -> CardBalance:
+    quantity: int = int(card.quantity or 0)
+    return CardBalance((card.stock_id, card.type_id, card.batch_id, card.status),
+                       quantity, quantity if card.is_transforming else 0)
+
+
+def _getSavedCardBalance(card: ItemCard) -> Optional[CardBalance]:
+    # The balance of the card as it is in the database, before the save
+    if card._state.adding:
+        return None
+    if hasattr(card, '_stock_balance'):
+        return card._stock_balance
+    loaded_values: dict = card.getLoadedValues()
+    fields: tuple = ('stock_id', 'type_id', 'batch_id', 'status',
+                     'quantity', 'is_transforming')
+    if all(field in loaded_values for field in fields):
+        values: dict = loaded_values
+    else:
+        values = ItemCard.objects.filter(id=card.id).values(*fields).first()
+        if values is None:
+            return None
+    return getCardBalance(ItemCard(**{field: values[field] for field in fields}))
+
+
+def _adjustStockBalance(key: BalanceKey, quantity: int, in_transit: int,
+                        reason: str, card_id: Optional[int] = None) -> None:
+    if not quantity and not in_transit:
+        return
+    stock_id, type_id, batch_id, status = key
+    balances: QuerySet = StockBalance.objects.filter(
+        stock_id=stock_id, type_id=type_id, batch_id=batch_id, status=status)
+    changes: dict = {'quantity': F('quantity') + quantity,
+                     'in_transit': F('in_transit') + in_transit,
+                     'updated': timezone.now(),
+                     'updated_by': constants.SYSTEM_NAME}
+    if not balances.update(**changes):
+        if quantity < 0:
+            logger.warning(f"There is no stock balance of {key} to subtract "
+                           + f"{-quantity} from, run 'reconcilestockbalance'")
+            return
+        try:
+            with transaction.atomic():
+                StockBalance.objects.create(
+                    stock_id=stock_id, type_id=type_id, batch_id=batch_id,
+                    status=status, quantity=quantity, in_transit=in_transit,
+                    created_by=constants.SYSTEM_NAME,
+                    updated_by=constants.SYSTEM_NAME)
+        except IntegrityError:
+            # Created by another transaction in the meantime
+            balances.update(**changes)
+    # Every balance change is kept in the inventory history
+    InventoryEvent.objects.create(
+        stock_id=stock_id, type_id=type_id, batch_id=batch_id, status=status,
+        quantity=quantity, in_transit=in_transit, reason=reason,
+        card_id=card_id, created_by=constants.SYSTEM_NAME,
+        updated_by=constants.SYSTEM_NAME)
+
+
+@contextmanager
+def suspendCardLedger() -> Iterator[None]:
+    """
+    Skip the stock balance changes of the 'ItemCard' signals inside the block,
+    for the card changes that keep the stock balances as they are (e.g. the
+    cards merged into another card of the same balance).
+    """
+    _card_ledger.is_suspended = True
+    try:
+        yield
+    finally:
+        _card_ledger.is_suspended = False
+
+
+def _isLedgerSuspended() -> bool:
+    return getattr(_card_ledger, 'is_suspended', False)
+
+
+def recordSavingCard(card: ItemCard) -> None:
+    """
+    Keep the balance of the card before it is saved.
+    Called by the 'pre_save' signal of 'ItemCard'.
+    """
+    if _isLedgerSuspended():
+        return
+    card._saved_stock_balance = _getSavedCardBalance(card)
+
+
+def recordSavedCard(card: ItemCard) -> None:
+    """
+    Move the quantity of the card from its old balance to the new one.
+    Called by the 'post_save' signal of 'ItemCard'.
+    """
+    if _isLedgerSuspended():
+        return
+    old: Optional[CardBalance] = getattr(card, '_saved_stock_balance', None)
+    new: CardBalance = getCardBalance(card)
+    if old is not None and old.key == new.key:
+        _adjustStockBalance(new.key, new.quantity - old.quantity,
+                            new.in_transit - old.in_transit, 'Saved', card.id)
+    else:
+        if old is not None:
+            _adjustStockBalance(old.key, -old.quantity, -old.in_transit,
+                                'Saved', card.id)
+        _adjustStockBalance(new.key, new.quantity, new.in_transit,
+                            'Saved', card.id)
+    card._stock_balance = new
+
+
+def recordDeletedCard(card: ItemCard) -> None:
+    """
+    Subtract the quantity of the card from its balance.
+    Called by the 'post_delete' signal of 'ItemCard'.
+    """
+    if _isLedgerSuspended():
+        return
+    balance: CardBalance = _getSavedCardBalance(card) or getCardBalance(card)
+    _adjustStockBalance(balance.key, -balance.quantity, -balance.in_transit,
+                        'Deleted', card.id)
+
+
+def recordApprovedCards(cards: Iterable[Tuple[BalanceKey, int]]) -> None:
+    """
+    Subtract the approved cards from the quantities in transit of their
+    balances. Called after the cards are approved with a queryset update,
+    which does not send the 'ItemCard' signals.
+
+    Args:
+        cards (Iterable): The balance key and the quantity of every card
+    """
+    totals: Dict[BalanceKey, int] = {}
+    for key, quantity in cards:
+        totals[key] = totals.get(key, 0) + int(quantity or 0)
+    for key, quantity in totals.items():
+        _adjustStockBalance(key, 0, -quantity, 'Approved')
+
+
+def getAvailableQuantity(stock_id: int, type_id: int, batch_id: int,
+                         status: Optional[str] = 'Good') -> int:
+    """
+    Get the quantity of a type and batch in the stock with one indexed lookup.
+
+    Args:
+        stock_id (int): The stock ID
+        type_id (int): The item type ID
+        batch_id (int): The batch ID
+        status (str, optional): The cards status. Defaults to 'Good'.
+
+    Returns:
+        int: The quantity, the transforming cards included
+    """
+    return StockBalance.objects.filter(
+        stock_id=stock_id, type_id=type_id, batch_id=batch_id,
+        status=status).values_list('quantity', flat=True).first() or 0
+
+
+def getStockBalances(stock_id: int, status: Optional[str] = 'Good') -> QuerySet:
+    """
+    Get the non empty balances of the stock.
+
+    Args:
+        stock_id (int): The stock ID
+        status (str, optional): The cards status. Defaults to 'Good'.
+
+    Returns:
+        QuerySet: The balances with their types and batches
+    """
+    return StockBalance.objects.filter(
+        stock_id=stock_id, status=status, quantity__gt=0).select_related(
+        'type', 'batch').order_by('type__name', 'batch__name')
+
+
+def getAvailableItems(stock_id: int, status: Optional[str] = 'Good') -> dict:
+    """
+    The available items listed in the transfer pages.
+
+    Args:
+        stock_id (int): The stock ID
+        status (str, optional): The cards status. Defaults to 'Good'.
+
+    Returns:
+        dict: The type, the batch and the quantity of every balance
+    """
+    return {balance.id: {'name': balance.type, 'batch': balance.batch,
+                         'quantity': balance.quantity}
+            for balance in getStockBalances(stock_id, status)}
+
+
+def getDistributorStockSummary() -> QuerySet:
+    """
+    Get all the distributors with their persons and the totals of their
+    stocks in one query. Every distributor is annotated with 'quantity',
+    'good', 'damaged', 'frozen' and 'in_transit'.
+
+    Returns:
+        QuerySet: The annotated distributors ordered by name
+    """
+    def total(field: str, **filters) -> Coalesce:
+        return Coalesce(Sum(f'stock__stockbalance__{field}',
+                            filter=Q(**filters) if filters else None), Value(0))
+
+    return Distributor.objects.filter(stock__isnull=False).select_related(
+        'person').annotate(
+        quantity=total('quantity'),
+        good=total('quantity', stock__stockbalance__status='Good'),
+        damaged=total('quantity', stock__stockbalance__status='Damaged'),
+        frozen=total('quantity', stock__stockbalance__status='Frozen'),
+        in_transit=total('in_transit')).order_by('person__name', 'id')
+
+
+def takeGoods(requester: Union[HttpRequest, str], stock_id: int, type_id: int,
+              batch_id: int, quantity: int,
+              status: Optional[str] = 'Good') -> Optional[ItemCard]:
+    """
+    Take the quantity from the cards of the stock, the oldest cards first.
+    The emptied cards are deleted. Nothing is taken if the balance is less
+    than the quantity.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+        stock_id (int): The stock ID
+        type_id (int): The item type ID
+        batch_id (int): The batch ID
+        quantity (int): The quantity to take
+        status (str, optional): The cards status. Defaults to 'Good'.
+
+    Returns:
+        ItemCard: The first taken card (it may be deleted), None if the
+        quantity is not available.
+    """
+    if quantity <= 0:
+        return None
+    with transaction.atomic():
+        available: Optional[int] = StockBalance.objects.select_for_update().filter(
+            stock_id=stock_id, type_id=type_id, batch_id=batch_id,
+            status=status).values_list('quantity', flat=True).first()
+        if available is None or available < quantity:
+            return None
+        cards: QuerySet = ItemCard.objects.select_for_update().filter(
+            stock_id=stock_id, type_id=type_id, batch_id=batch_id,
+            status=status).order_by('id')
+        first_card: Optional[ItemCard] = None
+        remaining: int = quantity
+        for card in cards:
+            first_card = first_card or card
+            if card.quantity <= remaining:
+                remaining -= card.quantity
+                card.delete(requester)
+            else:
+                card.quantity -= remaining
+                remaining = 0
+                card.setCreatedByUpdatedBy(requester)
+            if not remaining:
+                return first_card
+        # The balance is ahead of the cards
+        logger.error(f"The stock balance of {(stock_id, type_id, batch_id, status)}"
+                     + f" is {available} but the cards are {quantity - remaining}"
+                     + ", run 'reconcilestockbalance'")
+        transaction.set_rollback(True)
+        return None
+
+
+def getCardTotals() -> Dict[BalanceKey, Tuple[int, int]]:
+    """
+    Sum the item cards of every (stock, type, batch, status) in the database.
+
+    Returns:
+        dict: The (quantity, in transit) of every balance key
+    """
+    totals: QuerySet = ItemCard.objects.values(
+        'stock', 'type', 'batch', 'status').annotate(
+        total=Sum('quantity'),
+        in_transit=Sum(Case(When(is_transforming=True, then=F('quantity')),
+                            default=Value(0)))).order_by()
+    return {(total['stock'], total['type'], total['batch'], total['status']):
+            (total['total'] or 0, total['in_transit'] or 0) for total in totals}
+
+
+def getStockBalanceDrift() -> List[BalanceDrift]:
+    """
+    Compare the stock balances with the item cards.
+
+    Returns:
+        list: The balances that do not match the cards
+    """
+    cards: Dict[BalanceKey, Tuple[int, int]] = getCardTotals()
+    balances: Dict[BalanceKey, Tuple[int, int]] = {
+        (balance['stock'], balance['type'], balance['batch'], balance['status']):
+        (balance['quantity'], balance['in_transit'])
+        for balance in StockBalance.objects.values(
+            'stock', 'type', 'batch', 'status', 'quantity', 'in_transit')}
+    drift: List[BalanceDrift] = []
+    for key in sorted(cards.keys() | balances.keys(), key=str):
+        balance: Tuple[int, int] = balances.get(key, (0, 0))
+        card_totals: Tuple[int, int] = cards.get(key, (0, 0))
+        if balance != card_totals:
+            drift.append(BalanceDrift(key, balance, card_totals))
+    return drift
+
+
+def rebuildStockBalances(requester: Union[HttpRequest, str]) -> int:
+    """
+    Replace all the stock balances with the sums of the item cards, the
+    differences are kept in the inventory history as 'Reconciled' events.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+
+    Returns:
+        int: Number of the created balances
+    """
+    with transaction.atomic():
+        old: Dict[BalanceKey, Tuple[int, int]] = {
+            (balance['stock'], balance['type'], balance['batch'],
+             balance['status']): (balance['quantity'], balance['in_transit'])
+            for balance in StockBalance.objects.select_for_update().values(
+                'stock', 'type', 'batch', 'status', 'quantity', 'in_transit')}
+        totals: Dict[BalanceKey, Tuple[int, int]] = getCardTotals()
+        StockBalance.objects.all().delete()
+        created: list = StockBalance.bulkCreate(requester, [
+            StockBalance(stock_id=stock_id, type_id=type_id, batch_id=batch_id,
+                         status=status, quantity=quantity, in_transit=in_transit)
+            for (stock_id, type_id, batch_id, status), (quantity, in_transit)
+            in totals.items()])
+        events: List[InventoryEvent] = []
+        for key in old.keys() | totals.keys():
+            quantity, in_transit = totals.get(key, (0, 0))
+            old_quantity, old_in_transit = old.get(key, (0, 0))
+            if (quantity, in_transit) != (old_quantity, old_in_transit):
+                stock_id, type_id, batch_id, status = key
+                events.append(InventoryEvent(
+                    stock_id=stock_id, type_id=type_id, batch_id=batch_id,
+                    status=status, quantity=quantity - old_quantity,
+                    in_transit=in_transit - old_in_transit,
+                    reason='Reconciled'))
+        InventoryEvent.bulkCreate(requester, events)
+    return len(created)
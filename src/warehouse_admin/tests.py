@@ -1,3 +1,736 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounting_manager.models import Sales
+from distributor.models import Distributor, SalesHistory
+from human_resources.models import Employee, Task
+from main import constants
+from main.models import Person
+from main.onboarding import setOnboardingState
+from main.signals import userLoggedIn
+
+from .choices import getDestinationChoices, getStockChoices
+from .compaction import compactItemCards
+from .inventory import getBalancesAt, takeInventorySnapshot
+from .models import (Batch, GoodsMovement, InventoryEvent, ItemCard, ItemType,
+                     Stock, StockBalance)
+from .stockbalance import (getDistributorStockSummary, getStockBalanceDrift,
+                           rebuildStockBalances, takeGoods)
+from .trace import traceBatch
+from .transfers import DispatchLine, approveTransfers, dispatchGoods, transferGoods
+
+
+def loginUser(client: Client, user: User) -> None:
+    setOnboardingState(user, False)
+    # The test client login request has no IP address to audit
+    user_logged_in.disconnect(userLoggedIn)
+    try:
+        client.force_login(user)
+    finally:
+        user_logged_in.connect(userLoggedIn)
+
+
+def loginWarehouseAdmin(client: Client) -> None:
+    person = Person.objects.create(name='Warehouse Admin')
+    Employee.objects.create(person=person,
+                            position=constants.ROLES.WAREHOUSE_ADMIN)
+    loginUser(client, Employee.objects.get(person=person).account)
+
+
+class DistributedGoodsPageTest(TestCase):
+
+    def setUp(self) -> None:
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1')
+        loginWarehouseAdmin(self.client)
+        self.url = reverse(constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '')
+                           + ':' + constants.PAGES.DISTRIBUTED_GOODS_PAGE)
+
+    def addDistributors(self, count: int) -> None:
+        for i in range(count):
+            # The account username is the first name
+            Person.objects.create(name=f'Distributor{Distributor.objects.count()} Test')
+            distributor: Distributor = Distributor.create(constants.SYSTEM_NAME)
+            for status, quantity, is_transforming in (('Good', 5, False),
+                                                      ('Good', 3, True),
+                                                      ('Damaged', 2, False)):
+                ItemCard.objects.create(type=self.type, batch=self.batch,
+                                        stock=distributor.stock,
+                                        quantity=quantity, status=status,
+                                        is_transforming=is_transforming)
+
+    def test_summary_is_one_query(self):
+        self.addDistributors(3)
+        with self.assertNumQueries(1):
+            summary = [(distributor.person.name, distributor.quantity,
+                        distributor.good, distributor.damaged,
+                        distributor.frozen, distributor.in_transit)
+                       for distributor in getDistributorStockSummary()]
+        self.assertEqual(summary, [(f'Distributor{i} Test', 10, 8, 2, 0, 3)
+                                   for i in range(3)])
+
+    def test_page_queries_do_not_grow_with_distributors(self):
+        self.addDistributors(1)
+        # Warm up the caches of the request
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        self.addDistributors(5)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['Distributors']), 6)
+
+
+class ItemCardLabelsTest(TestCase):
+
+    def setUp(self) -> None:
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1')
+        Person.objects.create(name='Saeed Test')
+        self.distributor: Distributor = Distributor.create(constants.SYSTEM_NAME)
+
+    def addCards(self, count: int) -> None:
+        for i in range(count):
+            ItemCard.objects.create(type=self.type, batch=self.batch,
+                                    stock=self.distributor.stock, quantity=1)
+
+    def test_labels_are_cached(self):
+        self.addCards(1)
+        card: ItemCard = ItemCard.objects.get()
+        self.assertEqual(str(card), 'Honey-Batch 1')
+        self.assertEqual(str(self.distributor.stock), "Saeed's Stock")
+        self.assertEqual(str(Stock.objects.get(id=constants.MAIN_STORAGE_ID)),
+                         'Main Storage Stock')
+        with self.assertNumQueries(0):
+            str(card)
+            str(self.distributor.stock)
+
+    @override_settings(LABELS_LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_keeps_the_labels_for_the_local_timeout(self):
+        self.addCards(1)
+        card: ItemCard = ItemCard.objects.get()
+        str(card)
+        # Expired at once, the label is loaded again
+        with self.assertNumQueries(1):
+            str(card)
+
+    def test_labels_follow_the_names(self):
+        self.addCards(1)
+        card: ItemCard = ItemCard.objects.get()
+        self.assertEqual(str(card), 'Honey-Batch 1')
+        self.type.name = 'Sidr'
+        self.type.save()
+        self.assertEqual(str(card), 'Sidr-Batch 1')
+
+        person: Person = self.distributor.person
+        self.assertEqual(str(self.distributor), 'Saeed Test')
+        person.name = 'Salem Test'
+        person.save()
+        self.assertEqual(str(self.distributor), 'Salem Test')
+        self.assertEqual(str(self.distributor.stock), "Salem's Stock")
+
+    def test_changelist_queries_do_not_grow_with_cards(self):
+        loginUser(self.client, User.objects.get(username='CEO'))
+        url: str = reverse('admin:warehouse_admin_itemcard_changelist')
+        self.addCards(1)
+        # Warm up the caches of the request
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.addCards(5)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(url)
+        self.assertContains(response, "Saeed&#x27;s Stock", count=7)
+
+
+class GoodsMovementPageTest(TestCase):
+
+    def setUp(self) -> None:
+        loginWarehouseAdmin(self.client)
+        namespace: str = constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '') + ':'
+        self.url = reverse(namespace + constants.PAGES.GOODS_MOVEMENT_PAGE)
+        self.export_url = reverse(
+            namespace + constants.PAGES.EXPORT_GOODS_MOVEMENT_PAGE)
+        card: ItemCard = ItemCard.objects.create(
+            type=ItemType.objects.create(name='Honey'),
+            batch=Batch.objects.create(name='Batch 1'),
+            stock_id=constants.MAIN_STORAGE_ID, quantity=1)
+        # The filters choices are the distributors names
+        for name in ('Ali Test', 'Omar Test'):
+            Person.objects.create(name=name)
+            Distributor.create(constants.SYSTEM_NAME)
+        GoodsMovement.objects.bulk_create(
+            GoodsMovement(item=card, quantity=i, sender='Main Storage',
+                          receiver='Ali Test' if i % 2 else 'Omar Test')
+            for i in range(25))
+
+    def getPages(self, query: dict) -> list:
+        pages: list = []
+        response = self.client.get(self.url, query)
+        while True:
+            pages.append([movement.quantity for movement
+                          in response.context['GoodsMovement']])
+            if response.context['cursor'] is None:
+                return pages
+            response = self.client.get(
+                self.url, {**query, 'cursor': response.context['cursor']})
+
+    def test_pages_walk_all_the_movements(self):
+        pages: list = self.getPages({})
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), list(reversed(range(25))))
+
+    def test_pages_are_filtered(self):
+        pages: list = self.getPages({'receiver': 'Ali Test'})
+        self.assertEqual(sum(pages, []), list(reversed(range(1, 25, 2))))
+
+    def test_deep_pages_cost_the_same(self):
+        response = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(self.url, {'cursor': response.context['cursor']})
+
+    def test_export_streams_the_filtered_movements(self):
+        response = self.client.get(self.export_url, {'receiver': 'Omar Test'})
+        self.assertTrue(response.streaming)
+        lines: list = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'ID,ITEM,BATCH,QUANTITY,SENDER,RECEIVER,DATE')
+        self.assertEqual(len(lines), 14)
+        self.assertIn(',Honey,Batch 1,24,Main Storage,Omar Test,', lines[1])
+
+
+@override_settings(INVENTORY_SNAPSHOT_DELAY=0)
+class InventoryHistoryTest(TestCase):
+
+    def setUp(self) -> None:
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1')
+        Person.objects.create(name='Nasser Test')
+        self.stock_id: int = Distributor.create(constants.SYSTEM_NAME).stock_id
+        self.main = (constants.MAIN_STORAGE_ID, self.type.id, self.batch.id,
+                     'Good')
+        self.distributor = (self.stock_id, self.type.id, self.batch.id, 'Good')
+
+    def addCard(self, quantity: int) -> ItemCard:
+        return ItemCard.objects.create(type=self.type, batch=self.batch,
+                                       stock_id=constants.MAIN_STORAGE_ID,
+                                       quantity=quantity)
+
+    def send(self, quantity: int) -> None:
+        transferGoods(constants.SYSTEM_NAME, constants.MAIN_STORAGE_ID,
+                      self.stock_id, self.type.id, self.batch.id, quantity)
+
+    def getBalances(self) -> dict:
+        return {(balance.stock_id, balance.type_id, balance.batch_id,
+                 balance.status): (balance.quantity, balance.in_transit)
+                for balance in StockBalance.objects.exclude(
+                    quantity=0, in_transit=0)}
+
+    def test_balances_at_a_time(self):
+        self.addCard(10)
+        before_sending = timezone.now()
+        self.send(4)
+        self.assertEqual(getBalancesAt(before_sending), {self.main: (10, 0)})
+        self.assertEqual(getBalancesAt(timezone.now()), self.getBalances())
+        self.assertEqual(getBalancesAt(timezone.now(), self.stock_id),
+                         {self.distributor: (4, 4)})
+        self.assertEqual(getBalancesAt(before_sending.date()
+                                       - datetime.timedelta(days=1)), {})
+
+    def test_snapshots_give_the_same_balances(self):
+        self.addCard(10)
+        self.send(3)
+        first_time = timezone.now()
+        self.assertIsNotNone(takeInventorySnapshot(constants.SYSTEM_NAME))
+        self.send(2)
+        self.addCard(5)
+        second_time = timezone.now()
+        self.assertIsNotNone(takeInventorySnapshot(constants.SYSTEM_NAME))
+        self.assertIsNone(takeInventorySnapshot(constants.SYSTEM_NAME))
+        self.send(1)
+        self.assertEqual(getBalancesAt(first_time),
+                         {self.main: (7, 0), self.distributor: (3, 3)})
+        self.assertEqual(getBalancesAt(second_time),
+                         {self.main: (10, 0), self.distributor: (5, 5)})
+        self.assertEqual(getBalancesAt(timezone.now()), self.getBalances())
+
+    def test_reconciled_balances_are_recorded(self):
+        card: ItemCard = self.addCard(10)
+        # Changed without the signals, the balance drifts
+        ItemCard.objects.filter(id=card.id).update(quantity=6)
+        rebuildStockBalances(constants.SYSTEM_NAME)
+        self.assertEqual(getBalancesAt(timezone.now()), {self.main: (6, 0)})
+        self.assertEqual(InventoryEvent.objects.filter(
+            reason='Reconciled').get().quantity, -4)
+
+
+class ItemCardCompactionTest(TestCase):
+
+    def setUp(self) -> None:
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1')
+
+    def addCard(self, quantity: int, **fields) -> ItemCard:
+        return ItemCard.objects.create(type=self.type, batch=self.batch,
+                                       stock_id=fields.pop(
+                                           'stock_id', constants.MAIN_STORAGE_ID),
+                                       quantity=quantity, **fields)
+
+    def test_equivalent_cards_are_merged(self):
+        oldest: ItemCard = self.addCard(5)
+        merged: ItemCard = self.addCard(3)
+        self.addCard(2)
+        damaged: ItemCard = self.addCard(4, status='Damaged')
+        in_transit: ItemCard = self.addCard(1, is_transforming=True)
+        priced: ItemCard = self.addCard(6, price=100)
+        movement: GoodsMovement = GoodsMovement.objects.create(
+            item=merged, quantity=3, receiver='Main Storage')
+        events: int = InventoryEvent.objects.count()
+
+        result = compactItemCards(constants.SYSTEM_NAME)
+        self.assertEqual((result.cards_before, result.cards_after,
+                          result.merged_groups, result.repointed_movements),
+                         (6, 4, 1, 1))
+        self.assertEqual(set(ItemCard.objects.values_list('id', 'quantity')),
+                         {(oldest.id, 10), (damaged.id, 4), (in_transit.id, 1),
+                          (priced.id, 6)})
+        movement.refresh_from_db()
+        self.assertEqual(movement.item_id, oldest.id)
+        # The balances and the inventory history do not change
+        self.assertEqual(getStockBalanceDrift(), [])
+        self.assertEqual(InventoryEvent.objects.count(), events)
+
+    def test_movements_without_quantity_keep_their_quantity(self):
+        oldest: ItemCard = self.addCard(5)
+        merged: ItemCard = self.addCard(3)
+        # Saved before the quantity was recorded
+        legacy: GoodsMovement = GoodsMovement.objects.create(
+            item=oldest, receiver='Main Storage')
+        moved: GoodsMovement = GoodsMovement.objects.create(
+            item=merged, receiver='Main Storage')
+        self.assertEqual(str(ItemCard.objects.get(id=merged.id)), 'Honey-Batch 1')
+
+        compactItemCards(constants.SYSTEM_NAME)
+        legacy.refresh_from_db()
+        moved.refresh_from_db()
+        self.assertEqual((legacy.quantity, moved.quantity), (5, 3))
+        self.assertEqual(moved.item_id, oldest.id)
+        self.assertEqual(traceBatch(self.batch.id).flows[0].quantity, 8)
+        # The cached name of the deleted card is dropped
+        self.assertEqual(str(ItemCard(id=merged.id)), f'ItemCard object ({merged.id})')
+
+    def test_dry_run_changes_nothing(self):
+        for quantity in range(1, 11):
+            self.addCard(quantity)
+        result = compactItemCards(constants.SYSTEM_NAME, dry_run=True)
+        self.assertEqual((result.cards_before, result.cards_after), (10, 1))
+        self.assertEqual(result.reduction, 90)
+        self.assertEqual(ItemCard.objects.count(), 10)
+
+
+class TransformedGoodsPageTest(TestCase):
+
+    def setUp(self) -> None:
+        loginWarehouseAdmin(self.client)
+        self.url = reverse(constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '')
+                           + ':' + constants.PAGES.TRANSFORMED_GOODS_PAGE)
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1')
+        ItemCard.objects.create(type=self.type, batch=self.batch,
+                                stock_id=constants.MAIN_STORAGE_ID, quantity=100)
+        self.stock_ids: list = []
+        for name in ('Fahad Test', 'Majed Test'):
+            Person.objects.create(name=name)
+            self.stock_ids.append(
+                Distributor.create(constants.SYSTEM_NAME).stock_id)
+
+    def send(self, count: int) -> None:
+        for i in range(count):
+            transferGoods(constants.SYSTEM_NAME, constants.MAIN_STORAGE_ID,
+                          self.stock_ids[i % 2], self.type.id, self.batch.id, 2)
+
+    def test_page_queries_do_not_grow_with_cards(self):
+        self.send(2)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.send(6)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(self.url)
+        self.assertEqual([(group.receiver, len(group.cards), group.quantity)
+                          for group in response.context['Groups']],
+                         [('Fahad Test', 4, 8), ('Majed Test', 4, 8)])
+
+    def test_selected_cards_are_approved(self):
+        self.send(6)
+        cards: list = list(ItemCard.objects.filter(
+            is_transforming=True, stock_id=self.stock_ids[0]).values_list(
+            'id', flat=True))
+        self.client.post(self.url, {'cards': cards})
+        self.assertEqual(set(ItemCard.objects.filter(
+            is_transforming=True).values_list('stock_id', flat=True)),
+            {self.stock_ids[1]})
+        self.assertEqual(StockBalance.objects.get(
+            stock_id=self.stock_ids[0]).in_transit, 0)
+        self.assertEqual(StockBalance.objects.get(
+            stock_id=self.stock_ids[1]).in_transit, 6)
+        self.assertEqual(getStockBalanceDrift(), [])
+        self.assertEqual(InventoryEvent.objects.filter(
+            reason='Approved').get().in_transit, -6)
+
+    def test_approving_the_last_cards_rates_the_task(self):
+        task: Task = Task.objects.create(
+            id=10, employee=Employee.objects.get(person__name='Warehouse Admin'),
+            task='Approve goods')
+        self.send(2)
+        approveTransfers(constants.SYSTEM_NAME, [ItemCard.objects.filter(
+            is_transforming=True).values_list('id', flat=True).first()])
+        self.client.post(self.url, {'cards': list(ItemCard.objects.filter(
+            is_transforming=True).values_list('id', flat=True))})
+        task.refresh_from_db()
+        self.assertTrue(task.is_rated)
+        self.assertEqual(task.status, constants.TASK_STATUS.ON_TIME)
+
+
+class BatchTraceTest(TestCase):
+
+    def setUp(self) -> None:
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1', quantity=100)
+        ItemCard.objects.create(type=self.type, batch=self.batch,
+                                stock_id=constants.MAIN_STORAGE_ID, quantity=100)
+        Person.objects.create(name='Hamad Test')
+        self.distributor: Distributor = Distributor.create(constants.SYSTEM_NAME)
+
+    def addRecords(self, count: int) -> None:
+        for i in range(count):
+            transferGoods(constants.SYSTEM_NAME, constants.MAIN_STORAGE_ID,
+                          self.distributor.stock_id, self.type.id,
+                          self.batch.id, 5)
+            Sales.objects.create(type=self.type, batch=self.batch, quantity=3,
+                                 price=10, date=timezone.now().date(),
+                                 seller='Main Storage', is_approved=True)
+            SalesHistory.objects.create(distributor=self.distributor,
+                                        type=self.type, batch=self.batch,
+                                        quantity=2, price=10)
+
+    def test_flow_graph(self):
+        self.addRecords(2)
+        trace = traceBatch(self.batch.id)
+        self.assertEqual([(node.name, node.quantities, node.in_transit)
+                          for node in trace.nodes],
+                         [('Main Storage', {'Good': 90}, 0),
+                          ('Hamad Test', {'Good': 10}, 10),
+                          ('Sold', {'Sale': 6, 'Sales History': 4}, 0)])
+        self.assertEqual(set(trace.flows), {
+            ('Main Storage', 'Hamad Test', 'Movement', 10, 2),
+            ('Main Storage', 'Sold', 'Sale', 6, 2),
+            ('Hamad Test', 'Sold', 'Sales History', 4, 2)})
+        self.assertEqual((trace.current, trace.sold), (100, 10))
+        self.assertIsNone(traceBatch(0))
+
+    def test_queries_do_not_grow_with_records(self):
+        self.addRecords(1)
+        with CaptureQueriesContext(connection) as queries:
+            traceBatch(self.batch.id)
+        self.addRecords(5)
+        with self.assertNumQueries(len(queries)):
+            traceBatch(self.batch.id)
+
+    def test_page(self):
+        self.addRecords(1)
+        loginWarehouseAdmin(self.client)
+        response = self.client.get(reverse(
+            constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '') + ':'
+            + constants.PAGES.BATCH_TRACE_PAGE, args=[self.batch.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Hamad Test')
+
+    def test_page_of_a_non_numeric_id_is_not_found(self):
+        loginWarehouseAdmin(self.client)
+        url: str = reverse(
+            constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '') + ':'
+            + constants.PAGES.BATCH_TRACE_PAGE, args=[self.batch.id])
+        response = self.client.get(url.replace(f'/{self.batch.id}/', '/abc/'))
+        self.assertEqual(response.status_code, 404)
+
+
+class StockLedgerMixin:
+    """
+    The stock balances must always be the sums of the item cards and of the
+    inventory events.
+    """
+
+    def setUp(self) -> None:
+        self.type = ItemType.objects.create(name='Honey')
+        self.batch = Batch.objects.create(name='Batch 1')
+        Person.objects.create(name='Saleh Test')
+        self.stock_id: int = Distributor.create(constants.SYSTEM_NAME).stock_id
+
+    def addCard(self, quantity: int, stock_id: int = constants.MAIN_STORAGE_ID,
+                **fields) -> ItemCard:
+        return ItemCard.objects.create(type=self.type, batch=self.batch,
+                                       stock_id=stock_id, quantity=quantity,
+                                       **fields)
+
+    def getBalance(self, stock_id: int = constants.MAIN_STORAGE_ID,
+                   status: str = 'Good') -> tuple:
+        return StockBalance.objects.filter(
+            stock_id=stock_id, type=self.type, batch=self.batch,
+            status=status).values_list('quantity', 'in_transit').first() or (0, 0)
+
+    def assertLedger(self) -> None:
+        self.assertEqual(getStockBalanceDrift(), [])
+        balances: dict = {
+            (balance.stock_id, balance.type_id, balance.batch_id, balance.status):
+            (balance.quantity, balance.in_transit)
+            for balance in StockBalance.objects.exclude(quantity=0, in_transit=0)}
+        self.assertEqual(getBalancesAt(timezone.now()), balances)
+
+
+class StockLedgerTest(StockLedgerMixin, TestCase):
+
+    def test_added_cards(self):
+        self.addCard(10)
+        self.addCard(5)
+        self.addCard(3, status='Damaged')
+        self.assertEqual(self.getBalance(), (15, 0))
+        self.assertEqual(self.getBalance(status='Damaged'), (3, 0))
+        self.assertLedger()
+
+    def test_edited_cards(self):
+        card: ItemCard = self.addCard(10)
+        card.quantity = 7
+        card.save()
+        # Saved again after a plain save
+        card.quantity = 9
+        card.save()
+        self.assertEqual(self.getBalance(), (9, 0))
+        card.status = 'Frozen'
+        card.stock_id = self.stock_id
+        card.save()
+        self.assertEqual(self.getBalance(), (0, 0))
+        self.assertEqual(self.getBalance(self.stock_id, 'Frozen'), (9, 0))
+        self.assertLedger()
+
+    def test_deleted_card(self):
+        self.addCard(10)
+        self.addCard(4).delete(constants.SYSTEM_NAME)
+        self.assertEqual(self.getBalance(), (10, 0))
+        self.assertLedger()
+
+    def test_sale_takes_the_oldest_cards(self):
+        oldest: ItemCard = self.addCard(3)
+        newest: ItemCard = self.addCard(10)
+        self.assertIsNotNone(takeGoods(constants.SYSTEM_NAME,
+                                       constants.MAIN_STORAGE_ID,
+                                       self.type.id, self.batch.id, 5))
+        self.assertFalse(ItemCard.objects.filter(id=oldest.id).exists())
+        self.assertEqual(ItemCard.objects.get(id=newest.id).quantity, 8)
+        self.assertEqual(self.getBalance(), (8, 0))
+        self.assertLedger()
+
+    def test_short_sale_takes_nothing(self):
+        self.addCard(3)
+        self.assertIsNone(takeGoods(constants.SYSTEM_NAME, constants.MAIN_STORAGE_ID,
+                                    self.type.id, self.batch.id, 4))
+        self.assertEqual(self.getBalance(), (3, 0))
+        self.assertLedger()
+
+
+class TransferGoodsTest(StockLedgerMixin, TestCase):
+
+    def transfer(self, source_id: int, dest_id: int, quantity: int, **kwargs):
+        return transferGoods(constants.SYSTEM_NAME, source_id, dest_id,
+                             self.type.id, self.batch.id, quantity, **kwargs)
+
+    def test_sent_goods_are_in_transit_until_approved(self):
+        self.addCard(10)
+        transfer = self.transfer(constants.MAIN_STORAGE_ID, self.stock_id, 4)
+        self.assertEqual((transfer.movement.quantity, transfer.movement.receiver),
+                         (4, 'Saleh Test'))
+        self.assertEqual(self.getBalance(), (6, 0))
+        self.assertEqual(self.getBalance(self.stock_id), (4, 4))
+        self.assertLedger()
+        self.assertEqual(approveTransfers(constants.SYSTEM_NAME,
+                                          [transfer.card.id]), 1)
+        # Approved cards are skipped
+        self.assertEqual(approveTransfers(constants.SYSTEM_NAME,
+                                          [transfer.card.id]), 0)
+        self.assertEqual(self.getBalance(self.stock_id), (4, 0))
+        self.assertLedger()
+
+    def test_returned_goods(self):
+        self.addCard(5, stock_id=self.stock_id)
+        transfer = self.transfer(self.stock_id, constants.MAIN_STORAGE_ID, 2,
+                                 status='Damaged')
+        self.assertEqual(transfer.card.received_from, 'Saleh Test')
+        self.assertEqual(self.getBalance(self.stock_id), (3, 0))
+        self.assertEqual(self.getBalance(status='Damaged'), (2, 2))
+        self.assertLedger()
+
+    def test_goods_changed_in_the_same_stock(self):
+        self.addCard(5, stock_id=self.stock_id, received_from='Main Storage')
+        transfer = self.transfer(self.stock_id, self.stock_id, 2, status='Frozen')
+        self.assertIsNone(transfer.movement)
+        self.assertEqual(transfer.card.received_from, 'Main Storage')
+        self.assertEqual(self.getBalance(self.stock_id, 'Frozen'), (2, 0))
+        self.assertLedger()
+
+    def test_converted_goods_leave_the_stocks(self):
+        self.addCard(5)
+        self.assertEqual(self.transfer(constants.MAIN_STORAGE_ID, None, 5),
+                         (None, None))
+        self.assertEqual(self.getBalance(), (0, 0))
+        self.assertLedger()
+
+    def test_short_transfer_changes_nothing(self):
+        self.addCard(5)
+        self.assertIsNone(self.transfer(constants.MAIN_STORAGE_ID, self.stock_id, 6))
+        self.assertEqual(self.getBalance(), (5, 0))
+        self.assertFalse(GoodsMovement.objects.exists())
+        self.assertLedger()
+
+
+class DispatchGoodsTest(StockLedgerMixin, TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.other_batch = Batch.objects.create(name='Batch 2')
+        self.addCard(10)
+        ItemCard.objects.create(type=self.type, batch=self.other_batch,
+                                stock_id=constants.MAIN_STORAGE_ID, quantity=5)
+
+    def dispatch(self, *lines: DispatchLine):
+        return dispatchGoods(constants.SYSTEM_NAME, constants.MAIN_STORAGE_ID,
+                             self.stock_id, lines)
+
+    def test_lines_are_dispatched_together(self):
+        dispatch = self.dispatch(DispatchLine(self.type.id, self.batch.id, 3),
+                                 DispatchLine(self.type.id, self.other_batch.id, 5),
+                                 # Merged with the first line
+                                 DispatchLine(self.type.id, self.batch.id, 2))
+        self.assertEqual(dispatch.shortages, [])
+        self.assertEqual(sorted(movement.quantity for movement in dispatch.movements),
+                         [5, 5])
+        self.assertEqual(self.getBalance(), (5, 0))
+        self.assertEqual(self.getBalance(self.stock_id), (5, 5))
+        self.assertLedger()
+
+    def test_short_line_dispatches_nothing(self):
+        dispatch = self.dispatch(DispatchLine(self.type.id, self.batch.id, 3),
+                                 DispatchLine(self.type.id, self.other_batch.id, 7))
+        self.assertEqual(dispatch, ([], [DispatchLine(self.type.id,
+                                                      self.other_batch.id, 2)]))
+        self.assertEqual(self.getBalance(), (10, 0))
+        self.assertFalse(GoodsMovement.objects.exists())
+        self.assertLedger()
+
+    def test_balance_ahead_of_the_cards_rolls_back(self):
+        # The balance says 15 but the cards are 5
+        StockBalance.objects.filter(batch=self.other_batch).update(
+            quantity=F('quantity') + 10)
+        cards: set = set(ItemCard.objects.values_list('id', 'quantity'))
+        events: int = InventoryEvent.objects.count()
+        dispatch = self.dispatch(DispatchLine(self.type.id, self.batch.id, 3),
+                                 DispatchLine(self.type.id, self.other_batch.id, 7))
+        self.assertEqual(dispatch.movements, [])
+        self.assertEqual(dispatch.shortages, [DispatchLine(self.type.id,
+                                                           self.other_batch.id, 7)])
+        # The first line is taken back
+        self.assertEqual(set(ItemCard.objects.values_list('id', 'quantity')), cards)
+        self.assertEqual(self.getBalance(), (10, 0))
+        self.assertEqual(InventoryEvent.objects.count(), events)
+        self.assertFalse(GoodsMovement.objects.exists())
+
+
+class GoodsChoicesTest(StockLedgerMixin, TestCase):
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def getBatches(self, stock_id: int = constants.MAIN_STORAGE_ID) -> list:
+        return [name for _, name in getStockChoices(stock_id).batches]
+
+    def test_choices_are_cached(self):
+        self.addCard(5)
+        getStockChoices(constants.MAIN_STORAGE_ID)
+        getDestinationChoices(constants.MAIN_STORAGE_ID)
+        with self.assertNumQueries(0):
+            getStockChoices(constants.MAIN_STORAGE_ID)
+            getDestinationChoices(constants.MAIN_STORAGE_ID)
+
+    @override_settings(CHOICES_LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_keeps_the_choices_for_the_local_timeout(self):
+        self.addCard(5)
+        getStockChoices(constants.MAIN_STORAGE_ID)
+        # Expired at once, the types and batches are loaded again
+        with self.assertNumQueries(2):
+            getStockChoices(constants.MAIN_STORAGE_ID)
+
+    def test_card_changes_update_the_stock_choices(self):
+        self.assertEqual(self.getBatches(), [])
+        card: ItemCard = self.addCard(5)
+        self.assertEqual(self.getBatches(), ['Batch 1'])
+        # Moved to the distributor stock
+        card.stock_id = self.stock_id
+        card.save()
+        self.assertEqual(self.getBatches(), [])
+        self.assertEqual(self.getBatches(self.stock_id), ['Batch 1'])
+        takeGoods(constants.SYSTEM_NAME, self.stock_id, self.type.id,
+                  self.batch.id, 5)
+        self.assertEqual(self.getBatches(self.stock_id), [])
+
+    def test_renamed_batch_updates_the_choices(self):
+        self.addCard(5)
+        self.assertEqual(self.getBatches(), ['Batch 1'])
+        self.batch.name = 'Batch 1 Renamed'
+        self.batch.save()
+        self.assertEqual(self.getBatches(), ['Batch 1 Renamed'])
+
+    def test_new_distributor_updates_the_destinations(self):
+        self.assertEqual(getDestinationChoices(constants.MAIN_STORAGE_ID),
+                         [(self.stock_id, 'Saleh Test')])
+        Person.objects.create(name='Yousef Test')
+        stock_id: int = Distributor.create(constants.SYSTEM_NAME).stock_id
+        self.assertEqual(getDestinationChoices(self.stock_id),
+                         [(constants.MAIN_STORAGE_ID, 'Main Storage'),
+                          (stock_id, 'Yousef Test')])
+
+
+class SendGoodsPageTest(StockLedgerMixin, TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        loginWarehouseAdmin(self.client)
+        self.url = reverse(
+            constants.ROLES.WAREHOUSE_ADMIN.replace(' ', '') + ':'
+            + constants.PAGES.SEND_GOODS_PAGE,
+            args=[Distributor.objects.get(stock_id=self.stock_id).id])
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_invalid_form_shows_its_errors(self):
+        self.addCard(5)
+        response = self.client.post(self.url, {'type': self.type.id,
+                                               'batch': self.batch.id,
+                                               'quantity': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('quantity', response.context['form'].errors)
+        self.assertEqual(self.getBalance(), (5, 0))
+        self.assertEqual(self.getBalance(self.stock_id), (0, 0))
@@ -0,0 +1,136 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from accounting_manager.models import Sales
+from distributor.models import SalesHistory
+from .models import Batch, GoodsMovement, ItemCard
+from .transfers import getStockOwnerNames
+
+# The node of the sold goods
+SOLD_NODE: str = 'Sold'
+
+
+class TraceNode(NamedTuple):
+    """
+    A place of the batch goods, a stock or the sold goods.
+    """
+    name: str
+    stock_id: Optional[int]
+    # The current quantity of every status, the sold quantity in 'Sold'
+    quantities: Dict[str, int]
+    in_transit: int
+    cards: int
+
+    @property
+    def quantity(self) -> int:
+        return sum(self.quantities.values())
+
+
+class TraceFlow(NamedTuple):
+    """
+    The total quantity that went from a node to another.
+    'kind' is 'Movement', 'Sale' or 'Sales History'.
+    """
+    source: str
+    target: str
+    kind: str
+    quantity: int
+    count: int
+
+
+class BatchTrace(NamedTuple):
+    """
+    Where the goods of a batch are and where they went, see 'traceBatch'.
+    """
+    batch: Batch
+    cards: List[ItemCard]
+    movements: List[GoodsMovement]
+    sales: List[Sales]
+    sales_history: List[SalesHistory]
+    nodes: List[TraceNode]
+    flows: List[TraceFlow]
+
+    @property
+    def current(self) -> int:
+        return sum(card.quantity for card in self.cards)
+
+    @property
+    def sold(self) -> int:
+        return sum(flow.quantity for flow in self.flows if flow.target == SOLD_NODE)
+
+
+def traceBatch(batch_id: int) -> Optional[BatchTrace]:
+    """
+    Gather the current cards, the movements and the sales of a batch with six
+    queries on the batch indexes, whatever the number of its cards and
+    movements, and build the flow graph of the batch goods: the nodes are
+    the stocks (by owner name) and the sold goods, the flows are the summed
+    movements and sales between them.
+    Note: the retail goods are not traced, the retail cards have no batch.
+
+    Args:
+        batch_id (int): The batch ID
+
+    Returns:
+        BatchTrace: The batch records and flow graph, None if there is no
+        such batch.
+    """
+    batch: Optional[Batch] = Batch.objects.filter(id=batch_id).first()
+    if batch is None:
+        return None
+    cards: List[ItemCard] = list(ItemCard.objects.filter(batch_id=batch_id)
+                                 .select_related('type').order_by('stock_id', 'id'))
+    movements: List[GoodsMovement] = list(GoodsMovement.objects.filter(
+        item__batch_id=batch_id).select_related('item__type').order_by('date', 'id'))
+    sales: List[Sales] = list(Sales.objects.filter(batch_id=batch_id)
+                              .select_related('type').order_by('date', 'id'))
+    sales_history: List[SalesHistory] = list(SalesHistory.objects.filter(
+        batch_id=batch_id).select_related('type', 'distributor__person')
+        .order_by('payment_date', 'id'))
+    names: Dict[int, str] = getStockOwnerNames(*{card.stock_id for card in cards})
+
+    nodes: Dict[str, TraceNode] = {}
+
+    def getNode(name: str, stock_id: Optional[int] = None) -> TraceNode:
+        if name not in nodes:
+            nodes[name] = TraceNode(name, stock_id, {}, 0, 0)
+        return nodes[name]
+
+    for card in cards:
+        name: str = names.get(card.stock_id, f'Stock {card.stock_id}')
+        node: TraceNode = getNode(name, card.stock_id)
+        node.quantities[card.status] = node.quantities.get(card.status, 0) \
+            + card.quantity
+        nodes[node.name] = node._replace(
+            in_transit=node.in_transit + (card.quantity if card.is_transforming else 0),
+            cards=node.cards + 1)
+
+    flows: Dict[Tuple[str, str, str], Tuple[int, int]] = {}
+
+    def addFlow(source: str, target: str, kind: str, quantity: int) -> None:
+        getNode(source)
+        getNode(target)
+        total, count = flows.get((source, target, kind), (0, 0))
+        flows[(source, target, kind)] = (total + quantity, count + 1)
+
+    for movement in movements:
+        # The movements before the quantity was recorded have the card quantity
+        addFlow(movement.sender or '', movement.receiver, 'Movement',
+                movement.item.quantity if movement.quantity is None
+                else movement.quantity)
+    for sale in sales:
+        addFlow(sale.seller or '', SOLD_NODE, 'Sale', sale.quantity)
+    for sale in sales_history:
+        addFlow(getattr(sale.distributor.person, 'name', ''), SOLD_NODE,
+                'Sales History', sale.quantity)
+    # The sold quantities are by the kind of the sales
+    for (source, target, kind), (quantity, _) in flows.items():
+        if target == SOLD_NODE:
+            sold: Dict[str, int] = nodes[SOLD_NODE].quantities
+            sold[kind] = sold.get(kind, 0) + quantity
+
+    return BatchTrace(
+        batch, cards, movements, sales, sales_history,
+        sorted(nodes.values(), key=lambda node: (
+            node.stock_id is None, node.stock_id or 0, node.name)),
+        [TraceFlow(source, target, kind, quantity, count)
+         for (source, target, kind), (quantity, count) in flows.items()])
@@ -0,0 +1,232 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest
+
+from distributor.models import Distributor
+from main import constants
+from .models import GoodsMovement, ItemCard, StockBalance
+from .stockbalance import recordApprovedCards, takeGoods
+
+
+class Transfer(NamedTuple):
+    """
+    The result of 'transferGoods', both are None when the goods left the
+    stocks and the movement is None when the goods stayed in the same stock.
+    """
+    card: Optional[ItemCard]
+    movement: Optional[GoodsMovement]
+
+
+class DispatchLine(NamedTuple):
+    """
+    One type and batch of a dispatch.
+    """
+    type_id: int
+    batch_id: int
+    quantity: int
+
+
+class Dispatch(NamedTuple):
+    """
+    The result of 'dispatchGoods', nothing is dispatched if any line is short.
+    """
+    movements: List[GoodsMovement]
+    shortages: List[DispatchLine]
+
+
+class InTransitGroup(NamedTuple):
+    """
+    The cards in transit to one stock.
+    """
+    stock_id: int
+    receiver: str
+    cards: List[ItemCard]
+
+    @property
+    def quantity(self) -> int:
+        return sum(card.quantity for card in self.cards)
+
+
+def getStockOwnerNames(*stock_ids: int) -> Dict[int, str]:
+    """
+    Get the names of the stocks owners with one query.
+
+    Returns:
+        dict: 'Main Storage' or the distributor name of every stock ID
+    """
+    names: Dict[int, str] = {constants.MAIN_STORAGE_ID: 'Main Storage'}
+    names.update(Distributor.objects.filter(stock_id__in=stock_ids).values_list(
+        'stock_id', 'person__name'))
+    return names
+
+
+def transferGoods(requester: Union[HttpRequest, str], source_id: int,
+                  dest_id: Optional[int], type_id: int, batch_id: int,
+                  quantity: int, status: Optional[str] = 'Good',
+                  source_status: Optional[str] = 'Good',
+                  received_from: Optional[str] = None) -> Optional[Transfer]:
+    """
+    Move goods from a stock to another stock, or to another status in the
+    same stock, in one transaction. The quantity is taken from the source
+    cards (see 'takeGoods') and a new card is created in the destination.
+    The goods sent to another stock are in transit until they are approved,
+    and their movement is recorded.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+        source_id (int): The source stock ID
+        dest_id (int): The destination stock ID, None if the goods leave the
+        stocks (e.g. converted to retail)
+        type_id (int): The item type ID
+        batch_id (int): The batch ID
+        quantity (int): The transferred quantity
+        status (str, optional): The status in the destination.
+        Defaults to 'Good'.
+        source_status (str, optional): The status of the taken cards.
+        Defaults to 'Good'.
+        received_from (str, optional): The 'received_from' of the new card.
+        Defaults to the source owner, or to the taken card in the same stock.
+
+    Returns:
+        Transfer: The created card and movement, None if the quantity is not
+        available in the source stock.
+    """
+    with transaction.atomic():
+        taken: Optional[ItemCard] = takeGoods(requester, source_id, type_id,
+                                              batch_id, quantity, source_status)
+        if taken is None:
+            return None
+        if dest_id is None:
+            return Transfer(None, None)
+        is_moved: bool = dest_id != source_id
+        names: Dict[int, str] = getStockOwnerNames(source_id, dest_id) \
+            if is_moved else {}
+        if received_from is None:
+            received_from = names[source_id] if is_moved else taken.received_from
+        card: ItemCard = ItemCard.create(requester, type_id=type_id,
+                                         batch_id=batch_id, stock_id=dest_id,
+                                         quantity=quantity, status=status,
+                                         received_from=received_from,
+                                         is_transforming=is_moved)
+        movement: Optional[GoodsMovement] = None
+        if is_moved:
+            movement = GoodsMovement.create(requester, item=card,
+                                            quantity=quantity,
+                                            sender=names[source_id],
+                                            receiver=names.get(dest_id, ''))
+        return Transfer(card, movement)
+
+
+def dispatchGoods(requester: Union[HttpRequest, str], source_id: int,
+                  dest_id: int, lines: Iterable[DispatchLine]) -> Dispatch:
+    """
+    Send many types and batches from a stock to another stock in one
+    transaction. All the lines are checked against the locked balances with
+    one query before anything is taken, the lines of the same type and batch
+    are merged, and the movements are saved with one 'bulk_create'.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+        source_id (int): The source stock ID
+        dest_id (int): The destination stock ID
+        lines (Iterable[DispatchLine]): The dispatched goods
+
+    Returns:
+        Dispatch: The movements, or the lines that are not available in the
+        source stock with their missing quantities.
+    """
+    quantities: Dict[Tuple[int, int], int] = {}
+    for line in lines:
+        key: Tuple[int, int] = (line.type_id, line.batch_id)
+        quantities[key] = quantities.get(key, 0) + line.quantity
+    if not quantities:
+        return Dispatch([], [])
+    with transaction.atomic():
+        keys = Q()
+        for type_id, batch_id in quantities:
+            keys |= Q(type_id=type_id, batch_id=batch_id)
+        available: Dict[Tuple[int, int], int] = {
+            (type_id, batch_id): quantity for type_id, batch_id, quantity
+            in StockBalance.objects.select_for_update().filter(
+                keys, stock_id=source_id, status='Good').values_list(
+                'type_id', 'batch_id', 'quantity')}
+        shortages: List[DispatchLine] = [
+            DispatchLine(type_id, batch_id,
+                         quantity - available.get((type_id, batch_id), 0))
+            for (type_id, batch_id), quantity in quantities.items()
+            if available.get((type_id, batch_id), 0) < quantity]
+        if shortages:
+            return Dispatch([], shortages)
+
+        names: Dict[int, str] = getStockOwnerNames(source_id, dest_id)
+        movements: List[GoodsMovement] = []
+        for (type_id, batch_id), quantity in quantities.items():
+            if takeGoods(requester, source_id, type_id, batch_id, quantity) is None:
+                # The balance is ahead of the cards, undo the taken lines
+                transaction.set_rollback(True)
+                return Dispatch([], [DispatchLine(type_id, batch_id, quantity)])
+            card: ItemCard = ItemCard.create(requester, type_id=type_id,
+                                             batch_id=batch_id, stock_id=dest_id,
+                                             quantity=quantity, status='Good',
+                                             received_from=names[source_id],
+                                             is_transforming=True)
+            movements.append(GoodsMovement(item=card, quantity=quantity,
+                                           sender=names[source_id],
+                                           receiver=names.get(dest_id, '')))
+        return Dispatch(GoodsMovement.bulkCreate(requester, movements), [])
+
+
+def getInTransitGroups() -> List[InTransitGroup]:
+    """
+    Get the cards in transit grouped by their destination stocks, with their
+    types, batches and stocks, in two queries.
+
+    Returns:
+        list: The cards of every destination, the main storage first
+    """
+    cards: List[ItemCard] = list(ItemCard.objects.filter(
+        is_transforming=True).select_related('type', 'batch', 'stock').order_by(
+        'stock_id', 'id'))
+    names: Dict[int, str] = getStockOwnerNames(
+        *{card.stock_id for card in cards})
+    groups: Dict[int, InTransitGroup] = {}
+    for card in cards:
+        if card.stock_id not in groups:
+            groups[card.stock_id] = InTransitGroup(
+                card.stock_id, names.get(card.stock_id, str(card.stock)), [])
+        groups[card.stock_id].cards.append(card)
+    return sorted(groups.values(), key=lambda group: (
+        group.stock_id != constants.MAIN_STORAGE_ID, group.receiver))
+
+
+def approveTransfers(requester: Union[HttpRequest, str],
+                     card_ids: Iterable[int]) -> int:
+    """
+    Approve the cards in transit with one UPDATE query, and subtract them from
+    the quantities in transit of their stock balances in the same transaction.
+    The cards that are not in transit are skipped.
+
+    Args:
+        requester (HttpRequest | str): The request or the requester name
+        card_ids (Iterable[int]): The approved cards IDs
+
+    Returns:
+        int: Number of the approved cards
+    """
+    card_ids = list(card_ids)
+    if not card_ids:
+        return 0
+    with transaction.atomic():
+        cards: List[tuple] = list(ItemCard.objects.select_for_update().filter(
+            id__in=card_ids, is_transforming=True).values_list(
+            'id', 'stock_id', 'type_id', 'batch_id', 'status', 'quantity'))
+        if not cards:
+            return 0
+        # The queryset update does not send the signals of the cards
+        approved: int = ItemCard.objects.filter(
+            id__in=[card[0] for card in cards]).auditedUpdate(
+            requester, is_transforming=False)
+        recordApprovedCards((card[1:5], card[5]) for card in cards)
+    return approved
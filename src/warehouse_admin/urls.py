@@ -52,6 +52,11 @@ urlpatterns = [
         views.AddBatchPage,
         name=PAGES.ADD_BATCH_PAGE
     ),
+    path(
+        f'{PAGES.DASHBOARD}/Batch-Trace/<int:pk>/',
+        views.BatchTracePage,
+        name=PAGES.BATCH_TRACE_PAGE
+    ),
     # Distributed Goods URLs
     path(
         f'{PAGES.DASHBOARD}/Distributed-Goods/',
@@ -68,12 +73,22 @@ urlpatterns = [
         views.SendGoodsPage,
         name=PAGES.SEND_GOODS_PAGE
     ),
+    path(
+        f'{PAGES.DASHBOARD}/Dispatch-Goods/<str:pk>/',
+        views.DispatchGoodsPage,
+        name=PAGES.DISPATCH_GOODS_PAGE
+    ),
     # Goods Movement URLs
     path(
         f'{PAGES.DASHBOARD}/Goods-Movement/',
         views.GoodsMovementPage,
         name=PAGES.GOODS_MOVEMENT_PAGE
     ),
+    path(
+        f'{PAGES.DASHBOARD}/Goods-Movement/Export/',
+        views.ExportGoodsMovementPage,
+        name=PAGES.EXPORT_GOODS_MOVEMENT_PAGE
+    ),
     # Damaged Goods URLs
     path(
         f'{PAGES.DASHBOARD}/Damaged-Goods/',
@@ -1,8 +1,13 @@
 from django.contrib import messages
+from django.db import transaction
+from django.db.models import F, Sum
 from django.db.models.functions import Lower
+from django.http import StreamingHttpResponse
 from django.shortcuts import redirect, render
+from django.utils import timezone
 
 from distributor.models import Distributor
+from human_resources.models import Task
 from main import constants
 from main.utils import Pagination
 from main.utils import getEmployeesTasks as EmployeeTasks
@@ -10,9 +15,16 @@ from main.utils import getUserBaseTemplate as base
 from main.utils import resolvePageUrl
 
 from .forms import (AddBatchForm, AddGoodsForm, AddRetailGoodsForm,
-                    ConvertToRetailForm, RegisterItemForm, SendGoodsForm)
+                    ConvertToRetailForm, DispatchGoodsFormSet,
+                    GoodsMovementFilterForm, RegisterItemForm, SendGoodsForm,
+                    getDispatchChoices)
 from .models import (Batch, GoodsMovement, ItemCard, ItemType, RetailCard,
-                     RetailItem, Stock)
+                     RetailItem, Stock, StockBalance)
+from .movements import filterMovements, getMovementsPage, iterMovementsCsv
+from .stockbalance import getAvailableItems, getDistributorStockSummary
+from .trace import traceBatch
+from .transfers import (DispatchLine, approveTransfers, dispatchGoods,
+                        getInTransitGroups, transferGoods)
 
 
 # ----------------------------Dashboard------------------------------
@@ -27,43 +39,34 @@ def warehouseAdminDashboard(request):
 
 # --------------------------Main Storage-----------------------------
 def MainStorageGoodsPage(request):
-    # Getting the main storage goods
-    Items = ItemCard.objects.filter(
+    # Getting the main storage balances, without the goods in transit
+    balances = StockBalance.objects.filter(
         stock__id=constants.MAIN_STORAGE_ID,
-        status='Good',
-        is_transforming=False
-    ).order_by(Lower('type__name'))
-    items_list = []
-    # Below is a function to combine cards with same name
-    for item in Items:
-        # loop through the objects in the items list
-        for obj in items_list:
-            # If the item is in the list just add the quantity
-            if obj['type'] == item.type.name:
-                obj['quantity'] += item.quantity
-                # Check if the batch added to the batches list
-                for index, batch in enumerate(obj['batch']):
-                    # If the batch is present then add the quantity
-                    if batch[0] == item.batch.name:
-                        obj['batch'][index][1] += item.quantity
-                        break
-                else:
-                    # If there is no batch list, create it
-                    obj['batch'].append([item.batch.name, item.quantity])
-                break
-        else:
-            # If the item object ins not in the list, create it
-            obj = {'type': item.type.name,
-                   'batch': [[item.batch.name, item.quantity], ],
-                   'quantity': item.quantity}
-            items_list.append(obj)
+        status='Good'
+    )
+    available = Sum(F('quantity') - F('in_transit'))
+    # The total quantity of every type, grouped and paginated in the database
+    types = balances.values('type__name').annotate(
+        quantity=available).filter(quantity__gt=0).order_by(Lower('type__name'))
     # Get the page number and initialize the pagination object
     page = request.GET.get('page')
-    pagination = Pagination(items_list, page)
+    pagination = Pagination(types, page)
     # Get the page object and 'is paginated' function
     page_obj = pagination.getPageObject()
     is_paginated = pagination.isPaginated
 
+    # The quantity of every batch of the types in the page
+    items_list = [{'type': item['type__name'],
+                   'batch': [],
+                   'quantity': item['quantity']} for item in page_obj]
+    batches = {item['type']: item['batch'] for item in items_list}
+    for batch in balances.filter(type__name__in=batches).values(
+            'type__name', 'batch__name').annotate(
+            quantity=available).filter(quantity__gt=0).order_by('batch__name'):
+        batches[batch['type__name']].append(
+            [batch['batch__name'], batch['quantity']])
+    page_obj.object_list = items_list
+
     context = {'page_obj': page_obj, 'is_paginated': is_paginated, 'base': base(
         request), 'EmployeeTasks': EmployeeTasks(request)}
     template = 'warehouse_admin/main_storage_goods.html'
@@ -147,26 +150,21 @@ def AddBatchPage(request):
     context = {'form': form, 'base': base(
         request), 'EmployeeTasks': EmployeeTasks(request)}
     return render(request, 'warehouse_admin/add_batch.html', context)
+
+
+def BatchTracePage(request, pk):
+    trace = traceBatch(pk)
+    if trace is None:
+        return redirect(resolvePageUrl(request, constants.PAGES.BATCHES_PAGE))
+    context = {'trace': trace, 'base': base(
+        request), 'EmployeeTasks': EmployeeTasks(request)}
+    return render(request, 'warehouse_admin/batch_trace.html', context)
 # --------------------------Distributed Goods---------------------------
 
 
 def DistributedGoodsPage(request):
-    Distributors = {}
-    MainStorageStock = Stock.objects.filter(id=1)[0]
-    Stocks = Stock.objects.all()
-    for stock in Stocks:
-        if stock == MainStorageStock:
-            continue
-        quantityOfGoods = 0
-        try:
-            distributor = Distributor.objects.get(stock=stock)
-            distributorStock = ItemCard.objects.filter(stock=stock)
-            for stock in distributorStock:
-                quantityOfGoods += stock.quantity
-            Distributors[distributor.id] = {'distributor': distributor,
-                                            'quantityOfGoods': quantityOfGoods}
-        except Distributor.DoesNotExist:
-            pass
+    # The distributors with their stock totals, in one query
+    Distributors = getDistributorStockSummary()
 
     context = {'Distributors': Distributors, 'base': base(
         request), 'EmployeeTasks': EmployeeTasks(request)}
@@ -184,63 +182,82 @@ def DistributorStockPage(request, pk):
 def SendGoodsPage(request, pk):
     form = SendGoodsForm(1)
     distributor = Distributor.objects.get(id=pk)
-    stock = distributor.stock
-    availableItems = {}
-    Items = ItemCard.objects.filter(stock=1, status='Good')
-    for i in Items:
-        availableItems[i.id] = {'name': i.type,
-                                'batch': i.batch, 'quantity': i.quantity}
+    availableItems = getAvailableItems(constants.MAIN_STORAGE_ID)
     if request.method == "POST":
         form = SendGoodsForm(1, request.POST)
-        if form.is_valid:
-            name = form['type'].value()
-            batch = form['batch'].value()
-            quantity = form['quantity'].value()
-            received_from = form['received_from'].value()
-            is_available = False
-            for key, value in availableItems.items():
-                if str(value['name']) == name and str(value['batch']) == batch and int(value['quantity']) >= int(quantity):
-                    name = ItemType.objects.get(name=str(value['name']))
-                    batch = Batch.objects.get(name=str(value['batch']))
-                    is_available = True
-                    if int(value['quantity']) == int(quantity):
-                        ItemCard.objects.get(
-                            type=name, batch=batch, stock=1, quantity=int(quantity)).delete()
-                    else:
-                        q = ItemCard.objects.filter(
-                            type=name, batch=batch, stock=1)[0]
-                        q.quantity = int(q.quantity - int(quantity))
-                        q.save()
-
-            if is_available:
-                ItemCard.objects.create(type=ItemType.objects.get(name=name),
-                                        batch=Batch.objects.get(
-                                            name=str(batch)),
-                                        stock=stock,
-                                        quantity=quantity,
-                                        status='Good',
-                                        received_from="Main Storage",
-                                        is_transforming=True)
-                GoodsMovement.objects.create(item=ItemCard.objects.all().order_by('-id')[0],
-                                             sender='Main Storage',
-                                             receiver=str(distributor.person.name))
-            else:
+        if form.is_valid():
+            transfer = transferGoods(request, constants.MAIN_STORAGE_ID,
+                                     distributor.stock.id,
+                                     int(form.cleaned_data['type']),
+                                     int(form.cleaned_data['batch']),
+                                     form.cleaned_data['quantity'])
+            if transfer is None:
                 messages.info(
                     request, "Item or quantity is not available in the stock")
                 return redirect(resolvePageUrl(request, constants.PAGES.SEND_GOODS_PAGE), pk)
-        return redirect(resolvePageUrl(request, constants.PAGES.DISTRIBUTOR_STOCK_PAGE), pk)
+            return redirect(resolvePageUrl(request, constants.PAGES.DISTRIBUTOR_STOCK_PAGE), pk)
     context = {'availableItems': availableItems, 'form': form, 'base': base(
         request), 'EmployeeTasks': EmployeeTasks(request)}
     return render(request, 'warehouse_admin/send_goods.html', context)
 
 
+def DispatchGoodsPage(request, pk):
+    distributor = Distributor.objects.select_related('person').get(id=pk)
+    choices = getDispatchChoices(constants.MAIN_STORAGE_ID)
+    formset = DispatchGoodsFormSet(form_kwargs=choices)
+    if request.method == "POST":
+        formset = DispatchGoodsFormSet(request.POST, form_kwargs=choices)
+        if formset.is_valid():
+            lines = [DispatchLine(form.cleaned_data['type'],
+                                  form.cleaned_data['batch'],
+                                  form.cleaned_data['quantity'])
+                     for form in formset if form.cleaned_data]
+            dispatch = dispatchGoods(request, constants.MAIN_STORAGE_ID,
+                                     distributor.stock.id, lines)
+            if not dispatch.shortages:
+                messages.success(
+                    request, f"{len(dispatch.movements)} items have been sent to '{distributor.person.name}'")
+                return redirect(resolvePageUrl(request, constants.PAGES.DISTRIBUTOR_STOCK_PAGE), pk)
+            types, batches = dict(choices['types']), dict(choices['batches'])
+            for line in dispatch.shortages:
+                messages.info(
+                    request, f"'{types.get(line.type_id)}' of batch '{batches.get(line.batch_id)}' is short by {line.quantity}")
+    context = {'formset': formset, 'distributor': distributor,
+               'availableItems': getAvailableItems(constants.MAIN_STORAGE_ID),
+               'base': base(request), 'EmployeeTasks': EmployeeTasks(request)}
+    return render(request, 'warehouse_admin/dispatch_goods.html', context)
+
+
+def _getFilteredMovements(form):
+    # The invalid filters are left out of 'cleaned_data', the form shows
+    # their errors
+    form.is_valid()
+    return filterMovements(**form.cleaned_data)
+
+
 def GoodsMovementPage(request):
-    goodsMovement = GoodsMovement.objects.all()
-    context = {'GoodsMovement': goodsMovement, 'base': base(
-        request), 'EmployeeTasks': EmployeeTasks(request)}
+    form = GoodsMovementFilterForm(request.GET)
+    page = getMovementsPage(_getFilteredMovements(form),
+                            request.GET.get('cursor'))
+    # The filters of the next page link
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    context = {'GoodsMovement': page.movements, 'cursor': page.next_cursor,
+               'query': query.urlencode(), 'form': form,
+               'base': base(request), 'EmployeeTasks': EmployeeTasks(request)}
     return render(request, 'warehouse_admin/goods_movement.html', context)
 
 
+def ExportGoodsMovementPage(request):
+    form = GoodsMovementFilterForm(request.GET)
+    response = StreamingHttpResponse(
+        iterMovementsCsv(_getFilteredMovements(form)),
+        content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="goods_movement_' \
+        + f'{timezone.now().date().isoformat()}.csv"'
+    return response
+
+
 def DamagedGoodsPage(request):
     MainStorageStock = Stock.objects.get(id=1)
     Items = ItemCard.objects.filter(
@@ -251,44 +268,19 @@ def DamagedGoodsPage(request):
 
 
 def AddDamagedGoodsPage(request):
-    MainStorageStock = Stock.objects.get(id=1)
     form = SendGoodsForm(1)
-    availableItems = {}
-    Items = ItemCard.objects.filter(stock=1, status='Good')
-    for i in Items:
-        availableItems[i.id] = {'name': i.type,
-                                'batch': i.batch, 'quantity': i.quantity}
+    availableItems = getAvailableItems(constants.MAIN_STORAGE_ID)
     if request.method == "POST":
         form = SendGoodsForm(1, request.POST)
-        if form.is_valid:
-            name = form['type'].value()
-            batch = form['batch'].value()
-            quantity = form['quantity'].value()
-            received_from = form['received_from'].value()
-            is_available = False
-            for key, value in availableItems.items():
-                if str(value['name']) == name and str(value['batch']) == batch and int(value['quantity']) >= int(quantity):
-                    name = ItemType.objects.get(name=str(value['name']))
-                    batch = Batch.objects.get(name=str(value['batch']))
-                    is_available = True
-                    if int(value['quantity']) == int(quantity):
-                        ItemCard.objects.get(
-                            type=name, batch=batch, stock=1, quantity=int(quantity)).delete()
-                    else:
-                        q = ItemCard.objects.get(
-                            type=name, batch=batch, stock=1)
-                        q.quantity = int(q.quantity - int(quantity))
-                        q.save()
-
-            if is_available:
-                ItemCard.objects.create(type=ItemType.objects.get(name=name),
-                                        batch=Batch.objects.get(
-                                            name=str(batch)),
-                                        stock=MainStorageStock,
-                                        quantity=quantity,
-                                        status='Damaged',
-                                        received_from=received_from)
-            else:
+        if form.is_valid():
+            transfer = transferGoods(request, constants.MAIN_STORAGE_ID,
+                                     constants.MAIN_STORAGE_ID,
+                                     int(form.cleaned_data['type']),
+                                     int(form.cleaned_data['batch']),
+                                     form.cleaned_data['quantity'],
+                                     status='Damaged',
+                                     received_from=request.POST.get('received_from'))
+            if transfer is None:
                 messages.info(
                     request, "Item or quantity is not available in the stock")
                 return redirect(resolvePageUrl(request, constants.PAGES.ADD_DAMAGED_GOODS_PAGE))
@@ -298,29 +290,34 @@ def AddDamagedGoodsPage(request):
     return render(request, 'warehouse_admin/add_damaged_goods.html', context)
 
 
-def TransformedGoodsPage(request):
-    Items = ItemCard.objects.filter(is_transforming=True)
+def _approveTransfers(request, card_ids):
+    approved = approveTransfers(request, card_ids)
+    if approved:
+        messages.success(
+            request, f"{approved} transformed goods cards have been 'approved'")
+    if not ItemCard.objects.filter(is_transforming=True).exists():
+        messages.info(request, "There is no transformed goods to be approved")
+        # The approval task is done once no goods are left in transit
+        task: Task = Task.filter(id=10).first()
+        if task is not None:
+            with Task.unitOfWork(request):
+                task.setRated(request, True)
+                task.setStatus(request, constants.TASK_STATUS.ON_TIME)
+    return redirect(resolvePageUrl(request, constants.PAGES.TRANSFORMED_GOODS_PAGE))
 
-    context = {'Items': Items, 'base': base(
+
+def TransformedGoodsPage(request):
+    if request.method == "POST":
+        card_ids = [int(id) for id in request.POST.getlist('cards')
+                    if id.isdigit()]
+        return _approveTransfers(request, card_ids)
+    context = {'Groups': getInTransitGroups(), 'base': base(
         request), 'EmployeeTasks': EmployeeTasks(request)}
     return render(request, 'warehouse_admin/transformed_goods.html', context)
 
 
 def ApproveTransformedGoods(request, pk):
-    item = ItemCard.objects.get(id=pk)
-    item.is_transforming = False
-    item.save()
-
-    if not ItemCard.objects.filter(is_transforming=True).exists():
-        messages.info(request, "There is no transformed goods to be approved")
-        from main.models import Task
-        task = Task.objects.get(id=10)
-        task.is_rated = True
-        task.status = "On-Time"
-        task.save()
-    messages.success(
-        request, f"The transformed goods '{item.type}' from '{item.received_from}' to '{item.getReceiver()}' has been 'approved'")
-    return redirect(resolvePageUrl(request, constants.PAGES.TRANSFORMED_GOODS_PAGE))
+    return _approveTransfers(request, [int(pk)])
 
 
 def RetailGoodsPage(request):
@@ -333,39 +330,25 @@ def RetailGoodsPage(request):
 
 def ConvertToRetailPage(request):
     form = ConvertToRetailForm()
-    availableItems = {}
-    Items = ItemCard.objects.filter(stock=1, status="Good")
-    for i in Items:
-        availableItems[i.id] = {'name': i.type,
-                                'batch': i.batch, 'quantity': i.quantity}
+    availableItems = getAvailableItems(constants.MAIN_STORAGE_ID)
     if request.method == "POST":
         form = ConvertToRetailForm(request.POST)
-        if form.is_valid:
-            name = form['type'].value()
-            batch = form['batch'].value()
-            quantity = form['quantity'].value()
-            is_available = False
-            for key, value in availableItems.items():
-                if str(value['name']) == name and str(value['batch']) == batch and int(value['quantity']) >= int(quantity):
-                    name = ItemType.objects.get(name=str(value['name']))
-                    batch = Batch.objects.get(name=str(value['batch']))
-                    is_available = True
-                    if int(value['quantity']) == int(quantity):
-                        ItemCard.objects.get(
-                            type=name, batch=batch, status="Good", stock=1, quantity=int(quantity)).delete()
-                    else:
-                        q = ItemCard.objects.get(
-                            type=name, batch=batch, status="Good", stock=1)
-                        q.quantity = int(q.quantity - int(quantity))
-                        q.save()
-
-            if is_available:
-                RetailCard.objects.create(type=ItemType.objects.get(
-                    name=name), weight=int(quantity) * 7000)
-            else:
+        if form.is_valid():
+            type_id = int(form.cleaned_data['type'])
+            quantity = form.cleaned_data['quantity']
+            with transaction.atomic():
+                # The goods leave the stocks as a retail card
+                transfer = transferGoods(request, constants.MAIN_STORAGE_ID,
+                                         None, type_id,
+                                         int(form.cleaned_data['batch']),
+                                         quantity)
+                if transfer is not None:
+                    RetailCard.create(request, type_id=type_id,
+                                      weight=quantity * 7000)
+            if transfer is None:
                 messages.info(
                     request, "Item or quantity is not available in the stock")
-                return redirect('ConvertToRetailPage')
+                return redirect(resolvePageUrl(request, constants.PAGES.CONVERT_TO_RETAIL_PAGE))
         return redirect(resolvePageUrl(request, constants.PAGES.RETAIL_GOODS_PAGE))
 
     context = {'availableItems': availableItems, 'form': form, 'base': base(